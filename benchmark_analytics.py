@@ -0,0 +1,96 @@
+import sys
+import os
+import time
+import tempfile
+import argparse
+from sqlalchemy import text
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.load import DataLoader
+from src.export import ParquetExporter
+from src.analytics import AnalyticsRunner, read_queries
+
+N_CITIES = 1000
+
+def make_config(tmp, source):
+    return {
+        'database': {'dialect': 'sqlite', 'database': os.path.join(tmp, 'benchmark.db')},
+        'tables': {},
+        'dim_date': {'start': '2020-01-01', 'end': '2030-12-31'},
+        'load': {'rollups': False},
+        'export': {'directory': os.path.join(tmp, 'parquet')},
+        'analytics': {'source': source}
+    }
+
+def build_warehouse(loader, rows):
+    """Fill dim_city and fact_weather with rows hourly readings spread over N_CITIES cities"""
+    with loader.engine.connect() as conn:
+        conn.execute(text("""
+            INSERT INTO dim_city (city_name, country_code, population)
+            WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :cities)
+            SELECT 'City ' || n, 'C' || (n % 50), 10000 + n * 137 FROM seq
+        """), {'cities': N_CITIES})
+        conn.execute(text("""
+            INSERT INTO fact_weather (city_id, date_id, temperature, humidity, pressure,
+                                      wind_speed, weather_condition, recorded_time)
+            WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n < :rows - 1),
+            readings AS (SELECT n, n % :cities + 1 AS city_id,
+                                datetime('2024-01-01', '+' || (n / :cities) || ' hours') AS recorded_time
+                         FROM seq)
+            SELECT city_id, CAST(strftime('%Y%m%d', recorded_time) AS INTEGER),
+                   round((n * 7919 % 4000) / 100.0 - 10, 2), n % 100, 980 + n % 60,
+                   round((n % 250) / 10.0, 2), 'clear sky', recorded_time
+            FROM readings
+        """), {'rows': rows, 'cities': N_CITIES})
+        conn.commit()
+
+def timed_queries(runner, queries, backend):
+    timings = []
+    for sql in queries:
+        start = time.perf_counter()
+        runner.run(sql, backend=backend)
+        if runner.last_backend != backend:
+            return None
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def run(rows, threads):
+    queries = read_queries('sql/queries.sql')
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = DataLoader(make_config(tmp, 'sqlite'))
+        assert loader.create_tables()
+        start = time.perf_counter()
+        build_warehouse(loader, rows)
+        ParquetExporter(make_config(tmp, 'sqlite')).export(loader.engine)
+        print(f"\n📦 {rows:,} facts built and exported in {time.perf_counter() - start:.1f}s")
+
+        results = {}
+        for label, source, backend in [('sqlite', 'sqlite', 'sqlite'),
+                                       ('duckdb+sqlite', 'sqlite', 'duckdb'),
+                                       ('duckdb+parquet', 'parquet', 'duckdb')]:
+            config = make_config(tmp, source)
+            config['analytics']['threads'] = threads
+            runner = AnalyticsRunner(config, loader.engine)
+            results[label] = timed_queries(runner, queries, backend)
+            runner.close()
+        loader.engine.dispose()
+
+    print(f"{'query':>6} " + " ".join(f"{label:>15}" for label in results))
+    for i in range(len(queries)):
+        cells = [f"{timings[i] * 1000:>13,.0f}ms" if timings else f"{'n/a':>15}" for timings in results.values()]
+        print(f"{i + 1:>6} " + " ".join(cells))
+
+def main():
+    parser = argparse.ArgumentParser(description="BI query latency on SQLite vs DuckDB")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000000, 10000000, 100000000],
+                        help="fact_weather sizes to benchmark")
+    parser.add_argument('--threads', type=int, default=0, help="DuckDB threads (0: one per core)")
+    args = parser.parse_args()
+    print("⏱️ sql/queries.sql latency per backend (n/a: backend unavailable here)")
+    for rows in args.rows:
+        run(rows, args.threads)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import sys
+import os
+import time
+import tempfile
+import argparse
+from sqlalchemy import create_engine, text
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.bulk_load import BulkLoader
+from src.synthetic import SyntheticDataGenerator
+
+def to_sql_multi(conn, df, table_name):
+    """The previous load path: multi-row INSERTs through to_sql"""
+    df.to_sql(table_name, conn, if_exists='append', index=False, method='multi', chunksize=1000)
+
+def timed(engine, load, df, table_name):
+    with engine.connect() as conn:
+        df.head(0).to_sql(table_name, conn, if_exists='replace', index=False)
+        conn.commit()
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        load(conn, df, table_name)
+        conn.commit()
+    elapsed = time.perf_counter() - start
+    with engine.connect() as conn:
+        assert conn.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar() == len(df)
+    return elapsed
+
+def run(engine, label, sizes, batch_size):
+    bulk = BulkLoader(batch_size=batch_size)
+
+    def bulk_load(conn, df, table_name):
+        with bulk.fast_writes(conn):
+            bulk.insert(conn, df, table_name)
+            conn.commit()
+
+    print(f"⏱️ {label}: rows/sec, to_sql(method='multi') vs bulk loader")
+    print(f"{'rows':>10} {'to_sql':>12} {'bulk':>12} {'speedup':>8}")
+    for rows in sizes:
+        df = SyntheticDataGenerator(seed=11).weather_history(n_cities=1000, periods=max(1, rows // 1000))
+        old = timed(engine, to_sql_multi, df, 'benchmark_to_sql')
+        new = timed(engine, bulk_load, df, 'benchmark_bulk')
+        print(f"{len(df):>10} {len(df) / old:>12,.0f} {len(df) / new:>12,.0f} {old / new:>7.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk loader throughput benchmark")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 500000])
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--postgres-url', help="Also benchmark a PostgreSQL database, e.g. postgresql://user:pw@host/db")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'benchmark.db')}")
+        run(engine, "SQLite", args.rows, args.batch_size)
+        engine.dispose()
+
+    if args.postgres_url:
+        engine = create_engine(args.postgres_url)
+        run(engine, "PostgreSQL", args.rows, args.batch_size)
+        with engine.connect() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS benchmark_to_sql"))
+            conn.execute(text("DROP TABLE IF EXISTS benchmark_bulk"))
+            conn.commit()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
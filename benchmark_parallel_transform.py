@@ -0,0 +1,50 @@
+import sys
+import os
+import time
+import argparse
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.transform import DataTransformer
+from src.parallel_transform import ParallelTransformer
+from src.synthetic import SyntheticDataGenerator
+
+def raw_weather(rows, n_cities=500):
+    """Synthetic weather shaped like API output: plain, unnormalized strings"""
+    periods = max(1, rows // n_cities)
+    df = SyntheticDataGenerator(seed=7).weather_history(
+        n_cities=n_cities, periods=periods, duplicate_ratio=0.02, null_ratio=0.01
+    )
+    for col in ['city', 'country', 'weather_description']:
+        df[col] = df[col].astype(object).str.lower()
+    return df
+
+def timed(transformer, df):
+    start = time.perf_counter()
+    result = transformer.clean_weather_data(df.copy())
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial vs process-pool weather cleaning")
+    parser.add_argument('--rows', type=int, nargs='+', default=[50000, 200000, 1000000, 4000000])
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    serial = DataTransformer()
+    parallel = ParallelTransformer(workers=args.workers, min_rows=0)
+
+    print(f"⏱️ Weather cleaning, serial vs {args.workers} worker processes")
+    print(f"{'rows':>10} {'serial s':>10} {'parallel s':>11} {'speedup':>8}")
+    for rows in args.rows:
+        df = raw_weather(rows)
+        serial_time, expected = timed(serial, df)
+        parallel_time, result = timed(parallel, df)
+        result['extraction_time'] = expected['extraction_time']
+        pd.testing.assert_frame_equal(expected, result, check_categorical=False)
+        print(f"{len(df):>10} {serial_time:>10.2f} {parallel_time:>11.2f} {serial_time / parallel_time:>7.2f}x")
+    print("💡 Set transform.parallel_min_rows near the smallest size with a speedup above 1x")
+
+if __name__ == "__main__":
+    main()
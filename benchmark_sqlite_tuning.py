@@ -0,0 +1,95 @@
+import sys
+import os
+import time
+import tempfile
+import argparse
+import threading
+from sqlalchemy import text
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils import get_db_connection
+
+# SQLite's own defaults: rollback journal, synchronous FULL, 2 MiB cache, no mmap
+UNTUNED = {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'cache_size': -2000,
+           'mmap_size': 0, 'temp_store': 'DEFAULT', 'busy_timeout': 5000}
+
+def make_engine(path, pragmas):
+    return get_db_connection({'database': {'database': path, 'sqlite_pragmas': pragmas}})
+
+def prepare(engine, rows):
+    with engine.connect() as conn:
+        conn.execute(text("""
+            CREATE TABLE readings (id INTEGER PRIMARY KEY, city_id INTEGER, temperature REAL, recorded_time TEXT)
+        """))
+        conn.execute(text("""
+            INSERT INTO readings (city_id, temperature, recorded_time)
+            WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n < :rows - 1)
+            SELECT n % 500, (n * 7919 % 4000) / 100.0 - 10, datetime('2024-01-01', '+' || n || ' minutes') FROM seq
+        """), {'rows': rows})
+        conn.commit()
+
+def writer(engine, stop, counts, batch):
+    """Small committed batches, as incremental loads write them"""
+    n = 0
+    while not stop.is_set():
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("INSERT INTO readings (city_id, temperature, recorded_time) VALUES (:c, :t, :r)"),
+                             [{'c': (n + i) % 500, 't': 12.5, 'r': '2025-01-01 00:00:00'} for i in range(batch)])
+                conn.commit()
+            counts['rows_written'] += batch
+        except Exception:
+            counts['write_errors'] += 1
+        n += batch
+
+def reader(engine, stop, counts):
+    """Dashboard-style aggregate reads"""
+    while not stop.is_set():
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("""
+                    SELECT city_id, AVG(temperature), COUNT(*) FROM readings
+                    WHERE city_id < 50 GROUP BY city_id
+                """)).fetchall()
+            counts['reads'] += 1
+        except Exception:
+            counts['read_errors'] += 1
+
+def run(label, pragmas, rows, readers, seconds, batch):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, 'benchmark.db'), pragmas)
+        prepare(engine, rows)
+        counts = {'rows_written': 0, 'write_errors': 0, 'reads': 0, 'read_errors': 0}
+        stop = threading.Event()
+        threads = [threading.Thread(target=writer, args=(engine, stop, counts, batch))]
+        threads += [threading.Thread(target=reader, args=(engine, stop, counts)) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+    print(f"{label:>10} {counts['rows_written'] / seconds:>14,.0f} {counts['reads'] / seconds:>10,.1f} "
+          f"{counts['write_errors'] + counts['read_errors']:>8}")
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent read/write throughput, default vs tuned SQLite")
+    parser.add_argument('--rows', type=int, default=500000, help="Rows in the table before the run")
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--batch', type=int, default=100, help="Rows per write transaction")
+    args = parser.parse_args()
+
+    print(f"⏱️ 1 writer + {args.readers} readers for {args.seconds}s on {args.rows:,} rows")
+    print(f"{'profile':>10} {'rows written/s':>14} {'reads/s':>10} {'errors':>8}")
+    before = run('default', UNTUNED, args.rows, args.readers, args.seconds, args.batch)
+    after = run('tuned', {}, args.rows, args.readers, args.seconds, args.batch)
+    if before['rows_written']:
+        print(f"✅ Write throughput {after['rows_written'] / before['rows_written']:.1f}x with the tuned profile")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,22 @@
+import sys
+import os
+
+# Add src to path so the modules' own imports resolve
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
 from src.extract import DataExtractor
 from src.transform import DataTransformer
 from src.load import DataLoader
 from src.utils import load_config, setup_logging
+from src.backfill import BackfillRunner
+from src.streaming_transform import StreamingWeatherCleaner
+from src.parallel_transform import ParallelTransformer
+from src.quality import DataQualityChecker
+from src.export import ParquetExporter
+from src.analytics import AnalyticsRunner
+from src.maintenance import DatabaseMaintenance
+import pandas as pd
+import argparse
 import schedule
 import time
 
@@ -11,12 +26,26 @@ class ETLPipeline:
     def __init__(self):
         self.config = load_config()
         self.extractor = DataExtractor(self.config)
-        self.transformer = DataTransformer()
+        self.transformer = self._make_transformer()
         self.loader = DataLoader(self.config)
+        self.quality_checker = DataQualityChecker(self.config.get('quality', {}).get('weather'))
+        self.exporter = ParquetExporter(self.config, self.loader.partitions)
+        self.last_report = {}
+    
+    def _make_transformer(self):
+        """Serial transformer, or a process-pool one if transform.parallel is set"""
+        transform_config = self.config.get('transform', {})
+        if not transform_config.get('parallel'):
+            return DataTransformer()
+        return ParallelTransformer(
+            workers=transform_config.get('workers') or None,
+            min_rows=transform_config.get('parallel_min_rows', 200000)
+        )
     
     def run_pipeline(self):
         """Execute complete ETL pipeline"""
         logger.info("Starting ETL Pipeline")
+        self.last_report = {}
         
         try:
             # Get cities from config
@@ -31,26 +60,46 @@ class ETLPipeline:
             # Extract
             logger.info("Extraction phase started")
             weather_data = self.extractor.extract_weather_data(cities)
-            population_data = self.extractor.extract_population_data()
+            self.last_report.update(self.extractor.last_run_stats)
             
             if weather_data.empty:
+                if self.extractor.last_run_stats.get('cities_requested'):
+                    logger.info("No new weather observations since the last load")
+                    self._log_report()
+                    return True
                 logger.error("No weather data extracted. Pipeline stopped.")
                 return False
             
             # Transform
             logger.info("Transformation phase started")
-            clean_weather = self.transformer.clean_weather_data(weather_data)
-            clean_population = self.transformer.clean_population_data(population_data)
+            # Rows are checked before imputation, so failing rows never feed the fill values
+            clean_weather, weather_cleaner = self.clean_weather(weather_data, validate=self.check_quality)
+            
+            if clean_weather.empty:
+                logger.warning("Every weather row failed data-quality checks; nothing to load")
+                if self.extractor.watermarks is not None:
+                    self.extractor.watermarks.update(weather_data)
+                self._log_report()
+                return True
             
             # Load to staging
             logger.info("Loading phase started")
             self.loader.load_to_staging(clean_weather, 'staging_weather')
-            self.loader.load_to_staging(clean_population, 'staging_population')
+            self.load_population()
             
             # Load to warehouse
-            success = self.loader.load_to_warehouse()
+            success = self.loader.load_to_warehouse(clean_weather)
             
             if success:
+                # Only advance watermarks once the batch is in the warehouse
+                if self.extractor.watermarks is not None:
+                    self.extractor.watermarks.update(weather_data)
+                if weather_cleaner is not None:
+                    weather_cleaner.commit()
+                self.last_report['observations_loaded'] = len(clean_weather)
+                self.last_report.update(self.loader.last_load_stats)
+                self.export_facts()
+                self._log_report()
                 logger.info("ETL Pipeline completed successfully")
                 return True
             else:
@@ -61,13 +110,140 @@ class ETLPipeline:
             logger.error(f"ETL Pipeline failed: {e}")
             return False
     
+    def _log_report(self):
+        """Log the run report for this pipeline run"""
+        logger.info("Run report: " + ", ".join(f"{key}={value}" for key, value in self.last_report.items()))
+    
+    def clean_weather(self, weather_data, validate=None):
+        """Clean weather data; returns (frame, cleaner to commit after load)"""
+        transform_config = self.config.get('transform', {})
+        if not transform_config.get('running_stats'):
+            return self.transformer.clean_weather_data(weather_data, validate), None
+        
+        cleaner = StreamingWeatherCleaner(
+            state_path=transform_config.get('stats_path', 'state/weather_stats.json'),
+            seen_capacity=transform_config.get('seen_capacity', 1000000)
+        )
+        chunks = list(cleaner.clean([weather_data], validate))
+        clean = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+        return clean, cleaner
+    
+    def check_quality(self, weather_data):
+        """Quarantine weather rows that break data-quality rules; returns the rest"""
+        quality_config = self.config.get('quality', {})
+        if not quality_config.get('enabled'):
+            return weather_data
+        
+        valid, quarantined, counts = self.quality_checker.validate(weather_data)
+        self.last_report.update({f"quality_{name}": count for name, count in counts.items()})
+        self.last_report['rows_quarantined'] = len(quarantined)
+        if not quarantined.empty:
+            self.loader.load_to_quarantine(quarantined, quality_config.get('quarantine_table', 'quarantine_weather'))
+        return valid
+    
+    def export_facts(self):
+        """Append newly loaded facts to the Parquet export; failures do not fail the run"""
+        if not self.exporter.enabled:
+            return
+        try:
+            self.last_report['facts_exported'] = self.exporter.export(self.loader.engine)
+        except Exception as e:
+            # The watermark was not advanced, so the next run exports these facts
+            logger.error(f"Parquet export failed: {e}")
+    
+    def load_population(self):
+        """Extract, clean and stage population data"""
+        if self.config['data_sources'].get('streaming'):
+            # Chunks flow from the reader through cleaning into staging
+            with self.extractor.extract_population_chunks() as (latest_year, chunks):
+                clean_chunks = self.transformer.clean_population_chunks(chunks, latest_year)
+                return self.loader.load_to_staging_chunks(clean_chunks, 'staging_population')
+        
+        population_data = self.extractor.extract_population_data()
+        clean_population = self.transformer.clean_population_data(population_data)
+        return self.loader.load_to_staging(clean_population, 'staging_population')
+    
     def initialize_database(self):
         """Initialize database tables"""
         logger.info("Initializing database")
         return self.loader.create_tables()
 
+def run_backfill(args):
+    """Backfill historical weather for the configured cities"""
+    config = load_config()
+    cities = config.get('cities', [])
+    print(f"⏪ Backfilling {len(cities)} cities from {args.start} to {args.end}...")
+    try:
+        report = BackfillRunner(config, workers=args.workers).run(cities, args.start, args.end)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+    print(f"✅ Loaded {report['partitions_loaded']} partitions, skipped {report['partitions_skipped']} already done")
+    return report['partitions_failed'] == 0
+
+def run_archive(args):
+    """Archive fact_weather partitions of months before args.before"""
+    loader = DataLoader(load_config())
+    if not loader.partitions.enabled:
+        print("❌ Partitioning is not enabled in config/config.yaml")
+        return False
+    archived = loader.partitions.archive(loader.engine, args.before)
+    print(f"📦 Archived {len(archived)} partitions: {', '.join(archived) or 'none'}")
+    return True
+
+def run_export(args):
+    """Export facts loaded since the last export to Parquet"""
+    config = load_config()
+    loader = DataLoader(config)
+    exported = ParquetExporter(config, loader.partitions).export(loader.engine)
+    print(f"🧱 Exported {exported} facts to Parquet")
+    return True
+
+def run_queries(args):
+    """Run a file of BI queries, each on the backend chosen for it"""
+    config = load_config()
+    loader = DataLoader(config)
+    runner = AnalyticsRunner(config, loader.engine)
+    try:
+        for i, (frame, backend, seconds) in enumerate(runner.run_file(args.file, backend=args.backend), 1):
+            print(f"📊 Query {i}: {len(frame)} rows on {backend} in {seconds * 1000:.0f}ms")
+            print(frame.head(args.show).to_string(index=False))
+        stats = runner.cache.stats()
+        print(f"🗃️ Query cache: {stats['hits']} hits, {stats['misses']} misses, {stats['bytes']} bytes")
+    finally:
+        runner.close()
+    return True
+
 def main():
     """Main function to run the ETL pipeline"""
+    parser = argparse.ArgumentParser(description="Weather data warehouse ETL pipeline")
+    subparsers = parser.add_subparsers(dest='command')
+    backfill_parser = subparsers.add_parser('backfill', help="Load historical weather for a date range")
+    backfill_parser.add_argument('--start', required=True, help="First date to load (YYYY-MM-DD)")
+    backfill_parser.add_argument('--end', required=True, help="Date to stop before (YYYY-MM-DD)")
+    backfill_parser.add_argument('--workers', type=int, help="Number of worker processes")
+    archive_parser = subparsers.add_parser('archive-partitions', help="Archive monthly fact_weather partitions")
+    archive_parser.add_argument('--before', required=True, help="First month to keep (YYYY-MM)")
+    subparsers.add_parser('export-parquet', help="Export newly loaded facts to Parquet")
+    queries_parser = subparsers.add_parser('run-queries', help="Run BI queries on SQLite or DuckDB")
+    queries_parser.add_argument('--file', default='sql/queries.sql', help="File of queries to run")
+    queries_parser.add_argument('--backend', choices=['sqlite', 'duckdb'], help="Force a backend for every query")
+    queries_parser.add_argument('--show', type=int, default=10, help="Rows of each result to print")
+    args = parser.parse_args()
+    
+    if args.command == 'backfill':
+        run_backfill(args)
+        return
+    if args.command == 'archive-partitions':
+        run_archive(args)
+        return
+    if args.command == 'export-parquet':
+        run_export(args)
+        return
+    if args.command == 'run-queries':
+        run_queries(args)
+        return
+    
     pipeline = ETLPipeline()
     
     # Initialize database (run once)
@@ -81,6 +257,11 @@ def main():
     # Schedule to run daily at 8 AM
     schedule.every().day.at("08:00").do(pipeline.run_pipeline)
     
+    # Keep the WAL checkpointed and planner statistics fresh between runs
+    maintenance = DatabaseMaintenance(pipeline.loader.engine, pipeline.config)
+    if pipeline.config.get('maintenance', {}).get('enabled', True):
+        maintenance.start()
+    
     logger.info("ETL Pipeline scheduled to run daily at 8:00 AM")
     print("⏰ ETL Pipeline scheduled to run daily at 8:00 AM")
     print("💡 Press Ctrl+C to stop the scheduler")
@@ -91,6 +272,7 @@ def main():
             schedule.run_pending()
             time.sleep(60)  # Check every minute
     except KeyboardInterrupt:
+        maintenance.stop()
         print("\n👋 ETL Pipeline stopped")
 
 if __name__ == "__main__":
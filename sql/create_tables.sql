@@ -8,6 +8,7 @@ CREATE TABLE IF NOT EXISTS staging_weather (
     pressure INTEGER,
     wind_speed DECIMAL(5,2),
     weather_description VARCHAR(100),
+    date_id INTEGER,
     extraction_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -19,6 +20,34 @@ CREATE TABLE IF NOT EXISTS staging_population (
     extraction_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Integer-keyed facts of the current batch, merged into fact_weather
+CREATE TABLE IF NOT EXISTS staging_fact_weather (
+    city_id INTEGER,
+    date_id INTEGER,
+    temperature DECIMAL(5,2),
+    humidity INTEGER,
+    pressure INTEGER,
+    wind_speed DECIMAL(5,2),
+    weather_condition VARCHAR(100),
+    recorded_time TIMESTAMP
+);
+
+-- Weather rows rejected by data-quality rules, with the rules they failed
+CREATE TABLE IF NOT EXISTS quarantine_weather (
+    city VARCHAR(100),
+    country VARCHAR(10),
+    timestamp TIMESTAMP,
+    temperature DECIMAL(5,2),
+    humidity INTEGER,
+    pressure INTEGER,
+    wind_speed DECIMAL(5,2),
+    weather_description VARCHAR(100),
+    date_id INTEGER,
+    extraction_time TIMESTAMP,
+    failed_rules VARCHAR(500),
+    quarantined_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Data Warehouse Tables
 CREATE TABLE IF NOT EXISTS dim_city (
     city_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -29,8 +58,9 @@ CREATE TABLE IF NOT EXISTS dim_city (
     UNIQUE(city_name, country_code)
 );
 
+-- date_id is a YYYYMMDD smart key (e.g. 20240131)
 CREATE TABLE IF NOT EXISTS dim_date (
-    date_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date_id INTEGER PRIMARY KEY,
     full_date DATE NOT NULL UNIQUE,
     year INTEGER,
     month INTEGER,
@@ -52,7 +82,50 @@ CREATE TABLE IF NOT EXISTS fact_weather (
     loaded_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Per-city rollups maintained by the loader (see sql/rollup_queries.sql)
+CREATE TABLE IF NOT EXISTS rollup_weather_daily (
+    city_id INTEGER NOT NULL,
+    date_id INTEGER NOT NULL,
+    reading_count INTEGER NOT NULL,
+    temperature_count INTEGER NOT NULL,
+    temperature_sum DOUBLE PRECISION,
+    temperature_min DOUBLE PRECISION,
+    temperature_max DOUBLE PRECISION,
+    humidity_count INTEGER NOT NULL,
+    humidity_sum DOUBLE PRECISION,
+    humidity_min DOUBLE PRECISION,
+    humidity_max DOUBLE PRECISION,
+    PRIMARY KEY (city_id, date_id)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_weather_monthly (
+    city_id INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    reading_count INTEGER NOT NULL,
+    temperature_count INTEGER NOT NULL,
+    temperature_sum DOUBLE PRECISION,
+    temperature_min DOUBLE PRECISION,
+    temperature_max DOUBLE PRECISION,
+    humidity_count INTEGER NOT NULL,
+    humidity_sum DOUBLE PRECISION,
+    humidity_min DOUBLE PRECISION,
+    humidity_max DOUBLE PRECISION,
+    PRIMARY KEY (city_id, year, month)
+);
+
+-- Warehouse-wide counters, e.g. load_version, bumped by every warehouse load
+CREATE TABLE IF NOT EXISTS warehouse_meta (
+    meta_key VARCHAR(50) PRIMARY KEY,
+    meta_value INTEGER NOT NULL
+);
+
 -- Create indexes for better performance
+-- Staging tables persist between runs, so index the dim_city join keys
+CREATE INDEX IF NOT EXISTS idx_staging_weather_city_country ON staging_weather(city, country);
+CREATE INDEX IF NOT EXISTS idx_staging_population_city_country ON staging_population(city, country);
 CREATE INDEX IF NOT EXISTS idx_fact_weather_city_date ON fact_weather(city_id, date_id);
+-- The unique (city_id, recorded_time) key is created by
+-- sql/migrations/0003_staging_and_fact_key.sql, after duplicates are removed
 CREATE INDEX IF NOT EXISTS idx_dim_city_name_country ON dim_city(city_name, country_code);
 CREATE INDEX IF NOT EXISTS idx_dim_date_full_date ON dim_date(full_date);
\ No newline at end of file
@@ -0,0 +1,13 @@
+-- Re-key dim_date from the surrogate ids of older warehouses (1, 2, ...)
+-- to YYYYMMDD smart keys, and point facts at them by the day they were
+-- recorded. No YYYYMMDD key is below 10000101, so rows that already have
+-- one are left alone and this is a no-op on a new warehouse.
+
+-- Facts let go of the old keys first, since PostgreSQL enforces the reference
+UPDATE fact_weather SET date_id = NULL WHERE date_id < 10000101;
+
+UPDATE dim_date SET date_id = year * 10000 + month * 100 + day WHERE date_id < 10000101;
+
+UPDATE fact_weather SET date_id = (
+    SELECT dd.date_id FROM dim_date dd WHERE dd.full_date = DATE(fact_weather.recorded_time)
+) WHERE date_id IS NULL;
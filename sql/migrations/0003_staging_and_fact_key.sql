@@ -0,0 +1,46 @@
+-- Bring tables that older warehouses created differently up to this schema.
+
+-- Older loads replaced the staging tables through pandas on every run,
+-- leaving untyped columns and no date_id. Staging is reloaded on every
+-- run, so both tables are rebuilt empty from their current definitions.
+DROP TABLE IF EXISTS staging_weather;
+
+CREATE TABLE staging_weather (
+    city VARCHAR(100),
+    country VARCHAR(10),
+    timestamp TIMESTAMP,
+    temperature DECIMAL(5,2),
+    humidity INTEGER,
+    pressure INTEGER,
+    wind_speed DECIMAL(5,2),
+    weather_description VARCHAR(100),
+    date_id INTEGER,
+    extraction_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+DROP TABLE IF EXISTS staging_population;
+
+CREATE TABLE staging_population (
+    city VARCHAR(100),
+    country VARCHAR(10),
+    population BIGINT,
+    year INTEGER,
+    extraction_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_staging_weather_city_country ON staging_weather(city, country);
+CREATE INDEX IF NOT EXISTS idx_staging_population_city_country ON staging_population(city, country);
+
+-- Older loads inserted every fact again when a batch was rerun. The first
+-- load of each (city_id, recorded_time) is kept, as on_conflict "nothing"
+-- would have done, before the natural key is enforced.
+DELETE FROM fact_weather
+WHERE city_id IS NOT NULL AND recorded_time IS NOT NULL
+  AND weather_id NOT IN (
+    SELECT MIN(weather_id) FROM fact_weather
+    WHERE city_id IS NOT NULL AND recorded_time IS NOT NULL
+    GROUP BY city_id, recorded_time
+);
+
+-- Natural key of a fact: backs the merge's anti-join and ON CONFLICT target
+CREATE UNIQUE INDEX IF NOT EXISTS uq_fact_weather_city_time ON fact_weather(city_id, recorded_time);
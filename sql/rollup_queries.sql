@@ -0,0 +1,50 @@
+-- Business Intelligence Queries over the rollup tables
+-- Same results as sql/queries.sql, read from rollup_weather_daily/monthly
+-- instead of re-aggregating fact_weather
+
+-- 1. Average temperature by city
+SELECT
+    dc.city_name,
+    dc.country_code,
+    SUM(rm.temperature_sum) / SUM(rm.temperature_count) as avg_temperature,
+    MAX(rm.temperature_max) as max_temperature,
+    MIN(rm.temperature_min) as min_temperature
+FROM rollup_weather_monthly rm
+JOIN dim_city dc ON rm.city_id = dc.city_id
+GROUP BY dc.city_name, dc.country_code
+ORDER BY avg_temperature DESC;
+
+-- 2. Weather patterns by month
+SELECT
+    rm.month,
+    rm.year,
+    SUM(rm.temperature_sum) / SUM(rm.temperature_count) as avg_temperature,
+    SUM(rm.humidity_sum) / SUM(rm.humidity_count) as avg_humidity
+FROM rollup_weather_monthly rm
+GROUP BY rm.month, rm.year
+ORDER BY rm.year, rm.month;
+
+-- 3. Cities with highest population and their weather
+SELECT
+    dc.city_name,
+    dc.country_code,
+    dc.population,
+    SUM(rm.temperature_sum) / SUM(rm.temperature_count) as avg_temperature
+FROM dim_city dc
+JOIN rollup_weather_monthly rm ON dc.city_id = rm.city_id
+WHERE dc.population IS NOT NULL
+GROUP BY dc.city_name, dc.country_code, dc.population
+ORDER BY dc.population DESC
+LIMIT 10;
+
+-- 4. Daily weather summary
+SELECT
+    dd.full_date,
+    dc.city_name,
+    SUM(rd.reading_count) as readings_count,
+    SUM(rd.temperature_sum) / SUM(rd.temperature_count) as avg_temperature
+FROM rollup_weather_daily rd
+JOIN dim_date dd ON rd.date_id = dd.date_id
+JOIN dim_city dc ON rd.city_id = dc.city_id
+GROUP BY dd.full_date, dc.city_name
+ORDER BY dd.full_date DESC, dc.city_name;
@@ -0,0 +1,218 @@
+import os
+import re
+import time
+import pandas as pd
+from sqlalchemy import text
+from utils import setup_logging
+from export import ParquetExporter
+from query import QueryRunner, read_sql
+from partitions import SQLITE_MAX_ATTACHED
+from migrations import split_statements
+
+logger = setup_logging()
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+BACKENDS = ('auto', 'sqlite', 'duckdb')
+SOURCES = ('sqlite', 'parquet')
+
+# Queries that scan and aggregate, where a vectorized engine pays off
+AGGREGATE_QUERY = re.compile(r'\b(GROUP\s+BY|COUNT|SUM|AVG|MIN|MAX)\b', re.I)
+
+# Warehouse tables the BI queries read besides fact_weather
+DIMENSION_TABLES = ['dim_city', 'dim_date']
+
+def _quote(path):
+    """A path as a DuckDB string literal; ATTACH and view bodies take no parameters"""
+    return "'" + str(path).replace("'", "''") + "'"
+
+def read_queries(path):
+    """Statements of a .sql file with their comments stripped"""
+    with open(path, 'r') as file:
+        return split_statements(file.read())
+
+class AnalyticsRunner:
+    """Runs BI queries on SQLite or on an embedded DuckDB, chosen per query
+
+    DuckDB reads either the SQLite warehouse file itself (through its
+    sqlite extension) or the Parquet export of fact_weather, with the
+    small dimension tables copied in from the warehouse. Its vectorized,
+    multi-threaded executor is used for aggregate queries once
+    fact_weather holds at least min_fact_rows rows; point lookups and
+    small warehouses stay on SQLite. If DuckDB is not installed or cannot
+    open its source, queries fall back to SQLite. The Parquet source sees
+    facts up to the last export only. With SQLite partitioning, SQLite
+    queries see fact_weather as a view over every monthly partition, as
+    long as they fit SQLite's attach limit; beyond it they go to DuckDB.
+    Results from either backend go
+    through the load-versioned QueryRunner cache (query_cache.max_bytes).
+    """
+
+    def __init__(self, config, engine):
+        analytics_config = config.get('analytics', {})
+        self.config = config
+        self.engine = engine
+        self.backend = analytics_config.get('backend', 'auto')
+        self.source = analytics_config.get('source', 'sqlite')
+        self.threads = analytics_config.get('threads', 0)
+        self.min_fact_rows = analytics_config.get('min_fact_rows', 1000000)
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown analytics backend {self.backend!r}, expected one of {BACKENDS}")
+        if self.source not in SOURCES:
+            raise ValueError(f"Unknown analytics source {self.source!r}, expected one of {SOURCES}")
+        self.exporter = ParquetExporter(config)
+        self.cache = QueryRunner(engine, max_bytes=config.get('query_cache', {}).get('max_bytes', 64 * 1024 * 1024))
+        self.last_backend = None
+        self._duckdb = None
+        self._duckdb_error = None
+
+    def estimated_fact_rows(self):
+        """fact_weather size from its highest key, without scanning the table
+
+        SQLite partition files number their facts separately, so their
+        highest keys are added up.
+        """
+        max_id = "SELECT COALESCE(MAX(weather_id), 0) FROM {table}"
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(max_id.format(table='fact_weather'))).scalar()
+            partitions = self.exporter.partitions
+            if partitions.enabled and conn.dialect.name == 'sqlite':
+                months = partitions.stored_months()
+                for i in range(0, len(months), SQLITE_MAX_ATTACHED):
+                    aliases = partitions.attach(conn, months[i:i + SQLITE_MAX_ATTACHED], create=False)
+                    try:
+                        for alias in aliases.values():
+                            rows += conn.execute(text(max_id.format(table=f"{alias}.fact_weather"))).scalar()
+                    finally:
+                        partitions.detach(conn, aliases.values())
+            return rows
+
+    def _sqlite_months(self):
+        """Stored monthly partitions a SQLite query must attach, or [] if unpartitioned"""
+        partitions = self.exporter.partitions
+        if not partitions.enabled or self.engine.dialect.name != 'sqlite':
+            return []
+        return partitions.stored_months()
+
+    def choose_backend(self, sql):
+        if self.backend != 'auto':
+            return self.backend
+        if duckdb is None or self._duckdb_error is not None:
+            return 'sqlite'
+        if len(self._sqlite_months()) > SQLITE_MAX_ATTACHED:
+            # More months than SQLite can attach for one query
+            return 'duckdb'
+        if not AGGREGATE_QUERY.search(sql):
+            return 'sqlite'
+        return 'duckdb' if self.estimated_fact_rows() >= self.min_fact_rows else 'sqlite'
+
+    def run(self, sql, params=None, backend=None):
+        """Run one query on the given or chosen backend; returns a DataFrame"""
+        backend = backend or self.choose_backend(sql)
+        if backend == 'duckdb':
+            try:
+                result = self.cache.run(sql, params, read=self._run_duckdb, namespace=f"duckdb:{self.source}")
+                self.last_backend = 'duckdb'
+                return result
+            except Exception as e:
+                logger.warning(f"DuckDB query failed, running it on SQLite instead: {e}")
+        result = self.cache.run(sql, params, read=self._read_sqlite)
+        self.last_backend = 'sqlite'
+        return result
+
+    def run_file(self, path, backend=None):
+        """Run every query in a .sql file; returns [(DataFrame, backend, seconds)]"""
+        results = []
+        for sql in read_queries(path):
+            start = time.perf_counter()
+            frame = self.run(sql, backend=backend)
+            results.append((frame, self.last_backend, time.perf_counter() - start))
+        return results
+
+    def _read_sqlite(self, conn, sql, params=None):
+        """Run a query on the warehouse, with fact_weather over every monthly partition"""
+        months = self._sqlite_months()
+        if not months:
+            return read_sql(conn, sql, params)
+        if len(months) > SQLITE_MAX_ATTACHED:
+            raise ValueError(f"{len(months)} monthly partitions are more than the {SQLITE_MAX_ATTACHED} SQLite "
+                             f"can attach; run the query on DuckDB or archive old months")
+        partitions = self.exporter.partitions
+        aliases = partitions.create_pruned_view(conn, months[0], months[-1] + pd.offsets.MonthBegin(1))
+        try:
+            return read_sql(conn, sql, params)
+        finally:
+            partitions.drop_pruned_view(conn, aliases)
+
+    def _run_duckdb(self, warehouse, sql, params=None):
+        """Run a query on DuckDB; warehouse is the cache's connection, unused here"""
+        conn = self.duckdb_connection()
+        # SQLAlchemy-style :name parameters are $name in DuckDB
+        sql = re.sub(r'(?<![:\w]):(\w+)', r'$\1', sql)
+        return conn.execute(sql, params or {}).fetchdf()
+
+    def duckdb_connection(self):
+        """The DuckDB connection, opened with fact_weather and the dimensions on first use"""
+        if self._duckdb is not None:
+            return self._duckdb
+        if duckdb is None:
+            raise ImportError("duckdb is required for the DuckDB analytics backend")
+        if self._duckdb_error is not None:
+            raise self._duckdb_error
+
+        conn = duckdb.connect(config={'threads': self.threads} if self.threads else {})
+        try:
+            if self.source == 'parquet':
+                self._open_parquet(conn)
+            else:
+                self._open_sqlite(conn)
+        except Exception as e:
+            conn.close()
+            self._duckdb_error = e
+            raise
+        self._duckdb = conn
+        return conn
+
+    def _open_sqlite(self, conn):
+        """Attach the warehouse file, and any monthly partition files, read-only"""
+        if self.engine.dialect.name != 'sqlite':
+            raise ValueError("The DuckDB sqlite source needs a SQLite warehouse")
+        conn.execute("INSTALL sqlite")
+        conn.execute("LOAD sqlite")
+        conn.execute(f"ATTACH {_quote(self.engine.url.database)} AS warehouse (TYPE sqlite, READ_ONLY)")
+        for table in DIMENSION_TABLES:
+            conn.execute(f"CREATE VIEW {table} AS SELECT * FROM warehouse.{table}")
+
+        partitions = self.exporter.partitions
+        months = partitions.stored_months() if partitions.enabled else []
+        sources = ['warehouse.fact_weather']
+        for month in months:
+            alias = partitions.partition_name(month)
+            conn.execute(f"ATTACH {_quote(partitions.partition_path(month))} AS {alias} (TYPE sqlite, READ_ONLY)")
+            sources.append(f"{alias}.fact_weather")
+        conn.execute("CREATE VIEW fact_weather AS " +
+                     " UNION ALL ".join(f"SELECT * FROM {source}" for source in sources))
+
+    def _open_parquet(self, conn):
+        """fact_weather over the Parquet export, dimensions copied from the warehouse"""
+        pattern = _quote(os.path.join(self.exporter.directory, '**', '*.parquet'))
+        conn.execute(f"""
+            CREATE VIEW fact_weather AS
+            SELECT weather_id, city_id, date_id, temperature, humidity, pressure,
+                   wind_speed, weather_condition, recorded_time
+            FROM read_parquet({pattern}, hive_partitioning = true)
+        """)
+        with self.engine.connect() as warehouse:
+            for table in DIMENSION_TABLES:
+                frame = pd.read_sql(text(f"SELECT * FROM {table}"), warehouse)
+                conn.register(f"{table}_frame", frame)
+                conn.execute(f"CREATE TABLE {table} AS SELECT * FROM {table}_frame")
+                conn.unregister(f"{table}_frame")
+
+    def close(self):
+        if self._duckdb is not None:
+            self._duckdb.close()
+            self._duckdb = None
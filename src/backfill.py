@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from utils import setup_logging
+from extract import DataExtractor
+from transform import DataTransformer
+from load import DataLoader
+from quality import DataQualityChecker
+
+logger = setup_logging()
+
+def _extract_transform_partition(config, partition):
+    """Worker: extract and normalize one partition; runs in a child process
+
+    Imputation is left to the parent, after the data-quality checks.
+    """
+    extractor = DataExtractor(config)
+    raw = extractor.extract_weather_history(partition['cities'], partition['start'], partition['end'])
+    if raw.empty:
+        return raw
+    return DataTransformer()._prepare_weather_frame(raw)
+
+class BackfillProgress:
+    """Resumable record of completed backfill partitions"""
+
+    def __init__(self, path):
+        self.path = path
+        self.completed = set()
+        if os.path.exists(path):
+            with open(path, 'r') as file:
+                self.completed = set(json.load(file).get('completed', []))
+
+    def is_done(self, partition_id):
+        return partition_id in self.completed
+
+    def mark_done(self, partition_id):
+        self.completed.add(partition_id)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump({'completed': sorted(self.completed)}, file, indent=2)
+        os.replace(tmp_path, self.path)
+
+class BackfillRunner:
+    """Historical backfill split into (city group x date range) partitions
+
+    Partitions are extracted and transformed on a process pool. Loading is
+    done only by this (parent) process, one partition at a time, so the
+    warehouse has a single writer and never sees lock contention.
+    """
+
+    def __init__(self, config, workers=None, progress_path=None):
+        backfill_config = config.get('backfill', {})
+        self.config = config
+        self.workers = workers or backfill_config.get('workers') or os.cpu_count()
+        self.days_per_partition = backfill_config.get('days_per_partition', 7)
+        self.cities_per_partition = backfill_config.get('cities_per_partition', 20)
+        self.sqlite_synchronous = backfill_config.get('sqlite_synchronous')
+        quality_config = config.get('quality', {})
+        self.quality_checker = DataQualityChecker(quality_config.get('weather')) if quality_config.get('enabled') else None
+        self.quarantine_table = quality_config.get('quarantine_table', 'quarantine_weather')
+        self.progress = BackfillProgress(
+            progress_path or backfill_config.get('progress_path', 'state/backfill_progress.json')
+        )
+
+    def plan(self, cities, start, end):
+        """Split cities x [start, end) into partitions with stable IDs"""
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        if start >= end:
+            raise ValueError(f"Backfill start {start:%Y-%m-%d} must be before end {end:%Y-%m-%d}")
+        boundaries = list(pd.date_range(start, end, freq=f"{self.days_per_partition}D"))
+        if boundaries[-1] < end:
+            boundaries.append(end)
+
+        partitions = []
+        for i in range(0, len(cities), self.cities_per_partition):
+            group = cities[i:i + self.cities_per_partition]
+            group_key = hashlib.sha1(
+                '|'.join(f"{c['city']},{c['country']}" for c in group).encode('utf-8')
+            ).hexdigest()[:10]
+            for window_start, window_end in zip(boundaries[:-1], boundaries[1:]):
+                partitions.append({
+                    'id': f"{window_start:%Y%m%d}-{window_end:%Y%m%d}-{group_key}",
+                    'cities': group,
+                    'start': window_start,
+                    'end': window_end
+                })
+        return partitions
+
+    def run(self, cities, start, end):
+        """Run all pending partitions; returns a summary report"""
+        partitions = self.plan(cities, start, end)
+        pending = [p for p in partitions if not self.progress.is_done(p['id'])]
+        report = {
+            'partitions': len(partitions),
+            'partitions_skipped': len(partitions) - len(pending),
+            'partitions_loaded': 0,
+            'partitions_failed': 0,
+            'rows_loaded': 0,
+            'rows_quarantined': 0
+        }
+        logger.info(f"Backfill: {len(pending)} of {len(partitions)} partitions pending, {self.workers} workers")
+
+        loader = DataLoader(self.config)
+        if self.sqlite_synchronous:
+            loader.bulk.sqlite_synchronous = self.sqlite_synchronous
+        loader.create_tables()
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(_extract_transform_partition, self.config, p): p for p in pending}
+            for future in as_completed(futures):
+                partition = futures[future]
+                try:
+                    df = future.result()
+                    if self.quality_checker is not None and not df.empty:
+                        df, quarantined, _ = self.quality_checker.validate(df)
+                        if not loader.load_to_quarantine(quarantined, self.quarantine_table):
+                            raise RuntimeError("quarantine load failed")
+                        report['rows_quarantined'] += len(quarantined)
+                    if not df.empty:
+                        df = DataTransformer()._finish_weather_frame(df, pd.Timestamp.now())
+                        if not loader.load_to_staging(df, 'staging_weather') or not loader.load_to_warehouse(df):
+                            raise RuntimeError("warehouse load failed")
+                    self.progress.mark_done(partition['id'])
+                    report['partitions_loaded'] += 1
+                    report['rows_loaded'] += len(df)
+                    logger.info(f"Backfill partition {partition['id']} loaded ({len(df)} rows)")
+                except Exception as e:
+                    report['partitions_failed'] += 1
+                    logger.error(f"Backfill partition {partition['id']} failed: {e}")
+
+        logger.info("Backfill report: " + ", ".join(f"{key}={value}" for key, value in report.items()))
+        return report
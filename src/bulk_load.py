@@ -0,0 +1,105 @@
+import io
+from contextlib import contextmanager
+import pandas as pd
+from sqlalchemy import inspect
+
+# Text layout SQLAlchemy uses for DateTime columns on SQLite; PostgreSQL
+# parses it as well
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+SQLITE_SYNCHRONOUS_LEVELS = {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3}
+
+class BulkLoader:
+    """Dialect-aware bulk appends of DataFrames
+
+    SQLite gets one prepared INSERT run through executemany in batches of
+    batch_size rows, so there is no multi-row VALUES list to hit the bound
+    variable limit. PostgreSQL gets COPY FROM STDIN fed from an in-memory
+    CSV buffer. Other dialects fall back to to_sql's executemany. Rows are
+    written in the caller's transaction; the caller commits.
+    sqlite_synchronous overrides the connection's synchronous level during
+    a load; None keeps the engine's pragma profile.
+    """
+
+    def __init__(self, batch_size=10000, sqlite_synchronous=None):
+        self.batch_size = batch_size
+        self.sqlite_synchronous = sqlite_synchronous
+
+    @contextmanager
+    def fast_writes(self, conn):
+        """Set SQLite's synchronous pragma for one load transaction, if configured
+
+        SQLite refuses to change it inside a transaction, so enter this
+        before the first write; the previous level is restored on exit.
+        """
+        if conn.dialect.name != 'sqlite' or not self.sqlite_synchronous:
+            yield conn
+            return
+        previous = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+        level = SQLITE_SYNCHRONOUS_LEVELS[str(self.sqlite_synchronous).upper()]
+        conn.exec_driver_sql(f"PRAGMA synchronous={level}")
+        try:
+            yield conn
+        finally:
+            # No-op after a commit; ends a failed load's transaction first
+            conn.rollback()
+            conn.exec_driver_sql(f"PRAGMA synchronous={int(previous)}")
+
+    def insert(self, conn, df, table_name):
+        """Append df's rows to table_name, creating it from df if missing
+
+        Returns the number of rows written.
+        """
+        if df.empty:
+            return 0
+        if not inspect(conn).has_table(table_name):
+            df.head(0).to_sql(table_name, conn, index=False)
+
+        dialect = conn.dialect.name
+        if dialect == 'sqlite':
+            self._executemany(conn, df, table_name)
+        elif dialect == 'postgresql':
+            self._copy(conn, df, table_name)
+        else:
+            df.to_sql(table_name, conn, if_exists='append', index=False, chunksize=self.batch_size)
+        return len(df)
+
+    def _column_list(self, conn, df):
+        quote = conn.dialect.identifier_preparer.quote
+        return ', '.join(quote(str(col)) for col in df.columns)
+
+    def _executemany(self, conn, df, table_name):
+        quote = conn.dialect.identifier_preparer.quote
+        sql = (f"INSERT INTO {quote(table_name)} ({self._column_list(conn, df)}) "
+               f"VALUES ({', '.join('?' * len(df.columns))})")
+        for start in range(0, len(df), self.batch_size):
+            conn.exec_driver_sql(sql, self._rows(df.iloc[start:start + self.batch_size]))
+
+    def _rows(self, df):
+        """Plain Python tuples for the DBAPI, with None for missing values"""
+        columns = []
+        for col in df.columns:
+            series = df[col]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                values = series.dt.strftime(DATETIME_FORMAT)
+            else:
+                values = series.astype(object)
+            columns.append(values.where(series.notna(), None).tolist())
+        return list(zip(*columns))
+
+    def _copy(self, conn, df, table_name):
+        quote = conn.dialect.identifier_preparer.quote
+        sql = (f"COPY {quote(table_name)} ({self._column_list(conn, df)}) "
+               f"FROM STDIN WITH (FORMAT csv, NULL '\\N')")
+        if not conn.in_transaction():
+            conn.begin()
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            for start in range(0, len(df), self.batch_size):
+                buffer = io.StringIO()
+                df.iloc[start:start + self.batch_size].to_csv(
+                    buffer, index=False, header=False, na_rep='\\N', date_format=DATETIME_FORMAT
+                )
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+        finally:
+            cursor.close()
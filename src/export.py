@@ -0,0 +1,173 @@
+import os
+import pandas as pd
+from sqlalchemy import text
+from utils import setup_logging
+from partitions import PartitionManager
+from query import bump_load_version
+
+logger = setup_logging()
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+    ds = None
+
+# Facts joined with the dimension attributes analytical scans filter and group on
+EXPORT_SQL = """
+    SELECT f.weather_id, f.city_id, dc.city_name, dc.country_code, dc.population,
+           f.date_id, dd.full_date, dd.year, dd.month, dd.day,
+           f.temperature, f.humidity, f.pressure, f.wind_speed,
+           f.weather_condition, f.recorded_time
+    FROM {source} f
+    JOIN dim_city dc ON f.city_id = dc.city_id
+    JOIN dim_date dd ON f.date_id = dd.date_id
+    WHERE f.weather_id > :watermark
+    ORDER BY f.weather_id
+    LIMIT :batch_rows
+"""
+
+EXPORT_DTYPES = {
+    'weather_id': 'int64', 'city_id': 'int32', 'population': 'Int64', 'date_id': 'int32',
+    'month_key': 'int32', 'year': 'int16', 'month': 'int8', 'day': 'int8',
+    'temperature': 'float32', 'humidity': 'float32', 'pressure': 'float32', 'wind_speed': 'float32'
+}
+
+def _and(predicate, condition):
+    return condition if predicate is None else predicate & condition
+
+class ParquetExporter:
+    """Incremental, columnar copy of fact_weather in Parquet
+
+    Facts loaded since the last export are joined with dim_city and dim_date
+    and written under a hive-style month_key=YYYYMM directory per month. Files
+    are only ever added, never rewritten, and rows are sorted by date and
+    city so row-group statistics let readers skip most of a file. The
+    highest exported weather_id is kept in warehouse_meta.
+
+    The export is insert-only: it tracks new facts by weather_id, so facts
+    overwritten in place by load.on_conflict 'update' keep their first
+    exported values in Parquet.
+    """
+
+    def __init__(self, config, partitions=None):
+        export_config = config.get('export', {})
+        self.enabled = export_config.get('enabled', False)
+        self.directory = export_config.get('directory', 'data/parquet/fact_weather')
+        self.compression = export_config.get('compression', 'zstd')
+        self.row_group_size = export_config.get('row_group_size', 100000)
+        self.batch_rows = export_config.get('batch_rows', 1000000)
+        self.partitions = partitions or PartitionManager(config)
+        if self.enabled and config.get('load', {}).get('on_conflict') == 'update':
+            logger.warning("The Parquet export is insert-only: facts updated in place by "
+                           "on_conflict 'update' are not re-exported")
+
+    def _require_pyarrow(self):
+        if pa is None:
+            raise ImportError("pyarrow is required for the Parquet export")
+
+    def _sources(self, conn):
+        """(watermark key, table) pairs holding facts; weather_id is per file on partitioned SQLite"""
+        if not self.partitions.enabled or conn.dialect.name != 'sqlite':
+            return [('parquet_fact_weather', 'fact_weather')]
+        return [(f"parquet_{self.partitions.partition_name(month)}", month)
+                for month in self.partitions.stored_months()]
+
+    def _watermark(self, conn, key):
+        row = conn.execute(text("SELECT meta_value FROM warehouse_meta WHERE meta_key = :key"), {'key': key}).first()
+        return row[0] if row else 0
+
+    def _set_watermark(self, conn, key, value):
+        conn.execute(text("""
+            INSERT INTO warehouse_meta (meta_key, meta_value) VALUES (:key, :value)
+            ON CONFLICT (meta_key) DO UPDATE SET meta_value = EXCLUDED.meta_value
+        """), {'key': key, 'value': int(value)})
+
+    def export(self, engine):
+        """Write facts loaded since the last export; returns the number of rows written"""
+        self._require_pyarrow()
+        exported = 0
+        with engine.connect() as conn:
+            for key, source in self._sources(conn):
+                aliases = []
+                if isinstance(source, pd.Timestamp):
+                    aliases = list(self.partitions.attach(conn, [source], create=False).values())
+                    source = f"{aliases[0]}.fact_weather"
+                try:
+                    exported += self._export_source(conn, key, source)
+                finally:
+                    if aliases:
+                        self.partitions.detach(conn, aliases)
+        logger.info(f"Exported {exported} facts to Parquet in {self.directory}")
+        return exported
+
+    def _export_source(self, conn, key, source):
+        """Export one table's new facts in batches of batch_rows, committing the watermark after each"""
+        exported = 0
+        while True:
+            watermark = self._watermark(conn, key)
+            facts = pd.read_sql(text(EXPORT_SQL.format(source=source)), conn,
+                                params={'watermark': watermark, 'batch_rows': self.batch_rows})
+            if facts.empty:
+                return exported
+            self.write(facts, tag=f"{key}-{watermark}")
+            self._set_watermark(conn, key, facts['weather_id'].max())
+            # DuckDB results read from the export are cached under the load version too
+            bump_load_version(conn)
+            conn.commit()
+            exported += len(facts)
+
+    def write(self, facts, tag):
+        """Append a batch of joined facts as new files under its month directories"""
+        facts = facts.assign(
+            full_date=pd.to_datetime(facts['full_date']).dt.date,
+            recorded_time=pd.to_datetime(facts['recorded_time'], format='mixed'),
+            month_key=facts['date_id'] // 100
+        ).astype(EXPORT_DTYPES).sort_values(['date_id', 'city_id', 'recorded_time'])
+        table = pa.Table.from_pandas(facts, preserve_index=False)
+        file_format = ds.ParquetFileFormat()
+        ds.write_dataset(
+            table, self.directory, format=file_format,
+            partitioning=ds.partitioning(pa.schema([('month_key', pa.int32())]), flavor='hive'),
+            # Named after the watermark the export started from: a retry of an
+            # export whose watermark was never committed replaces its own files
+            basename_template=f"{tag}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+            file_options=file_format.make_write_options(compression=self.compression, write_statistics=True),
+            max_rows_per_group=self.row_group_size
+        )
+
+    def dataset(self):
+        self._require_pyarrow()
+        return ds.dataset(self.directory, format='parquet', partitioning='hive')
+
+    def scan(self, columns=None, start=None, end=None, cities=None, as_arrow=False):
+        """Read exported facts, pushing column projection and predicates down to the files
+
+        start and end bound full_date as [start, end); month directories
+        outside the range are skipped entirely and row groups are pruned
+        on their date_id statistics. cities filters on city_name.
+        """
+        self._require_pyarrow()
+        if not os.path.isdir(self.directory):
+            empty = pd.DataFrame(columns=columns or [])
+            return pa.Table.from_pandas(empty, preserve_index=False) if as_arrow else empty
+
+        predicate = None
+        if start is not None:
+            start = pd.Timestamp(start)
+            predicate = _and(predicate, ds.field('month_key') >= int(f"{start:%Y%m}"))
+            predicate = _and(predicate, ds.field('date_id') >= int(f"{start:%Y%m%d}"))
+        if end is not None:
+            end = pd.Timestamp(end)
+            predicate = _and(predicate, ds.field('month_key') <= int(f"{end:%Y%m}"))
+            predicate = _and(predicate, ds.field('date_id') < int(f"{end:%Y%m%d}"))
+        if cities is not None:
+            predicate = _and(predicate, ds.field('city_name').isin(list(cities)))
+
+        dataset = self.dataset()
+        if columns is None:
+            columns = [name for name in dataset.schema.names if name != 'month_key']
+        table = dataset.to_table(columns=columns, filter=predicate)
+        return table if as_arrow else table.to_pandas()
@@ -1,8 +1,16 @@
-import requests
+import io
+import json
+import os
 import pandas as pd
+from contextlib import contextmanager
 from utils import setup_logging, load_config
-import time
-from datetime import datetime
+from rate_limiter import TokenBucket
+from http_client import HttpClient
+from transform import POPULATION_COLUMNS, POPULATION_DTYPES
+from watermarks import WatermarkStore
+from synthetic import SyntheticDataGenerator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import random
 
 logger = setup_logging()
@@ -12,76 +20,299 @@ class DataExtractor:
         self.config = config
         self.api_config = config['api']
         self.data_sources = config['data_sources']
+        self.max_workers = max(1, int(self.api_config.get('max_workers', 1)))
+        self.rate_limiter = TokenBucket(
+            self.api_config.get('calls_per_minute', 60),
+            burst=self.api_config.get('burst', 1)
+        )
+        self.cache_config = config.get('cache', {})
+        self.cache_ttl = self.cache_config.get('ttl', {})
+        self.http = HttpClient(self.api_config, self.cache_config)
+        self.batch_size = min(20, int(self.api_config.get('batch_size', 20)))
+        self.city_id_cache_path = self.api_config.get('city_id_cache', 'data/city_ids.json')
+        self._city_ids = None
+        self.incremental = config.get('incremental', {})
+        self.watermarks = None
+        if self.incremental.get('enabled'):
+            self.watermarks = WatermarkStore(self.incremental.get('watermark_path', 'state/watermarks.json'))
+        self.last_run_stats = {}
     
     def extract_weather_data(self, cities):
+        """Extract weather data, skipping observations already loaded"""
+        stats = {'cities_requested': len(cities), 'cities_skipped': 0, 'observations_unchanged': 0}
+        
+        if self.watermarks is not None:
+            cities, skipped = self.watermarks.cities_due(cities, self.incremental.get('min_refresh_seconds'))
+            stats['cities_skipped'] = len(skipped)
+            if skipped:
+                logger.info(f"Skipping {len(skipped)} cities refreshed within the provider update interval")
+        
+        df = self._extract_weather_frame(cities) if cities else pd.DataFrame()
+        
+        if self.watermarks is not None:
+            df, unchanged = self.watermarks.filter_new(df)
+            stats['observations_unchanged'] = unchanged
+            if unchanged:
+                logger.info(f"Dropped {unchanged} observations already loaded")
+        
+        self.last_run_stats = stats
+        return df
+    
+    def _extract_weather_frame(self, cities):
         """Extract weather data from OpenWeatherMap API with fallback"""
-        weather_data = []
         api_key = self.api_config.get('weather_api_key')
         
         if not api_key or api_key == 'your_api_key_here':
             logger.warning("No valid API key found, using mock data")
-            return self._get_mock_weather_data(cities)
+            return pd.DataFrame(self._get_mock_weather_data(cities))
         
-        for city in cities:
-            try:
-                params = {
-                    'q': f"{city['city']},{city['country']}",
+        if self.api_config.get('use_group_endpoint'):
+            return self.extract_weather_data_batched(cities, api_key)
+        
+        if self.max_workers > 1 and len(cities) > 1:
+            # Concurrent mode - the shared token bucket enforces the rate limit
+            logger.info(f"Extracting weather data for {len(cities)} cities with {self.max_workers} workers")
+        results = self._map(lambda city: self._extract_city_weather(city, api_key), cities)
+        
+        self.http.flush_cache()
+        logger.info(f"HTTP stats: {self.http.stats()}")
+        return pd.DataFrame(results)
+    
+    def extract_weather_data_batched(self, cities, api_key):
+        """Extract weather data in groups of up to 20 cities per request"""
+        city_ids = self._load_city_ids()
+        records = {}
+        
+        # Cities without a known provider ID are fetched individually once;
+        # the single-city response carries the ID for future batched runs
+        unresolved = [city for city in cities if self._city_key(city) not in city_ids]
+        if unresolved:
+            logger.info(f"Resolving provider IDs for {len(unresolved)} cities")
+            responses = self._map(lambda city: self._fetch_city_weather(city, api_key), unresolved)
+            for city, data in zip(unresolved, responses):
+                if data is None:
+                    records[self._city_key(city)] = self._get_mock_weather_data([city])[0]
+                    continue
+                records[self._city_key(city)] = self._parse_weather(city, data)
+                if data.get('id'):
+                    city_ids[self._city_key(city)] = data['id']
+            self._save_city_ids()
+        
+        resolved = [city for city in cities if self._city_key(city) not in records]
+        batches = [resolved[i:i + self.batch_size] for i in range(0, len(resolved), self.batch_size)]
+        if batches:
+            logger.info(f"Extracting weather data for {len(resolved)} cities in {len(batches)} batches")
+        
+        missing = []
+        for batch, batch_records in zip(batches, self._map(lambda batch: self._extract_group_weather(batch, api_key), batches)):
+            for city in batch:
+                key = self._city_key(city)
+                if key in batch_records:
+                    records[key] = batch_records[key]
+                else:
+                    missing.append(city)
+        
+        # Fall back per city for anything a batch did not return
+        if missing:
+            logger.warning(f"Batch extraction missed {len(missing)} cities, falling back per city")
+            for city, record in zip(missing, self._map(lambda city: self._extract_city_weather(city, api_key), missing)):
+                records[self._city_key(city)] = record
+        
+        self.http.flush_cache()
+        logger.info(f"HTTP stats: {self.http.stats()}")
+        return pd.DataFrame([records[self._city_key(city)] for city in cities])
+    
+    def _extract_group_weather(self, batch, api_key):
+        """Fetch one batch from the group endpoint, keyed by city"""
+        city_ids = self._load_city_ids()
+        by_id = {city_ids[self._city_key(city)]: city for city in batch}
+        
+        try:
+            response = self.http.get(
+                self.api_config['group_url'],
+                params={
+                    'id': ','.join(str(city_id) for city_id in by_id),
                     'appid': api_key,
                     'units': 'metric'
-                }
-                
-                response = requests.get(
-                    self.api_config['weather_base_url'],
-                    params=params,
-                    timeout=10
+                },
+                rate_limiter=self.rate_limiter,
+                cache_ttl=self.cache_ttl.get('weather')
+            )
+            if response.status_code != 200:
+                logger.warning(f"Group request failed (Status: {response.status_code}) for {len(batch)} cities")
+                return {}
+            
+            batch_records = {}
+            for data in response.json().get('list', []):
+                city = by_id.get(data.get('id'))
+                if city is not None:
+                    batch_records[self._city_key(city)] = self._parse_weather(city, data)
+            return batch_records
+            
+        except Exception as e:
+            logger.error(f"Error extracting weather batch: {e}")
+            return {}
+    
+    def _extract_city_weather(self, city, api_key):
+        """Extract weather data for a single city, falling back to mock data"""
+        data = self._fetch_city_weather(city, api_key)
+        if data is None:
+            return self._get_mock_weather_data([city])[0]
+        return self._parse_weather(city, data)
+    
+    def _fetch_city_weather(self, city, api_key):
+        """Fetch the raw API response for a single city, or None on failure"""
+        try:
+            params = {
+                'q': f"{city['city']},{city['country']}",
+                'appid': api_key,
+                'units': 'metric'
+            }
+            
+            response = self.http.get(
+                self.api_config['weather_base_url'],
+                params=params,
+                rate_limiter=self.rate_limiter,
+                cache_ttl=self.cache_ttl.get('weather')
+            )
+            
+            if response.status_code == 200:
+                logger.info(f"Successfully extracted weather data for {city['city']}")
+                return response.json()
+            
+            logger.warning(f"API failed for {city['city']} (Status: {response.status_code}), using mock data")
+            
+        except Exception as e:
+            logger.error(f"Error extracting weather data for {city['city']}: {e}")
+        
+        return None
+    
+    def _parse_weather(self, city, data):
+        """Convert an API weather payload into a weather record"""
+        return {
+            'city': city['city'],
+            'country': city['country'],
+            'timestamp': pd.to_datetime(data['dt'], unit='s'),
+            'temperature': data['main']['temp'],
+            'humidity': data['main']['humidity'],
+            'pressure': data['main']['pressure'],
+            'wind_speed': data['wind']['speed'],
+            'weather_description': data['weather'][0]['description'],
+            'is_mock': False
+        }
+    
+    def _map(self, func, items):
+        """Apply func to items on the worker pool, preserving order"""
+        if self.max_workers > 1 and len(items) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                return list(executor.map(func, items))
+        return [func(item) for item in items]
+    
+    def _city_key(self, city):
+        return f"{city['city']},{city['country']}"
+    
+    def _load_city_ids(self):
+        """Load the cached city -> provider ID mapping"""
+        if self._city_ids is None:
+            self._city_ids = {}
+            if os.path.exists(self.city_id_cache_path):
+                try:
+                    with open(self.city_id_cache_path, 'r') as file:
+                        self._city_ids = json.load(file)
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable city ID cache: {e}")
+        return self._city_ids
+    
+    def _save_city_ids(self):
+        """Persist the city -> provider ID mapping"""
+        try:
+            directory = os.path.dirname(self.city_id_cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.city_id_cache_path, 'w') as file:
+                json.dump(self._city_ids, file, indent=2)
+        except Exception as e:
+            logger.warning(f"Could not save city ID cache: {e}")
+    
+    def extract_weather_history(self, cities, start, end):
+        """Extract hourly weather history for [start, end) with mock fallback"""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        api_key = self.api_config.get('weather_api_key')
+        
+        if not api_key or api_key == 'your_api_key_here' or not self.api_config.get('history_url'):
+            logger.warning("No valid API key or history endpoint, using mock history")
+            return self._get_mock_weather_history(cities, start, end)
+        
+        def fetch(city):
+            try:
+                response = self.http.get(
+                    self.api_config['history_url'],
+                    params={
+                        'q': f"{city['city']},{city['country']}",
+                        'type': 'hour',
+                        'start': int(start.timestamp()),
+                        'end': int(end.timestamp()),
+                        'appid': api_key,
+                        'units': 'metric'
+                    },
+                    rate_limiter=self.rate_limiter
                 )
-                
                 if response.status_code == 200:
-                    data = response.json()
-                    weather_data.append({
-                        'city': city['city'],
-                        'country': city['country'],
-                        'timestamp': pd.to_datetime(data['dt'], unit='s'),
-                        'temperature': data['main']['temp'],
-                        'humidity': data['main']['humidity'],
-                        'pressure': data['main']['pressure'],
-                        'wind_speed': data['wind']['speed'],
-                        'weather_description': data['weather'][0]['description']
-                    })
-                    logger.info(f"Successfully extracted weather data for {city['city']}")
-                else:
-                    logger.warning(f"API failed for {city['city']} (Status: {response.status_code}), using mock data")
-                    weather_data.extend(self._get_mock_weather_data([city]))
-                
-                time.sleep(1)  # Rate limiting
-                
+                    return [self._parse_weather(city, data) for data in response.json().get('list', [])]
+                logger.warning(f"History API failed for {city['city']} (Status: {response.status_code}), using mock history")
             except Exception as e:
-                logger.error(f"Error extracting weather data for {city['city']}: {e}")
-                weather_data.extend(self._get_mock_weather_data([city]))
+                logger.error(f"Error extracting weather history for {city['city']}: {e}")
+            return self._get_mock_weather_history([city], start, end).to_dict('records')
         
-        return pd.DataFrame(weather_data)
+        records = [record for city_records in self._map(fetch, cities) for record in city_records]
+        return pd.DataFrame(records)
+    
+    def _get_mock_weather_history(self, cities, start, end):
+        """Generate hourly mock history; the same window always yields the same data"""
+        periods = int((end - start) / pd.Timedelta(hours=1))
+        if periods <= 0:
+            return pd.DataFrame()
+        generator = SyntheticDataGenerator(seed=self.api_config.get('mock_seed', 42), cities=cities)
+        df = generator.weather_history(
+            n_cities=len(cities), start=start, periods=periods, freq='h',
+            stream=int(start.timestamp() // 3600)
+        )
+        for col in ['city', 'country', 'weather_description']:
+            df[col] = df[col].astype(str)
+        df['is_mock'] = True
+        return df
     
     def _get_mock_weather_data(self, cities):
-        """Generate mock weather data for testing"""
+        """Generate mock weather data for testing
+
+        Records are tagged is_mock so they never advance a city's watermark.
+        """
         mock_data = []
         
         for city in cities:
             mock_data.append({
                 'city': city['city'],
                 'country': city['country'],
-                'timestamp': datetime.now(),
+                'timestamp': datetime.now(timezone.utc).replace(tzinfo=None),
                 'temperature': round(random.uniform(5, 30), 2),
                 'humidity': random.randint(30, 90),
                 'pressure': random.randint(980, 1030),
                 'wind_speed': round(random.uniform(0, 15), 2),
-                'weather_description': random.choice(['clear sky', 'few clouds', 'scattered clouds', 'broken clouds', 'light rain'])
+                'weather_description': random.choice(['clear sky', 'few clouds', 'scattered clouds', 'broken clouds', 'light rain']),
+                'is_mock': True
             })
         return mock_data
     
     def extract_population_data(self):
         """Extract population data from CSV URL with fallback"""
         try:
-            df = pd.read_csv(self.data_sources['csv_url'])
+            response = self.http.get(
+                self.data_sources['csv_url'],
+                cache_ttl=self.cache_ttl.get('population')
+            )
+            response.raise_for_status()
+            df = pd.read_csv(io.BytesIO(response.content))
+            self.http.flush_cache()
             logger.info("Successfully extracted population data from URL")
             return df
         except Exception as e:
@@ -89,6 +320,67 @@ class DataExtractor:
             logger.info("Using mock population data")
             return self._get_mock_population_data()
     
+    @contextmanager
+    def extract_population_chunks(self, chunk_size=None):
+        """Stream population data in typed chunks with bounded memory
+
+        Used as a context manager yielding (latest_year, chunks). The source
+        is spooled to disk once, a first pass reads only the year and
+        population columns to find the latest year with a population, and
+        chunks is a generator over the second pass. A temporary spool file
+        is removed when the with block exits, however it exits.
+        """
+        chunk_size = chunk_size or self.data_sources.get('chunk_size', 100000)
+        try:
+            path, is_temporary = self._spool_population_csv()
+        except Exception as e:
+            logger.warning(f"Failed to extract population data from URL: {e}")
+            logger.info("Using mock population data")
+            mock = self._get_mock_population_data()
+            yield mock['Year'].max(), iter([mock])
+            return
+        
+        try:
+            header = pd.read_csv(path, nrows=0).columns
+            usecols = [col for col in POPULATION_COLUMNS if col in header]
+            dtypes = {col: POPULATION_DTYPES[col] for col in usecols}
+            
+            latest_year = None
+            if 'Year' in usecols:
+                # Rows without a population are dropped when cleaning, so they
+                # must not decide the latest year either
+                year_columns = [col for col in ['Year', 'Population'] if col in usecols]
+                for years in pd.read_csv(path, usecols=year_columns, dtype=dtypes, chunksize=chunk_size):
+                    if 'Population' in years.columns:
+                        years = years[pd.to_numeric(years['Population'], errors='coerce').notna()]
+                    chunk_max = years['Year'].max()
+                    if pd.notna(chunk_max) and (latest_year is None or chunk_max > latest_year):
+                        latest_year = chunk_max
+            
+            def chunks():
+                for chunk in pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunk_size):
+                    yield chunk
+            
+            logger.info(f"Streaming population data from {path} in chunks of {chunk_size}")
+            yield latest_year, chunks()
+        finally:
+            if is_temporary:
+                os.remove(path)
+    
+    def _spool_population_csv(self):
+        """Return a local path for the population CSV and whether it is temporary"""
+        source = self.data_sources['csv_url']
+        if not source.startswith(('http://', 'https://')):
+            return source, False
+        
+        path = self.http.download(source, cache_ttl=self.cache_ttl.get('population'))
+        self.http.flush_cache()
+        return path
+    
+    def http_stats(self):
+        """Expose connection pool hit rate and retry counters for tuning"""
+        return self.http.stats()
+    
     def _get_mock_population_data(self):
         """Generate mock population data for testing"""
         mock_data = {
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import requests
+from urllib.parse import urlsplit, urlunsplit
+from requests.structures import CaseInsensitiveDict
+from utils import setup_logging
+
+logger = setup_logging()
+
+def strip_query(url):
+    """url without its query string or fragment, which may carry an API key"""
+    return urlunsplit(urlsplit(url)[:3] + ('', '')) if url else url
+
+class ResponseCache:
+    """Persistent HTTP response cache with conditional GET and LRU eviction"""
+
+    def __init__(self, directory, max_bytes=100 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = int(max_bytes)
+        self.index_path = os.path.join(directory, 'index.json')
+        self.lock = threading.Lock()
+        self.dirty = False
+        os.makedirs(directory, exist_ok=True)
+        self.entries = self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r') as file:
+                entries = json.load(file)
+            # Drop entries whose body file is gone
+            entries = {key: entry for key, entry in entries.items() if os.path.exists(self._body_path(key))}
+            # Indexes written before URLs were stripped held query strings
+            for entry in entries.values():
+                if entry.get('url') != strip_query(entry.get('url')):
+                    entry['url'] = strip_query(entry['url'])
+                    self.dirty = True
+            return entries
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable HTTP cache index: {e}")
+            return {}
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, f"{key}.body")
+
+    def make_key(self, url, params=None):
+        """Cache key for a GET of url with the given query parameters"""
+        canonical = url + '?' + '&'.join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def lookup(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return dict(entry) if entry else None
+
+    def is_fresh(self, entry, ttl):
+        return ttl is not None and time.time() - entry['stored_at'] < ttl
+
+    def conditional_headers(self, entry):
+        """Validators to send so an unchanged source can answer 304"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, key, response):
+        """Store a 200 response body and its validators"""
+        body = response.content
+        with open(self._body_path(key), 'wb') as file:
+            file.write(body)
+        self._add_entry(key, response, len(body))
+
+    def store_stream(self, key, response, chunk_size=1024 * 1024):
+        """Stream a 200 response body to disk without holding it in memory
+
+        Returns (path, cached). Bodies larger than the whole cache are left
+        in a temporary file that the caller must remove.
+        """
+        tmp_path = self._body_path(key) + '.part'
+        size = 0
+        with open(tmp_path, 'wb') as file:
+            for block in response.iter_content(chunk_size=chunk_size):
+                file.write(block)
+                size += len(block)
+
+        if size > self.max_bytes:
+            return tmp_path, False
+
+        os.replace(tmp_path, self._body_path(key))
+        self._add_entry(key, response, size)
+        return self._body_path(key), True
+
+    def _add_entry(self, key, response, size):
+        with self.lock:
+            now = time.time()
+            self.entries[key] = {
+                # Never persist the query string: it holds the appid API key
+                'url': strip_query(response.url),
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_type': response.headers.get('Content-Type'),
+                'size': size,
+                'stored_at': now,
+                'last_access': now
+            }
+            self.dirty = True
+            self._evict()
+
+    def body_path(self, key):
+        """Path of a cached body on disk, marking the entry as used"""
+        with self.lock:
+            self.entries[key]['last_access'] = time.time()
+            self.dirty = True
+        return self._body_path(key)
+
+    def revalidated(self, key):
+        """Mark an entry fresh again after a 304 Not Modified"""
+        with self.lock:
+            if key in self.entries:
+                self.entries[key]['stored_at'] = time.time()
+                self.dirty = True
+
+    def to_response(self, key):
+        """Build a requests.Response from a cached entry"""
+        with self.lock:
+            entry = self.entries[key]
+            entry['last_access'] = time.time()
+            self.dirty = True
+        with open(self._body_path(key), 'rb') as file:
+            body = file.read()
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = body
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict()
+        if entry.get('content_type'):
+            response.headers['Content-Type'] = entry['content_type']
+        response.from_cache = True
+        return response
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        total = sum(entry['size'] for entry in self.entries.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self.entries.items(), key=lambda item: item[1]['last_access']):
+            if total <= self.max_bytes:
+                break
+            total -= entry['size']
+            del self.entries[key]
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+
+    def size(self):
+        with self.lock:
+            return sum(entry['size'] for entry in self.entries.values())
+
+    def flush(self):
+        """Write the index to disk if it changed"""
+        with self.lock:
+            if not self.dirty:
+                return
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w') as file:
+                json.dump(self.entries, file)
+            os.replace(tmp_path, self.index_path)
+            self.dirty = False
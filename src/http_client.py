@@ -0,0 +1,196 @@
+import os
+import random
+import tempfile
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from utils import setup_logging
+from http_cache import ResponseCache
+
+logger = setup_logging()
+
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+
+class HttpClient:
+    """Connection-pooled keep-alive HTTP session with retry and backoff"""
+
+    def __init__(self, api_config, cache_config=None):
+        self.pool_size = int(api_config.get('pool_size', 10))
+        self.max_retries = int(api_config.get('max_retries', 3))
+        self.backoff_factor = float(api_config.get('backoff_factor', 0.5))
+        self.backoff_max = float(api_config.get('backoff_max', 30))
+        self.timeout = api_config.get('timeout', 10)
+
+        # Retries are handled here so they can be counted, not by urllib3
+        self.adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            pool_block=True,
+            max_retries=0
+        )
+        self.session = requests.Session()
+        self.session.headers['Connection'] = 'keep-alive'
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        self.lock = threading.Lock()
+        self.counters = {
+            'requests': 0, 'retries': 0, 'failures': 0,
+            'cache_hits': 0, 'cache_revalidated': 0, 'cache_misses': 0
+        }
+
+        cache_config = cache_config or {}
+        self.cache = None
+        if cache_config.get('enabled'):
+            self.cache = ResponseCache(
+                cache_config.get('directory', 'data/http_cache'),
+                max_bytes=cache_config.get('max_bytes', 100 * 1024 * 1024)
+            )
+
+    def get(self, url, rate_limiter=None, cache_ttl=None, **kwargs):
+        """GET a URL through the response cache when a TTL is given
+
+        Fresh entries are served without a request; stale entries are
+        revalidated with If-None-Match/If-Modified-Since.
+        """
+        if self.cache is None or cache_ttl is None or kwargs.get('stream'):
+            return self._get(url, rate_limiter, **kwargs)
+
+        key = self.cache.make_key(url, kwargs.get('params'))
+        entry = self.cache.lookup(key)
+        if entry and self.cache.is_fresh(entry, cache_ttl):
+            response = self._cached_response(key)
+            if response is not None:
+                self._count('cache_hits')
+                return response
+
+        if entry:
+            kwargs['headers'] = {**kwargs.get('headers', {}), **self.cache.conditional_headers(entry)}
+        response = self._get(url, rate_limiter, **kwargs)
+
+        if response.status_code == 304 and entry:
+            self.cache.revalidated(key)
+            cached = self._cached_response(key)
+            if cached is not None:
+                self._count('cache_revalidated')
+                return cached
+        self._count('cache_misses')
+        if response.status_code == 200:
+            self.cache.store(key, response)
+        return response
+
+    def download(self, url, cache_ttl=None, **kwargs):
+        """Stream a URL to a local file and return (path, is_temporary)
+
+        Bodies are written in blocks so memory stays flat. With the cache
+        enabled the file lives in the cache and is reused while fresh or
+        while the source answers 304; otherwise a temporary file is used
+        and the caller is responsible for removing it.
+        """
+        kwargs['stream'] = True
+        key = None
+        if self.cache is not None and cache_ttl is not None:
+            key = self.cache.make_key(url, kwargs.get('params'))
+            entry = self.cache.lookup(key)
+            if entry and self.cache.is_fresh(entry, cache_ttl):
+                self._count('cache_hits')
+                return self.cache.body_path(key), False
+            if entry:
+                kwargs['headers'] = {**kwargs.get('headers', {}), **self.cache.conditional_headers(entry)}
+
+        response = self._get(url, **kwargs)
+        try:
+            if response.status_code == 304 and key is not None:
+                self.cache.revalidated(key)
+                self._count('cache_revalidated')
+                return self.cache.body_path(key), False
+            response.raise_for_status()
+
+            if key is not None:
+                self._count('cache_misses')
+                path, cached = self.cache.store_stream(key, response)
+                return path, not cached
+
+            fd, path = tempfile.mkstemp(suffix='.download')
+            with os.fdopen(fd, 'wb') as file:
+                for block in response.iter_content(chunk_size=1024 * 1024):
+                    file.write(block)
+            return path, True
+        finally:
+            response.close()
+
+    def _cached_response(self, key):
+        try:
+            return self.cache.to_response(key)
+        except (KeyError, OSError):
+            return None
+
+    def flush_cache(self):
+        if self.cache is not None:
+            self.cache.flush()
+
+    def _get(self, url, rate_limiter=None, **kwargs):
+        """GET a URL, retrying 5xx responses, timeouts and connection errors"""
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            self._count('requests')
+
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if attempt == self.max_retries:
+                    self._count('failures')
+                    raise
+                logger.warning(f"Request to {url} failed ({e}), retrying")
+                self._backoff(attempt)
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                logger.warning(f"Request to {url} returned {response.status_code}, retrying")
+                response.close()
+                self._backoff(attempt)
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES:
+                self._count('failures')
+            return response
+
+    def _backoff(self, attempt):
+        """Sleep for an exponentially growing delay with full jitter"""
+        self._count('retries')
+        delay = min(self.backoff_max, self.backoff_factor * (2 ** attempt))
+        time.sleep(random.uniform(0, delay))
+
+    def _count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def stats(self):
+        """Return request, retry and connection pool counters"""
+        pool_requests = 0
+        new_connections = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                pool_requests += pool.num_requests
+                new_connections += pool.num_connections
+
+        reused = max(pool_requests - new_connections, 0)
+        with self.lock:
+            stats = dict(self.counters)
+        stats.update({
+            'pool_size': self.pool_size,
+            'connections_opened': new_connections,
+            'connections_reused': reused,
+            'pool_hit_rate': round(reused / pool_requests, 3) if pool_requests else 0.0
+        })
+        return stats
+
+    def close(self):
+        self.flush_cache()
+        self.session.close()
@@ -1,144 +1,446 @@
 import pandas as pd
-from sqlalchemy import text
+from sqlalchemy import text, inspect
 from utils import setup_logging, get_db_connection
+from transform import DataTransformer
+from bulk_load import BulkLoader
+from partitions import PartitionManager, SQLITE_MAX_ATTACHED
+from rollups import RollupMaintainer
+from query import bump_load_version
+from migrations import SchemaMigrator
 
 logger = setup_logging()
 
+FACT_WEATHER_COLUMNS = ['city_id', 'date_id', 'temperature', 'humidity', 'pressure',
+                        'wind_speed', 'weather_condition', 'recorded_time']
+FACT_WEATHER_KEY = ['city_id', 'recorded_time']
+
+# The smallest YYYYMMDD key; dim_date ids below it are the surrogate keys
+# of warehouses built before sql/migrations/0002_dim_date_yyyymmdd.sql
+MIN_DATE_KEY = 10000101
+
 class DataLoader:
     def __init__(self, config):
         self.config = config
         self.engine = get_db_connection(config)
         self.tables = config['tables']
+        self._dim_date_range = None
+        self._city_keys = None
+        self.last_load_stats = {}
+        load_config = config.get('load', {})
+        self.on_conflict = load_config.get('on_conflict', 'nothing')
+        self.partitions = PartitionManager(config)
+        self.rollups = RollupMaintainer() if load_config.get('rollups', True) else None
+        self.migrator = SchemaMigrator()
+        self.bulk = BulkLoader(
+            batch_size=load_config.get('batch_size', 10000),
+            sqlite_synchronous=load_config.get('sqlite_synchronous')
+        )
     
     def load_to_staging(self, df, table_name):
-        """Load data to staging tables"""
+        """Replace a staging table's rows with df, keeping its schema and indexes"""
         try:
             if df.empty:
                 logger.warning(f"No data to load to {table_name}")
                 return False
                 
-            with self.engine.connect() as conn:
-                df.to_sql(
-                    table_name, 
-                    conn, 
-                    if_exists='replace', 
-                    index=False,
-                    method='multi'
-                )
+            df = self._bind_float32(df)
+            with self.engine.connect() as conn, self.bulk.fast_writes(conn):
+                self.truncate_staging(conn, table_name)
+                self.bulk.insert(conn, self._fit_to_table(conn, df, table_name), table_name)
+                conn.commit()
             logger.info(f"Successfully loaded {len(df)} records to staging table: {table_name}")
             return True
         except Exception as e:
             logger.error(f"Error loading data to staging table {table_name}: {e}")
             return False
     
-    def load_to_warehouse(self):
-        """Load data from staging to data warehouse"""
+    def load_to_staging_chunks(self, chunks, table_name):
+        """Load an iterable of DataFrames to a staging table chunk by chunk"""
+        total = 0
         try:
-            with self.engine.connect() as conn:
-                # Check if we're using SQLite
-                is_sqlite = 'sqlite' in str(self.engine.url)
-                
-                # Load dim_city
-                if is_sqlite:
-                    # SQLite version - use INSERT OR REPLACE
-                    conn.execute(text("""
-                        INSERT OR REPLACE INTO dim_city (city_name, country_code, population)
-                        SELECT 
-                            sw.city as city_name,
-                            sw.country as country_code,
-                            sp.population
-                        FROM staging_weather sw
-                        LEFT JOIN staging_population sp 
-                            ON sw.city = sp.city AND sw.country = sp.country
-                    """))
-                else:
-                    # PostgreSQL version
-                    conn.execute(text("""
-                        INSERT INTO dim_city (city_name, country_code, population)
-                        SELECT 
-                            sw.city as city_name,
-                            sw.country as country_code,
-                            sp.population
-                        FROM staging_weather sw
-                        LEFT JOIN staging_population sp 
-                            ON sw.city = sp.city AND sw.country = sp.country
-                        ON CONFLICT (city_name, country_code) 
-                        DO UPDATE SET 
-                            population = EXCLUDED.population,
-                            last_updated = CURRENT_TIMESTAMP
-                    """))
-                
-                # Load dim_date (if not exists)
-                if is_sqlite:
-                    # SQLite version - use SQLite date functions
-                    conn.execute(text("""
-                        INSERT OR IGNORE INTO dim_date (full_date, year, month, day, quarter, day_of_week)
-                        SELECT DISTINCT
-                            date(sw.timestamp) as full_date,
-                            CAST(strftime('%Y', sw.timestamp) AS INTEGER) as year,
-                            CAST(strftime('%m', sw.timestamp) AS INTEGER) as month,
-                            CAST(strftime('%d', sw.timestamp) AS INTEGER) as day,
-                            CAST((strftime('%m', sw.timestamp) - 1) / 3 + 1 AS INTEGER) as quarter,
-                            CAST(strftime('%w', sw.timestamp) AS INTEGER) + 1 as day_of_week
-                        FROM staging_weather sw
-                    """))
-                else:
-                    # PostgreSQL version
-                    conn.execute(text("""
-                        INSERT INTO dim_date (full_date, year, month, day, quarter, day_of_week)
-                        SELECT DISTINCT
-                            DATE(sw.timestamp) as full_date,
-                            EXTRACT(YEAR FROM sw.timestamp) as year,
-                            EXTRACT(MONTH FROM sw.timestamp) as month,
-                            EXTRACT(DAY FROM sw.timestamp) as day,
-                            EXTRACT(QUARTER FROM sw.timestamp) as quarter,
-                            EXTRACT(DOW FROM sw.timestamp) + 1 as day_of_week
-                        FROM staging_weather sw
-                        ON CONFLICT (full_date) DO NOTHING
-                    """))
-                
-                # Load fact_weather
-                conn.execute(text("""
-                    INSERT INTO fact_weather (city_id, date_id, temperature, humidity, pressure, wind_speed, weather_condition, recorded_time)
-                    SELECT 
-                        dc.city_id,
-                        dd.date_id,
-                        sw.temperature,
-                        sw.humidity,
-                        sw.pressure,
-                        sw.wind_speed,
-                        sw.weather_description,
-                        sw.timestamp
-                    FROM staging_weather sw
-                    JOIN dim_city dc ON sw.city = dc.city_name AND sw.country = dc.country_code
-                    JOIN dim_date dd ON date(sw.timestamp) = dd.full_date
-                """))
-                
+            with self.engine.connect() as conn, self.bulk.fast_writes(conn):
+                self.truncate_staging(conn, table_name)
+                for df in chunks:
+                    df = self._fit_to_table(conn, self._bind_float32(df), table_name)
+                    total += self.bulk.insert(conn, df, table_name)
+                conn.commit()
+            
+            if total == 0:
+                logger.warning(f"No data to load to {table_name}")
+                return False
+            logger.info(f"Successfully loaded {total} records to staging table: {table_name}")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading data to staging table {table_name}: {e}")
+            return False
+    
+    def truncate_staging(self, conn, table_name):
+        """Empty a staging table in place; rows are replaced in the same transaction"""
+        if not inspect(conn).has_table(table_name):
+            return
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text(f"TRUNCATE TABLE {table_name}"))
+        else:
+            # SQLite runs an unqualified DELETE as a fast table truncate
+            conn.execute(text(f"DELETE FROM {table_name}"))
+    
+    def _fit_to_table(self, conn, df, table_name):
+        """Keep only the columns an existing table defines"""
+        if not inspect(conn).has_table(table_name):
+            return df
+        columns = {column['name'] for column in inspect(conn).get_columns(table_name)}
+        extra = [col for col in df.columns if col not in columns]
+        if extra:
+            logger.info(f"Not writing columns missing from {table_name}: {extra}")
+            df = df[[col for col in df.columns if col in columns]]
+        return df
+    
+    def load_to_quarantine(self, df, table_name='quarantine_weather'):
+        """Append rows rejected by data-quality rules to a quarantine table"""
+        try:
+            if df.empty:
+                return True
+            with self.engine.connect() as conn, self.bulk.fast_writes(conn):
+                self.bulk.insert(conn, self._fit_to_table(conn, self._bind_float32(df), table_name), table_name)
                 conn.commit()
+            logger.info(f"Quarantined {len(df)} records to {table_name}")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading data to quarantine table {table_name}: {e}")
+            return False
+    
+    def _bind_float32(self, df):
+        """Round float32 measurements to the schema's DECIMAL(5,2) scale
+
+        Categorical and int16 columns are written as they are. float32 values
+        are bound as doubles, so without rounding 12.34 would be stored as
+        12.340000152587891.
+        """
+        float32_columns = df.select_dtypes(include='float32').columns
+        if len(float32_columns) == 0:
+            return df
+        return df.assign(**{col: df[col].astype('float64').round(2) for col in float32_columns})
+    
+    def load_to_warehouse(self, weather_df=None):
+        """Load data from staging to data warehouse
+
+        Surrogate city keys are attached to the weather frame in memory, so
+        facts are merged with integer keys only. Without a frame the
+        staged weather is read back from staging_weather. Dimensions, staged
+        facts and the fact merge commit as one transaction.
+        """
+        try:
+            with self.engine.connect() as conn, self.bulk.fast_writes(conn):
+                if weather_df is None:
+                    weather_df = pd.read_sql(text("SELECT * FROM staging_weather"), conn)
+                inserted = staged = 0
+                for batch, months in self._month_groups(conn, weather_df):
+                    # SQLite refuses ATTACH inside a transaction, so the batch's
+                    # partitions are attached before its first write
+                    aliases = self.partitions.attach(conn, months) if months else {}
+                    try:
+                        batch_inserted, batch_staged = self._load_batch(conn, batch, aliases)
+                        conn.commit()
+                    finally:
+                        if aliases:
+                            self.partitions.detach(conn, aliases.values())
+                    inserted += batch_inserted
+                    staged += batch_staged
             
-            logger.info("Successfully loaded data to data warehouse")
+            if weather_df.empty:
+                logger.warning("No weather data to load to warehouse")
+                return True
+            self.last_load_stats = {'facts_inserted': inserted, 'facts_already_loaded': staged - inserted}
+            logger.info(f"Successfully loaded {inserted} new records to data warehouse "
+                        f"({staged - inserted} already present)")
             return True
             
         except Exception as e:
+            self._forget_cached_keys()
             logger.error(f"Error loading data to warehouse: {e}")
             return False
     
+    def merge_facts(self, conn, target='fact_weather', bounds=None):
+        """Merge staging_fact_weather into target on (city_id, recorded_time)
+
+        With on_conflict 'nothing' an anti-join on the unique key index skips
+        facts that are already loaded, so re-running a batch inserts nothing.
+        With 'update' existing facts take the staged measurements. bounds
+        limits the merge to staged facts in [start, end). The rollups are
+        brought up to date in the same transaction. Returns the number of
+        facts inserted or updated.
+        """
+        columns = ', '.join(FACT_WEATHER_COLUMNS)
+        staged = ', '.join(f"s.{col}" for col in FACT_WEATHER_COLUMNS)
+        params = {}
+        in_bounds = 'true'
+        if bounds is not None:
+            in_bounds = 's.recorded_time >= :start AND s.recorded_time < :end'
+            params = {'start': bounds[0], 'end': bounds[1]}
+        if self.on_conflict == 'update':
+            updates = ', '.join(f"{col} = EXCLUDED.{col}" for col in FACT_WEATHER_COLUMNS if col not in FACT_WEATHER_KEY)
+            result = conn.execute(text(f"""
+                INSERT INTO {target} ({columns})
+                SELECT {staged} FROM staging_fact_weather s
+                WHERE {in_bounds}
+                ON CONFLICT (city_id, recorded_time) DO UPDATE SET {updates}
+            """), params)
+            if self.rollups is not None:
+                # Overwritten facts cannot be subtracted, so recompute their days
+                self.rollups.refresh_days(conn, target, in_bounds, params)
+        else:
+            new_rows = f"""
+                SELECT {staged} FROM staging_fact_weather s
+                WHERE {in_bounds} AND NOT EXISTS (
+                    SELECT 1 FROM {target} f
+                    WHERE f.city_id = s.city_id AND f.recorded_time = s.recorded_time
+                )
+            """
+            if self.rollups is not None:
+                # Aggregate exactly the rows about to be inserted
+                self.rollups.add(conn, new_rows, params)
+            result = conn.execute(text(f"""
+                INSERT INTO {target} ({columns})
+                {new_rows}
+                ON CONFLICT (city_id, recorded_time) DO NOTHING
+            """), params)
+        if self.rollups is not None:
+            self.rollups.refresh_months(conn, in_bounds, params)
+        return max(result.rowcount, 0)
+    
+    def _month_groups(self, conn, weather_df):
+        """Split a batch into (frame, months to attach), one transaction each
+
+        Only partitioned SQLite attaches month files. A batch spanning more
+        months than SQLite can attach at once is loaded a group of months
+        at a time; every group is still atomic on its own.
+        """
+        if not self.partitions.enabled or conn.dialect.name != 'sqlite' or weather_df.empty:
+            yield weather_df, []
+            return
+        months = self.partitions.months_of(weather_df['timestamp'])
+        if len(months) <= SQLITE_MAX_ATTACHED:
+            yield weather_df, months
+            return
+        timestamps = pd.to_datetime(weather_df['timestamp'])
+        for i in range(0, len(months), SQLITE_MAX_ATTACHED):
+            group = months[i:i + SQLITE_MAX_ATTACHED]
+            end = group[-1] + pd.offsets.MonthBegin(1)
+            yield weather_df[((timestamps >= group[0]) & (timestamps < end)).to_numpy()], group
+    
+    def _load_batch(self, conn, weather_df, aliases):
+        """Upsert dimensions and merge one batch's facts on conn's open transaction
+
+        aliases maps months to their attached SQLite partitions. Returns
+        (facts inserted, facts staged); the caller commits.
+        """
+        # Upsert dim_city; ON CONFLICT DO UPDATE keeps city_id stable
+        # (INSERT OR REPLACE would delete and re-key the row)
+        conn.execute(text("""
+            INSERT INTO dim_city (city_name, country_code, population)
+            SELECT DISTINCT
+                sw.city as city_name,
+                sw.country as country_code,
+                sp.population
+            FROM staging_weather sw
+            LEFT JOIN staging_population sp 
+                ON sw.city = sp.city AND sw.country = sp.country
+            WHERE true
+            ON CONFLICT (city_name, country_code) 
+            DO UPDATE SET 
+                population = COALESCE(EXCLUDED.population, dim_city.population),
+                last_updated = CURRENT_TIMESTAMP
+        """))
+        if weather_df.empty:
+            # Populations may still have changed
+            bump_load_version(conn)
+            return 0, 0
+        
+        # Extend dim_date only if this batch falls outside its range
+        self.ensure_dim_date(
+            conn,
+            self._key_to_date(weather_df['date_id'].min()),
+            self._key_to_date(weather_df['date_id'].max())
+        )
+        
+        # Stage integer-keyed facts, then merge only the new ones
+        facts = self.attach_city_keys(conn, weather_df)
+        facts = facts.rename(columns={
+            'weather_description': 'weather_condition',
+            'timestamp': 'recorded_time'
+        })[FACT_WEATHER_COLUMNS].drop_duplicates(FACT_WEATHER_KEY, keep='last')
+        self.truncate_staging(conn, 'staging_fact_weather')
+        self.bulk.insert(conn, self._bind_float32(facts), 'staging_fact_weather')
+        if self.partitions.enabled:
+            inserted = self.merge_partitioned(conn, facts['recorded_time'], aliases)
+        else:
+            inserted = self.merge_facts(conn)
+        
+        # Invalidates cached query results read before this load
+        bump_load_version(conn)
+        return inserted, len(facts)
+    
+    def merge_partitioned(self, conn, recorded_times, aliases):
+        """Merge staged facts into their monthly fact_weather partitions
+
+        On SQLite, aliases maps each month to its partition, attached before
+        the transaction began, so the partitions commit with everything else.
+        That holds for the rollback journal partitioned warehouses default
+        to (see PARTITIONED_SQLITE_PRAGMAS); in WAL mode SQLite commits
+        each attached file on its own.
+        """
+        if conn.dialect.name != 'sqlite':
+            # PostgreSQL routes rows itself once the partitions exist
+            self.partitions.ensure_postgres_partitions(conn, self.partitions.months_of(recorded_times))
+            return self.merge_facts(conn)
+        
+        inserted = 0
+        for month, alias in aliases.items():
+            inserted += self.merge_facts(conn, f"{alias}.fact_weather", self.partitions.month_bounds(month))
+        return inserted
+    
+    def attach_city_keys(self, conn, df):
+        """Attach city_id to a weather frame from the warm dim_city key cache"""
+        if self._city_keys is None or not self._has_city_keys(df):
+            # First use, or new cities were just upserted: refresh the cache
+            rows = conn.execute(text("SELECT city_name, country_code, city_id FROM dim_city")).fetchall()
+            self._city_keys = pd.DataFrame(rows, columns=['city', 'country', 'city_id'])
+        
+        keyed = df.assign(city=df['city'].astype(str), country=df['country'].astype(str)).merge(
+            self._city_keys, on=['city', 'country'], how='left'
+        )
+        unknown = keyed['city_id'].isna()
+        if unknown.any():
+            logger.warning(f"Dropping {int(unknown.sum())} weather rows with no dim_city entry")
+            keyed = keyed[~unknown]
+        return keyed.assign(city_id=keyed['city_id'].astype('int64'))
+    
+    def _has_city_keys(self, df):
+        """True if every (city, country) in df is already in the key cache"""
+        batch = df[['city', 'country']].astype(str).drop_duplicates()
+        known = batch.merge(self._city_keys[['city', 'country']], on=['city', 'country'], how='inner')
+        return len(known) == len(batch)
+    
+    def ensure_dim_date(self, conn, start_date, end_date):
+        """Make sure dim_date covers [start_date, end_date], inserting only missing days
+
+        The covered range is cached after the first lookup, so batches inside
+        it cost nothing. dim_date is kept contiguous, so extending it only
+        means adding days before its first or after its last date. Gaps
+        left by older warehouses, which added only the days they loaded,
+        are filled on the first lookup.
+        """
+        start_date, end_date = pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize()
+        missing, present = [], 0
+        if self._dim_date_range is None:
+            low, high, days = conn.execute(text("SELECT MIN(date_id), MAX(date_id), COUNT(*) FROM dim_date")).fetchone()
+            if low is not None:
+                if low < MIN_DATE_KEY:
+                    raise ValueError(f"dim_date is keyed by surrogate ids ({low} - {high}), not YYYYMMDD; "
+                                     f"run create_tables() to apply the dim_date re-keying migration")
+                low, high = self._key_to_date(low), self._key_to_date(high)
+                if days < (high - low).days + 1:
+                    missing.append((low, high))
+                    present = days
+                self._dim_date_range = (low, high)
+        
+        if self._dim_date_range is None:
+            missing = [(start_date, end_date)]
+        else:
+            low, high = self._dim_date_range
+            if start_date >= low and end_date <= high and not missing:
+                return 0
+            if start_date < low:
+                missing.append((start_date, low - pd.Timedelta(days=1)))
+            if end_date > high:
+                missing.append((high + pd.Timedelta(days=1), end_date))
+        
+        inserted = 0
+        for range_start, range_end in missing:
+            dim_date = DataTransformer().create_dim_date(range_start, range_end)
+            dim_date['full_date'] = dim_date['full_date'].dt.strftime('%Y-%m-%d')
+            conn.execute(text("""
+                INSERT INTO dim_date (date_id, full_date, year, month, day, quarter, day_of_week)
+                VALUES (:date_id, :full_date, :year, :month, :day, :quarter, :day_of_week)
+                ON CONFLICT DO NOTHING
+            """), dim_date.astype(object).to_dict('records'))
+            inserted += len(dim_date)
+        # A filled gap's range includes the days that were already there
+        inserted -= present
+        
+        low = min(start_date, self._dim_date_range[0]) if self._dim_date_range else start_date
+        high = max(end_date, self._dim_date_range[1]) if self._dim_date_range else end_date
+        self._dim_date_range = (low, high)
+        logger.info(f"Extended dim_date by {inserted} days to {low:%Y-%m-%d} - {high:%Y-%m-%d}")
+        return inserted
+    
+    def _forget_cached_keys(self):
+        """Drop the dim_date range and city key caches after a rolled-back load
+
+        Both are filled inside the load transaction, so after a rollback
+        they may describe rows that were never committed.
+        """
+        self._dim_date_range = None
+        self._city_keys = None
+    
+    def _schema_options(self, conn):
+        """Config that changes the DDL, and so is part of the schema fingerprint"""
+        if conn.dialect.name != 'postgresql':
+            return {}
+        return {
+            'partitioned': bool(self.partitions.enabled),
+            'unlogged_staging': bool(self.config.get('load', {}).get('unlogged_staging'))
+        }
+    
+    def _key_to_date(self, date_id):
+        return pd.to_datetime(str(int(date_id)), format='%Y%m%d')
+    
     def create_tables(self):
-        """Create database tables"""
+        """Bring the schema up to date, skipping all DDL when its fingerprint matches"""
         try:
             with self.engine.connect() as conn:
-                with open('sql/create_tables.sql', 'r') as file:
-                    sql_script = file.read()
+                options = self._schema_options(conn)
+                if self.migrator.is_current(conn, options):
+                    logger.info("Schema is up to date, no DDL needed")
+                else:
+                    self.migrator.begin(conn)
+                    # A partitioned fact_weather must exist before the baseline's plain one
+                    if self.partitions.enabled and conn.dialect.name == 'postgresql':
+                        self.partitions.create_parent(conn)
+                    
+                    applied = self.migrator.migrate(conn)
+                    
+                    # Staging is reloaded every run, so on PostgreSQL it can skip the WAL
+                    if options.get('unlogged_staging'):
+                        staging_tables = self.tables.get('staging', {}) or {
+                            'weather': 'staging_weather', 'population': 'staging_population'
+                        }
+                        for table_name in [*staging_tables.values(), 'staging_fact_weather']:
+                            conn.execute(text(f"ALTER TABLE {table_name} SET UNLOGGED"))
+                    
+                    self.migrator.record_fingerprint(conn, options)
+                    logger.info(f"Applied schema migrations: {applied or 'none pending'}")
+                
+                # Build rollups once for facts loaded before they existed
+                changed = False
+                if self.rollups is not None and not self.partitions.enabled:
+                    has_rollups = conn.execute(text("SELECT 1 FROM rollup_weather_daily LIMIT 1")).first()
+                    if not has_rollups and conn.execute(text("SELECT 1 FROM fact_weather LIMIT 1")).first():
+                        self.rollups.rebuild(conn)
+                        changed = True
                 
-                # Execute SQL script
-                for statement in sql_script.split(';'):
-                    if statement.strip():
-                        conn.execute(text(statement))
+                # Pre-populate the date dimension once
+                dim_date_config = self.config.get('dim_date', {})
+                if dim_date_config.get('start') and dim_date_config.get('end'):
+                    changed = self.ensure_dim_date(conn, dim_date_config['start'], dim_date_config['end']) > 0 or changed
+                if changed:
+                    bump_load_version(conn)
                 conn.commit()
             
             logger.info("Successfully created database tables")
             return True
             
         except Exception as e:
+            self._forget_cached_keys()
             logger.error(f"Error creating tables: {e}")
             return False
\ No newline at end of file
@@ -0,0 +1,69 @@
+import threading
+import time
+from utils import setup_logging
+
+logger = setup_logging()
+
+class DatabaseMaintenance:
+    """Periodic SQLite upkeep: WAL checkpoint, ANALYZE and PRAGMA optimize
+
+    In WAL mode the write-ahead log only shrinks when a checkpoint can run
+    to completion, so a steady stream of readers lets it grow without
+    bound. run() refreshes planner statistics with ANALYZE every
+    analyze_every runs, lets PRAGMA optimize redo whatever else has gone
+    stale, then checkpoints with TRUNCATE. start() repeats it on a daemon
+    thread. Other dialects are left alone.
+    """
+
+    def __init__(self, engine, config=None):
+        maintenance_config = (config or {}).get('maintenance', {})
+        self.engine = engine
+        self.interval = maintenance_config.get('interval_seconds', 900)
+        self.analyze_every = maintenance_config.get('analyze_every', 4)
+        self.runs = 0
+        self.last_report = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run(self):
+        """One maintenance pass; returns a report of what was done"""
+        if self.engine.dialect.name != 'sqlite':
+            return {}
+        report = {}
+        start = time.perf_counter()
+        with self.engine.connect() as conn:
+            if self.analyze_every and self.runs % self.analyze_every == 0:
+                conn.exec_driver_sql("ANALYZE")
+                report['analyzed'] = True
+            conn.exec_driver_sql("PRAGMA optimize")
+            conn.commit()
+            # Last, so the statistics just written are checkpointed too
+            busy, wal_pages, checkpointed = conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            report.update({'checkpoint_busy': bool(busy), 'wal_pages': wal_pages, 'pages_checkpointed': checkpointed})
+        self.runs += 1
+        report['seconds'] = round(time.perf_counter() - start, 3)
+        self.last_report = report
+        logger.info("Database maintenance: " + ", ".join(f"{key}={value}" for key, value in report.items()))
+        return report
+
+    def start(self):
+        """Run maintenance every interval seconds on a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='db-maintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run()
+            except Exception as e:
+                # A locked or busy database is retried on the next interval
+                logger.warning(f"Database maintenance failed: {e}")
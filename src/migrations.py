@@ -0,0 +1,171 @@
+import hashlib
+import os
+import re
+from sqlalchemy import text
+from utils import setup_logging
+
+logger = setup_logging()
+
+# SQL files are found next to the package, not relative to the working directory
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql')
+
+# The baseline schema, written to be re-run safely (IF NOT EXISTS throughout)
+BASELINE_SCRIPT = 'create_tables.sql'
+
+# Versioned migrations: sql/migrations/0002_add_something.sql, applied once each
+MIGRATION_FILE = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+# Quoted literals and identifiers, dollar-quoted bodies, comments, and statement ends
+SQL_TOKEN = re.compile(r"""
+    (?P<literal>'(?:[^']|'')*' | "(?:[^"]|"")*" | \$(?P<tag>\w*)\$.*?\$(?P=tag)\$)
+  | (?P<comment>--[^\n]* | /\*.*?\*/)
+  | (?P<end>;)
+""", re.S | re.X)
+
+SCHEMA_TABLES_DDL = [
+    """CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        checksum VARCHAR(64) NOT NULL,
+        applied_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS schema_fingerprint (
+        id INTEGER PRIMARY KEY,
+        fingerprint VARCHAR(64) NOT NULL,
+        applied_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )"""
+]
+
+def split_statements(sql):
+    """Split a SQL script into statements
+
+    Semicolons inside string literals, quoted identifiers, dollar-quoted
+    bodies and comments do not end a statement. Each comment is replaced
+    by a space, so the tokens either side of it stay apart.
+    """
+    statements, current, position = [], [], 0
+    for match in SQL_TOKEN.finditer(sql):
+        current.append(sql[position:match.start()])
+        if match.group('literal'):
+            current.append(match.group('literal'))
+        elif match.group('comment'):
+            current.append(' ')
+        elif match.group('end'):
+            statements.append(''.join(current))
+            current = []
+        position = match.end()
+    current.append(sql[position:])
+    statements.append(''.join(current))
+    return [statement.strip() for statement in statements if statement.strip()]
+
+def checksum(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, 'r') as file:
+            self.sql = file.read()
+        self.checksum = checksum(self.sql)
+
+    def statements(self, dialect):
+        sql = self.sql
+        if dialect == 'postgresql':
+            # The scripts' surrogate keys are written for SQLite
+            sql = sql.replace('INTEGER PRIMARY KEY AUTOINCREMENT', 'SERIAL PRIMARY KEY')
+        return split_statements(sql)
+
+class SchemaMigrator:
+    """Versioned schema migrations with a fingerprint fast path
+
+    Version 1 is the baseline script, sql/create_tables.sql, which is
+    re-run whenever it changes. It only creates what is missing, so a
+    change to an existing table needs a numbered migration too. Files in
+    sql/migrations/ named NNNN_description.sql are applied once each, in
+    version order, and an applied migration may not be edited afterwards. The fingerprint of
+    every migration's checksum plus the dialect and DDL options is stored
+    in schema_fingerprint: when it matches, startup reads that one row and
+    runs no DDL. Otherwise every pending migration runs in one transaction.
+    """
+
+    def __init__(self, sql_dir=SQL_DIR):
+        self.sql_dir = sql_dir
+        self.migrations = self.discover()
+
+    def discover(self):
+        migrations = [Migration(1, 'baseline', os.path.join(self.sql_dir, BASELINE_SCRIPT))]
+        migrations_dir = os.path.join(self.sql_dir, 'migrations')
+        if os.path.isdir(migrations_dir):
+            for filename in sorted(os.listdir(migrations_dir)):
+                match = MIGRATION_FILE.match(filename)
+                if match:
+                    migrations.append(Migration(int(match.group(1)), match.group(2),
+                                                os.path.join(migrations_dir, filename)))
+        versions = [migration.version for migration in migrations]
+        if len(set(versions)) != len(versions) or versions != sorted(versions):
+            raise ValueError(f"Migration versions must be unique and start after the baseline: {versions}")
+        return migrations
+
+    def fingerprint(self, dialect, options=None):
+        """Hash of the schema this code expects for a dialect and its DDL options"""
+        parts = [dialect, repr(sorted((options or {}).items()))]
+        parts += [f"{migration.version}:{migration.checksum}" for migration in self.migrations]
+        return checksum('\n'.join(parts))
+
+    def stored_fingerprint(self, conn):
+        """The fingerprint recorded by the last migration, or None"""
+        try:
+            row = conn.execute(text("SELECT fingerprint FROM schema_fingerprint WHERE id = 1")).first()
+            return row[0] if row else None
+        except Exception:
+            # No schema tables yet; on PostgreSQL the failed read aborted the transaction
+            conn.rollback()
+            return None
+
+    def is_current(self, conn, options=None):
+        return self.stored_fingerprint(conn) == self.fingerprint(conn.dialect.name, options)
+
+    def begin(self, conn):
+        """Open a transaction that covers DDL too
+
+        Python's sqlite3 only opens transactions implicitly before DML, so
+        CREATE statements would otherwise each commit on their own.
+        """
+        if conn.dialect.name == 'sqlite' and not conn.connection.dbapi_connection.in_transaction:
+            conn.exec_driver_sql("BEGIN")
+
+    def migrate(self, conn):
+        """Apply every pending migration on conn's open transaction; returns their versions
+
+        The caller records the fingerprint and commits, so a failure in any
+        migration leaves the schema as it was.
+        """
+        self.begin(conn)
+        for statement in SCHEMA_TABLES_DDL:
+            conn.execute(text(statement))
+        applied = dict(conn.execute(text("SELECT version, checksum FROM schema_migrations")).fetchall())
+
+        pending = []
+        for migration in self.migrations:
+            if migration.version in applied:
+                if applied[migration.version] == migration.checksum:
+                    continue
+                if migration.version != 1:
+                    raise ValueError(f"Migration {migration.version}_{migration.name} was changed after "
+                                     f"it was applied; add a new migration instead")
+            for statement in migration.statements(conn.dialect.name):
+                conn.execute(text(statement))
+            conn.execute(text("DELETE FROM schema_migrations WHERE version = :version"),
+                         {'version': migration.version})
+            conn.execute(text("""
+                INSERT INTO schema_migrations (version, name, checksum) VALUES (:version, :name, :checksum)
+            """), {'version': migration.version, 'name': migration.name, 'checksum': migration.checksum})
+            pending.append(migration.version)
+        return pending
+
+    def record_fingerprint(self, conn, options=None):
+        conn.execute(text("DELETE FROM schema_fingerprint WHERE id = 1"))
+        conn.execute(text("INSERT INTO schema_fingerprint (id, fingerprint) VALUES (1, :fingerprint)"),
+                     {'fingerprint': self.fingerprint(conn.dialect.name, options)})
@@ -0,0 +1,197 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from utils import setup_logging
+from transform import DataTransformer, WEATHER_TEXT_COLUMNS
+
+logger = setup_logging()
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+PARTITION_KEY = ['country', 'city']
+
+def _write_frame(df):
+    """Publish a frame for another process; returns a small picklable handle
+
+    With pyarrow the frame is written as an Arrow IPC stream into a shared
+    memory block and only the block's name travels through the pool. The
+    index is kept, since it carries the rows' original positions. Frames
+    Arrow cannot type (e.g. numbers mixed with junk strings in one object
+    column) are pickled instead.
+    """
+    if pa is None:
+        return ('frame', df)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return ('frame', df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    buffer = sink.getvalue()
+    block = shared_memory.SharedMemory(create=True, size=max(buffer.size, 1))
+    try:
+        block.buf[:buffer.size] = memoryview(buffer).cast('B')
+    except Exception:
+        block.close()
+        block.unlink()
+        raise
+    block.close()
+    return ('arrow', block.name, buffer.size)
+
+def _read_frame(handle, unlink=True):
+    """Read a frame published by _write_frame, releasing its shared memory"""
+    if handle[0] == 'frame':
+        return handle[1]
+    _, name, size = handle
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        # Copy out of the block so no Arrow buffer still points into it on close
+        data = pa.py_buffer(bytes(block.buf[:size]))
+    finally:
+        block.close()
+        if unlink:
+            block.unlink()
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+def _release(handle):
+    """Free a handle's shared memory without reading it"""
+    if handle[0] != 'arrow':
+        return
+    try:
+        block = shared_memory.SharedMemory(name=handle[1])
+        block.close()
+        block.unlink()
+    except FileNotFoundError:
+        pass
+
+def _transform_partition(kind, handle, extraction_time):
+    """Worker: clean one (country, city) partition; runs in a child process"""
+    df = _read_frame(handle)
+    transformer = DataTransformer()
+    if kind == 'weather':
+        df = transformer._prepare_weather_frame(df)
+    else:
+        df = transformer._clean_population_frame(df, extraction_time)
+    return _write_frame(df)
+
+class ParallelTransformer(DataTransformer):
+    """DataTransformer that cleans large batches on a process pool
+
+    Rows are partitioned by a hash of (country, city), so duplicates and
+    every city's rows stay in one partition. Workers run the row- and
+    group-local cleaning steps; the parent puts rows back in their original
+    order and runs the batch-wide steps (mean imputation, latest-year
+    filter) itself. Output values match DataTransformer's; categories come
+    back sorted. Batches under min_rows use the serial path.
+    """
+
+    def __init__(self, workers=None, min_rows=200000):
+        super().__init__()
+        self.workers = workers or os.cpu_count() or 1
+        self.min_rows = min_rows
+
+    def clean_weather_data(self, df, validate=None):
+        """Clean and transform weather data, in parallel for large batches"""
+        if not self._use_pool(df):
+            return super().clean_weather_data(df, validate)
+        try:
+            extraction_time = pd.Timestamp.now()
+            prepared = self._run('weather', df, extraction_time)
+        except Exception as e:
+            self.logger.warning(f"Parallel weather cleaning failed, falling back to serial: {e}")
+            return super().clean_weather_data(df, validate)
+        try:
+            if validate is not None:
+                prepared = validate(prepared)
+            df = self._finish_weather_frame(prepared, extraction_time)
+            self.logger.info(f"Successfully cleaned {len(df)} weather records ({self.workers} workers)")
+            return df
+        except Exception as e:
+            self.logger.error(f"Error cleaning weather data: {e}")
+            return pd.DataFrame()
+
+    def clean_population_data(self, df):
+        """Clean and transform population data, in parallel for large batches"""
+        if not self._use_pool(df):
+            return super().clean_population_data(df)
+        try:
+            df = self._run('population', df, pd.Timestamp.now())
+            if 'year' in df.columns and not df.empty:
+                df = df[df['year'] == df['year'].max()]
+            self.logger.info(f"Successfully cleaned {len(df)} population records ({self.workers} workers)")
+            return df
+        except Exception as e:
+            self.logger.warning(f"Parallel population cleaning failed, falling back to serial: {e}")
+            return super().clean_population_data(df)
+
+    def _use_pool(self, df):
+        return self.workers > 1 and len(df) >= self.min_rows
+
+    def partition(self, df, n_partitions):
+        """Split df into partitions by (country, city) hash
+
+        Each partition's index holds its rows' positions in df.
+        """
+        key = [col for col in df.columns if str(col).lower() in PARTITION_KEY]
+        hashes = pd.util.hash_pandas_object(df[key].astype(str), index=False).to_numpy()
+        assignment = hashes % np.uint64(n_partitions)
+        positions = np.arange(len(df))
+        partitions = []
+        for i in range(n_partitions):
+            rows = positions[assignment == i]
+            if len(rows):
+                part = df.iloc[rows]
+                partitions.append(part.set_axis(pd.Index(rows), axis=0))
+        return partitions
+
+    def _run(self, kind, df, extraction_time):
+        """Clean df's partitions on the pool and reassemble them in input order"""
+        partitions = self.partition(df, self.workers)
+
+        # Share the parent's resource tracker with the workers, so blocks
+        # they create are tracked once and freed by the parent
+        resource_tracker.ensure_running()
+
+        handles = []
+        results = []
+        errors = []
+        try:
+            for part in partitions:
+                handles.append(_write_frame(part))
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(partitions))) as pool:
+                futures = [pool.submit(_transform_partition, kind, handle, extraction_time) for handle in handles]
+                for future in futures:
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        errors.append(e)
+            if errors:
+                raise errors[0]
+            parts = [_read_frame(handle) for handle in results]
+        finally:
+            # Input blocks are unlinked by the workers, outputs by _read_frame;
+            # anything left over after a failure is freed here
+            for handle in handles + results:
+                _release(handle)
+
+        parts = [part for part in parts if not part.empty] or parts[:1]
+        parts = self._align_categories(parts)
+        result = pd.concat(parts).sort_index()
+        result.index = df.index[result.index.to_numpy()]
+        return result
+
+    def _align_categories(self, parts):
+        """Give every partition's text columns the same, sorted, categories"""
+        for col in WEATHER_TEXT_COLUMNS:
+            if not all(col in part.columns and isinstance(part[col].dtype, pd.CategoricalDtype) for part in parts):
+                continue
+            categories = union_categoricals([part[col] for part in parts], sort_categories=True).categories
+            parts = [part.assign(**{col: part[col].cat.set_categories(categories)}) for part in parts]
+        return parts
@@ -0,0 +1,222 @@
+import os
+import re
+import pandas as pd
+from sqlalchemy import text
+from utils import setup_logging
+from query import bump_load_version
+
+logger = setup_logging()
+
+# SQLite's default compile-time cap on attached databases
+SQLITE_MAX_ATTACHED = 10
+
+PARTITION_FILE = re.compile(r'^fact_weather_(\d{4})_(\d{2})\.db$')
+
+SQLITE_PARTITION_DDL = [
+    """CREATE TABLE IF NOT EXISTS {alias}.fact_weather (
+        weather_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        city_id INTEGER,
+        date_id INTEGER,
+        temperature DECIMAL(5,2),
+        humidity INTEGER,
+        pressure INTEGER,
+        wind_speed DECIMAL(5,2),
+        weather_condition VARCHAR(100),
+        recorded_time TIMESTAMP,
+        loaded_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS {alias}.uq_fact_weather_city_time ON fact_weather(city_id, recorded_time)",
+    "CREATE INDEX IF NOT EXISTS {alias}.idx_fact_weather_city_date ON fact_weather(city_id, date_id)"
+]
+
+# Partitioned tables cannot carry the plain table's AUTOINCREMENT key, and the
+# partition key must be part of every unique index
+POSTGRES_PARENT_DDL = """
+    CREATE TABLE IF NOT EXISTS fact_weather (
+        weather_id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+        city_id INTEGER,
+        date_id INTEGER,
+        temperature DECIMAL(5,2),
+        humidity INTEGER,
+        pressure INTEGER,
+        wind_speed DECIMAL(5,2),
+        weather_condition VARCHAR(100),
+        recorded_time TIMESTAMP NOT NULL,
+        loaded_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) PARTITION BY RANGE (recorded_time)
+"""
+
+class PartitionManager:
+    """Monthly partitions of fact_weather
+
+    PostgreSQL uses declarative range partitions of fact_weather on
+    recorded_time. SQLite keeps each month in its own database file
+    (fact_weather_YYYY_MM.db), attached to a connection only while it is
+    loaded or queried. Queries see fact_weather through a TEMP view over
+    just the months they ask for, which shadows the main table by name.
+    """
+
+    def __init__(self, config):
+        partition_config = config.get('partitioning', {})
+        self.enabled = partition_config.get('enabled', False)
+        self.directory = partition_config.get('directory', 'data/partitions')
+        self.archive_directory = partition_config.get('archive_directory', 'data/partitions/archive')
+
+    def month_start(self, timestamp):
+        return pd.Timestamp(timestamp).to_period('M').to_timestamp()
+
+    def months(self, start, end):
+        """Month starts of every partition overlapping [start, end)"""
+        start = self.month_start(start)
+        end = pd.Timestamp(end)
+        return [month for month in pd.date_range(start, end, freq='MS') if month < end]
+
+    def months_of(self, timestamps):
+        """Month starts of the partitions a batch of timestamps falls into"""
+        months = pd.to_datetime(pd.Series(timestamps)).dt.to_period('M').dt.to_timestamp()
+        return [pd.Timestamp(month) for month in sorted(months.dropna().unique())]
+
+    def partition_name(self, month):
+        return f"fact_weather_{month:%Y_%m}"
+
+    def partition_path(self, month):
+        return os.path.join(self.directory, f"{self.partition_name(month)}.db")
+
+    def month_bounds(self, month):
+        """[start, end) literals of a month, comparable with stored recorded_time"""
+        return f"{month:%Y-%m-%d}", f"{month + pd.offsets.MonthBegin(1):%Y-%m-%d}"
+
+    # SQLite: one database file per month
+
+    def attach(self, conn, months, create=True):
+        """Attach month partitions to a SQLite connection; returns their aliases
+
+        ATTACH is refused inside a transaction, so call this between
+        transactions. Missing files are created only when create is set.
+        """
+        if len(months) > SQLITE_MAX_ATTACHED:
+            raise ValueError(f"{len(months)} monthly partitions requested; SQLite attaches at most "
+                             f"{SQLITE_MAX_ATTACHED} at once")
+        attached = {row[1] for row in conn.exec_driver_sql("PRAGMA database_list").fetchall()}
+        aliases = {}
+        for month in months:
+            path = self.partition_path(month)
+            if not create and not os.path.exists(path):
+                continue
+            alias = self.partition_name(month)
+            if alias not in attached:
+                os.makedirs(self.directory, exist_ok=True)
+                conn.exec_driver_sql(f"ATTACH DATABASE ? AS {alias}", (path,))
+                if create:
+                    for statement in SQLITE_PARTITION_DDL:
+                        conn.exec_driver_sql(statement.format(alias=alias))
+            aliases[month] = alias
+        return aliases
+
+    def stored_months(self):
+        """Month starts of the SQLite partition files currently in the warehouse"""
+        if not os.path.isdir(self.directory):
+            return []
+        matches = [PARTITION_FILE.match(filename) for filename in sorted(os.listdir(self.directory))]
+        return [pd.Timestamp(int(m.group(1)), int(m.group(2)), 1) for m in matches if m]
+
+    def detach(self, conn, aliases):
+        if conn.in_transaction():
+            conn.rollback()
+        for alias in aliases:
+            conn.exec_driver_sql(f"DETACH DATABASE {alias}")
+
+    # PostgreSQL: declarative partitions
+
+    def create_parent(self, conn):
+        conn.execute(text(POSTGRES_PARENT_DDL))
+
+    def ensure_postgres_partitions(self, conn, months):
+        for month in months:
+            start, end = self.month_bounds(month)
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {self.partition_name(month)} "
+                f"PARTITION OF fact_weather FOR VALUES FROM ('{start}') TO ('{end}')"
+            ))
+
+    # Querying
+
+    def create_pruned_view(self, conn, start, end):
+        """Shadow fact_weather with a TEMP view over the months in [start, end)
+
+        Returns the attached SQLite aliases, to be passed to drop_pruned_view.
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        predicate = f"recorded_time >= '{start:%Y-%m-%d %H:%M:%S}' AND recorded_time < '{end:%Y-%m-%d %H:%M:%S}'"
+        aliases = {}
+        if conn.dialect.name == 'sqlite':
+            aliases = self.attach(conn, self.months(start, end), create=False)
+            sources = [f"SELECT * FROM {alias}.fact_weather WHERE {predicate}" for alias in aliases.values()]
+            # An empty range still needs a view with the fact_weather columns
+            body = ' UNION ALL '.join(sources) or "SELECT * FROM main.fact_weather WHERE 0"
+        else:
+            # The planner prunes partitions from the recorded_time predicate
+            schema = conn.dialect.default_schema_name
+            body = f"SELECT * FROM {schema}.fact_weather WHERE {predicate}"
+        conn.exec_driver_sql(f"CREATE TEMP VIEW fact_weather AS {body}")
+        return list(aliases.values())
+
+    def drop_pruned_view(self, conn, aliases):
+        if conn.in_transaction():
+            conn.rollback()
+        conn.exec_driver_sql("DROP VIEW IF EXISTS pg_temp.fact_weather" if conn.dialect.name == 'postgresql'
+                             else "DROP VIEW IF EXISTS temp.fact_weather")
+        self.detach(conn, aliases)
+
+    def query(self, engine, sql, start, end, params=None):
+        """Run a query over fact_weather restricted to [start, end)"""
+        with engine.connect() as conn:
+            aliases = self.create_pruned_view(conn, start, end)
+            try:
+                return pd.read_sql(text(sql), conn, params=params)
+            finally:
+                self.drop_pruned_view(conn, aliases)
+
+    # Retention
+
+    def archive(self, engine, before):
+        """Take partitions of months before `before` out of the warehouse
+
+        SQLite partition files are moved to archive_directory; PostgreSQL
+        partitions are detached and left as standalone tables. Both are
+        metadata-only operations. Returns the archived partition names.
+        """
+        cutoff = self.month_start(before)
+        archived = []
+        if engine.dialect.name == 'postgresql':
+            with engine.connect() as conn:
+                rows = conn.execute(text("""
+                    SELECT child.relname FROM pg_inherits
+                    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                    WHERE parent.relname = 'fact_weather'
+                """)).fetchall()
+                for (name,) in rows:
+                    match = re.match(r'^fact_weather_(\d{4})_(\d{2})$', name)
+                    if match and pd.Timestamp(int(match.group(1)), int(match.group(2)), 1) < cutoff:
+                        conn.execute(text(f"ALTER TABLE fact_weather DETACH PARTITION {name}"))
+                        archived.append(name)
+                if archived:
+                    bump_load_version(conn)
+                conn.commit()
+        else:
+            if not os.path.isdir(self.directory):
+                return archived
+            for filename in sorted(os.listdir(self.directory)):
+                match = PARTITION_FILE.match(filename)
+                if match and pd.Timestamp(int(match.group(1)), int(match.group(2)), 1) < cutoff:
+                    os.makedirs(self.archive_directory, exist_ok=True)
+                    os.replace(os.path.join(self.directory, filename), os.path.join(self.archive_directory, filename))
+                    archived.append(filename[:-3])
+            if archived:
+                # Cached results may include the archived months
+                with engine.connect() as conn:
+                    bump_load_version(conn)
+                    conn.commit()
+        logger.info(f"Archived {len(archived)} fact_weather partitions before {cutoff:%Y-%m}")
+        return archived
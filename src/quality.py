@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from utils import setup_logging
+
+logger = setup_logging()
+
+class DataQualityChecker:
+    """Declarative data-quality rules compiled into vectorized row masks
+
+    Rules come from one section of quality config, e.g.
+
+        range: {humidity: [0, 100]}
+        not_null: [city, timestamp]
+        allowed: {country: [GB, US]}
+        unique: [[city, country, timestamp]]
+
+    Each rule compiles to a function returning a boolean "fails" mask for
+    a whole frame, so checking a batch is a handful of numpy operations
+    regardless of its size. Nulls only fail not_null rules; unique keeps
+    the first row of each key.
+    """
+
+    def __init__(self, rules):
+        self.rules = self.compile(rules or {})
+
+    def compile(self, rules):
+        """Turn a rule config section into a list of (name, mask function)"""
+        compiled = []
+        for column, bounds in (rules.get('range') or {}).items():
+            low, high = bounds
+            compiled.append((f"range:{column}", self._range_rule(column, low, high)))
+        for column in rules.get('not_null') or []:
+            compiled.append((f"not_null:{column}", self._not_null_rule(column)))
+        for column, values in (rules.get('allowed') or {}).items():
+            compiled.append((f"allowed:{column}", self._allowed_rule(column, values)))
+        for columns in rules.get('unique') or []:
+            columns = [columns] if isinstance(columns, str) else list(columns)
+            compiled.append((f"unique:{','.join(columns)}", self._unique_rule(columns)))
+        if len(compiled) > 63:
+            raise ValueError("At most 63 data-quality rules are supported")
+        return compiled
+
+    def _range_rule(self, column, low, high):
+        def fails(df):
+            values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            with np.errstate(invalid='ignore'):
+                return (values < low) | (values > high)
+        return fails
+
+    def _not_null_rule(self, column):
+        def fails(df):
+            return df[column].isna().to_numpy()
+        return fails
+
+    def _allowed_rule(self, column, values):
+        allowed = [str(value) for value in values]
+        def fails(df):
+            series = df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Check each category once, then broadcast through the codes
+                bad_category = ~np.isin(series.cat.categories.astype(str), allowed)
+                codes = series.cat.codes.to_numpy()
+                return np.where(codes >= 0, bad_category[codes], False)
+            return (series.notna() & ~series.astype(str).isin(allowed)).to_numpy()
+        return fails
+
+    def _unique_rule(self, columns):
+        def fails(df):
+            return df.duplicated(subset=columns, keep='first').to_numpy()
+        return fails
+
+    def validate(self, df):
+        """Split df into (valid rows, quarantined rows, per-rule failure counts)
+
+        Quarantined rows carry a failed_rules column listing every rule
+        they broke, separated by ';'.
+        """
+        counts = {name: 0 for name, _ in self.rules}
+        if df.empty or not self.rules:
+            return df, df.iloc[0:0], counts
+
+        # One bit per rule, so each row's failures are a single integer
+        failed_bits = np.zeros(len(df), dtype=np.uint64)
+        for bit, (name, fails) in enumerate(self.rules):
+            try:
+                mask = np.asarray(fails(df), dtype=bool)
+            except KeyError as e:
+                logger.warning(f"Skipping data-quality rule {name}: missing column {e}")
+                continue
+            counts[name] = int(mask.sum())
+            failed_bits |= mask.astype(np.uint64) << np.uint64(bit)
+
+        failing = failed_bits != 0
+        valid = df[~failing]
+        quarantined = df[failing].copy()
+        if len(quarantined):
+            names = {}
+            for bits in np.unique(failed_bits[failing]):
+                names[bits] = ';'.join(name for bit, (name, _) in enumerate(self.rules) if int(bits) >> bit & 1)
+            quarantined['failed_rules'] = pd.Series(failed_bits[failing]).map(names).to_numpy()
+            logger.warning(f"Quarantined {len(quarantined)} of {len(df)} rows: "
+                           + ", ".join(f"{name}={count}" for name, count in counts.items() if count))
+        return valid, quarantined, counts
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+import pandas as pd
+from sqlalchemy import text
+from utils import setup_logging
+
+logger = setup_logging()
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+LOAD_VERSION_KEY = 'load_version'
+
+# A quoted literal, or a run of whitespace and comments
+SQL_TOKENS = re.compile(r"('(?:[^']|'')*')|((?:\s|--[^\n]*|/\*.*?\*/)+)", re.S)
+
+def normalize_sql(sql):
+    """Canonical form of a statement: comments dropped, whitespace collapsed
+
+    String literals and case are left exactly as written.
+    """
+    sql = SQL_TOKENS.sub(lambda match: match.group(1) or ' ', sql)
+    return sql.strip().rstrip(';').strip()
+
+def bump_load_version(conn):
+    """Advance the warehouse load version; call inside the load transaction"""
+    conn.execute(text("""
+        INSERT INTO warehouse_meta (meta_key, meta_value) VALUES (:key, 1)
+        ON CONFLICT (meta_key) DO UPDATE SET meta_value = warehouse_meta.meta_value + 1
+    """), {'key': LOAD_VERSION_KEY})
+
+def read_sql(conn, sql, params=None):
+    return pd.read_sql(text(sql), conn, params=params)
+
+class QueryRunner:
+    """Warehouse reads with a result cache invalidated by warehouse loads
+
+    Results are cached under the normalized SQL plus its parameters and
+    tagged with the warehouse load version they were read at. Every commit
+    that changes warehouse data (loads, partition archives, Parquet
+    exports) bumps that version, so a cached result is served only while
+    nothing has changed since; checking costs one primary-key lookup. The
+    cache is an LRU bounded by the results' in-memory size.
+    """
+
+    def __init__(self, engine, max_bytes=64 * 1024 * 1024):
+        self.engine = engine
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def cache_key(self, sql, params=None, as_arrow=False, namespace=None):
+        payload = json.dumps([normalize_sql(sql), params or {}, as_arrow, namespace], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def load_version(self, conn):
+        """Current warehouse load version, or None if it cannot be read"""
+        try:
+            row = conn.execute(
+                text("SELECT meta_value FROM warehouse_meta WHERE meta_key = :key"), {'key': LOAD_VERSION_KEY}
+            ).first()
+            return row[0] if row else 0
+        except Exception as e:
+            logger.warning(f"Query cache disabled, cannot read load version: {e}")
+            conn.rollback()
+            return None
+
+    def run(self, sql, params=None, as_arrow=False, read=None, namespace=None):
+        """Run a query, returning a DataFrame (or an Arrow table) from cache when valid
+
+        read(conn, sql, params) runs the query in place of pd.read_sql on
+        the warehouse connection, e.g. on another engine; its results are
+        cached under namespace so engines do not share entries.
+        """
+        if as_arrow and pa is None:
+            raise ImportError("pyarrow is required for Arrow query results")
+        key = self.cache_key(sql, params, as_arrow, namespace)
+
+        with self.engine.connect() as conn:
+            version = self.load_version(conn)
+            with self._lock:
+                entry = self.entries.get(key)
+                if entry is not None and version is not None and entry[0] == version:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return self._share(entry[1])
+                if entry is not None:
+                    self._drop(key)
+                    self.invalidations += 1
+                self.misses += 1
+
+            result = (read or read_sql)(conn, normalize_sql(sql), params)
+
+        if as_arrow:
+            result = pa.Table.from_pandas(result, preserve_index=False)
+        if version is not None:
+            self._store(key, version, result)
+        return self._share(result)
+
+    def _share(self, result):
+        # Copy-on-write shallow copy: callers can modify it without touching the cache
+        return result if pa is not None and isinstance(result, pa.Table) else result.copy(deep=False)
+
+    def _size(self, result):
+        if pa is not None and isinstance(result, pa.Table):
+            return result.nbytes
+        return int(result.memory_usage(index=True, deep=True).sum())
+
+    def _store(self, key, version, result):
+        size = self._size(result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (version, result, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+
+    def _drop(self, key):
+        _, _, size = self.entries.pop(key)
+        self.bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Hit/miss counters and current cache size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'invalidations': self.invalidations,
+            'entries': len(self.entries),
+            'bytes': self.bytes
+        }
@@ -0,0 +1,31 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all extraction workers"""
+
+    def __init__(self, calls_per_minute, burst=None):
+        if calls_per_minute <= 0:
+            raise ValueError("calls_per_minute must be positive")
+        self.rate = calls_per_minute / 60.0
+        self.capacity = float(burst if burst else 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1):
+        """Block until the requested number of tokens is available"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
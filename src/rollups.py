@@ -0,0 +1,115 @@
+from sqlalchemy import text
+from utils import setup_logging
+
+logger = setup_logging()
+
+# Measures kept per rollup row: count, sum, min and max of each
+ROLLUP_MEASURES = ['temperature', 'humidity']
+
+def _lesser(table, col):
+    """Portable two-value MIN ignoring NULLs (SQLite's MIN(a, b) returns NULL)"""
+    return (f"CASE WHEN EXCLUDED.{col} IS NULL OR {table}.{col} <= EXCLUDED.{col} "
+            f"THEN {table}.{col} ELSE EXCLUDED.{col} END")
+
+def _greater(table, col):
+    return (f"CASE WHEN EXCLUDED.{col} IS NULL OR {table}.{col} >= EXCLUDED.{col} "
+            f"THEN {table}.{col} ELSE EXCLUDED.{col} END")
+
+class RollupMaintainer:
+    """Daily and monthly per-city rollups of fact_weather
+
+    rollup_weather_daily is updated additively from the facts a load
+    inserts, or recomputed for the days a load overwrote. The monthly
+    rollup is recomputed from the daily one for just the months a load
+    touched. Everything runs inside the loader's transaction.
+    """
+
+    def __init__(self):
+        self.rollup_columns = ['reading_count'] + [
+            f"{measure}_{stat}" for measure in ROLLUP_MEASURES for stat in ('count', 'sum', 'min', 'max')
+        ]
+
+    def _aggregates(self, alias=''):
+        """Aggregate expressions over fact rows, in rollup_columns order"""
+        prefix = f"{alias}." if alias else ''
+        expressions = ['COUNT(*)']
+        for measure in ROLLUP_MEASURES:
+            column = f"{prefix}{measure}"
+            expressions += [f"COUNT({column})", f"SUM({column})", f"MIN({column})", f"MAX({column})"]
+        return ', '.join(expressions)
+
+    def _staged_days(self, in_bounds, alias):
+        """Predicate: alias's (city_id, date_id) appears among the staged facts"""
+        return (f"EXISTS (SELECT 1 FROM staging_fact_weather s WHERE {in_bounds} "
+                f"AND s.city_id = {alias}.city_id AND s.date_id = {alias}.date_id)")
+
+    def add(self, conn, new_rows, params=None):
+        """Fold a batch of new fact rows (a SELECT over fact columns) into the daily rollup"""
+        table = 'rollup_weather_daily'
+        updates = ['reading_count = rollup_weather_daily.reading_count + EXCLUDED.reading_count']
+        for measure in ROLLUP_MEASURES:
+            updates += [
+                f"{measure}_count = {table}.{measure}_count + EXCLUDED.{measure}_count",
+                f"{measure}_sum = COALESCE({table}.{measure}_sum, 0) + COALESCE(EXCLUDED.{measure}_sum, 0)",
+                f"{measure}_min = {_lesser(table, measure + '_min')}",
+                f"{measure}_max = {_greater(table, measure + '_max')}"
+            ]
+        conn.execute(text(f"""
+            INSERT INTO {table} (city_id, date_id, {', '.join(self.rollup_columns)})
+            SELECT n.city_id, n.date_id, {self._aggregates('n')}
+            FROM ({new_rows}) n
+            GROUP BY n.city_id, n.date_id
+            ON CONFLICT (city_id, date_id) DO UPDATE SET {', '.join(updates)}
+        """), params or {})
+
+    def refresh_days(self, conn, source, in_bounds, params=None):
+        """Recompute the daily rollup of every staged (city, day) from source facts"""
+        conn.execute(text(f"""
+            DELETE FROM rollup_weather_daily
+            WHERE {self._staged_days(in_bounds, 'rollup_weather_daily')}
+        """), params or {})
+        conn.execute(text(f"""
+            INSERT INTO rollup_weather_daily (city_id, date_id, {', '.join(self.rollup_columns)})
+            SELECT f.city_id, f.date_id, {self._aggregates('f')}
+            FROM {source} f
+            WHERE {self._staged_days(in_bounds, 'f')}
+            GROUP BY f.city_id, f.date_id
+        """), params or {})
+
+    def refresh_months(self, conn, in_bounds, params=None):
+        """Recompute the monthly rollup of every staged (city, month) from the daily rollup"""
+        staged_months = (f"EXISTS (SELECT 1 FROM staging_fact_weather s WHERE {in_bounds} "
+                         f"AND s.city_id = {{alias}}.city_id AND s.date_id / 100 = {{month_key}})")
+        conn.execute(text(f"""
+            DELETE FROM rollup_weather_monthly
+            WHERE {staged_months.format(alias='rollup_weather_monthly',
+                                        month_key='rollup_weather_monthly.year * 100 + rollup_weather_monthly.month')}
+        """), params or {})
+        self._insert_months(conn, staged_months.format(alias='d', month_key='d.date_id / 100'), params)
+
+    def _insert_months(self, conn, where, params=None):
+        sums = ['SUM(d.reading_count)']
+        for measure in ROLLUP_MEASURES:
+            sums += [f"SUM(d.{measure}_count)", f"SUM(d.{measure}_sum)",
+                     f"MIN(d.{measure}_min)", f"MAX(d.{measure}_max)"]
+        conn.execute(text(f"""
+            INSERT INTO rollup_weather_monthly (city_id, year, month, {', '.join(self.rollup_columns)})
+            SELECT d.city_id, d.date_id / 10000, d.date_id / 100 % 100, {', '.join(sums)}
+            FROM rollup_weather_daily d
+            WHERE {where}
+            GROUP BY d.city_id, d.date_id / 10000, d.date_id / 100 % 100
+        """), params or {})
+
+    def rebuild(self, conn, source='fact_weather'):
+        """Rebuild both rollups from scratch from source facts"""
+        conn.execute(text("DELETE FROM rollup_weather_daily"))
+        conn.execute(text("DELETE FROM rollup_weather_monthly"))
+        conn.execute(text(f"""
+            INSERT INTO rollup_weather_daily (city_id, date_id, {', '.join(self.rollup_columns)})
+            SELECT f.city_id, f.date_id, {self._aggregates('f')}
+            FROM {source} f
+            WHERE f.city_id IS NOT NULL AND f.date_id IS NOT NULL
+            GROUP BY f.city_id, f.date_id
+        """))
+        self._insert_months(conn, 'true')
+        logger.info("Rebuilt daily and monthly weather rollups")
@@ -0,0 +1,205 @@
+import json
+import os
+from collections import deque
+import numpy as np
+import pandas as pd
+from utils import setup_logging
+from transform import WEATHER_TEXT_COLUMNS, WEATHER_NUMERIC_DTYPES, normalize_categorical, downcast, date_key, \
+    drop_missing_timestamps
+
+logger = setup_logging()
+
+NATURAL_KEY = ['city', 'country', 'timestamp']
+
+class RunningStats:
+    """Mergeable count/mean/M2 accumulator (Welford, Chan et al. merge)"""
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def merge(self, count, mean, m2):
+        """Fold in another accumulator's (count, mean, M2)"""
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['count'], data['mean'], data['m2'])
+
+class BoundedSeenSet:
+    """Most recent natural-key hashes, bounded to a fixed capacity"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.blocks = deque()
+        self.size = 0
+
+    def contains(self, hashes):
+        if not self.blocks:
+            return np.zeros(len(hashes), dtype=bool)
+        return np.isin(hashes, np.concatenate(self.blocks))
+
+    def add(self, hashes):
+        if len(hashes) == 0:
+            return
+        self.blocks.append(hashes)
+        self.size += len(hashes)
+        # Evict whole blocks, oldest first, once over capacity
+        while self.size > self.capacity and len(self.blocks) > 1:
+            self.size -= len(self.blocks.popleft())
+
+class StreamingWeatherCleaner:
+    """Chunk-aware weather cleaning with persisted per-city running statistics
+
+    Missing measurements are imputed from the per-city running means as they
+    stood at the start of the run (falling back to the all-city mean), and
+    the run's observations are folded into the statistics only on commit().
+    Duplicates are dropped by hashing the natural key (city, country,
+    timestamp) against a bounded seen-set. Together this makes the output
+    independent of chunk boundaries, as long as duplicates fall within
+    seen_capacity rows of each other. On a cold start, with no statistics
+    saved for a column, its gaps are filled with the chunk's own mean as
+    the batch cleaner does, and that first run depends on chunk boundaries.
+    """
+
+    def __init__(self, state_path='state/weather_stats.json', seen_capacity=1_000_000):
+        self.state_path = state_path
+        self.stats = self._load_state()
+        self.pending = {}
+        self.seen = BoundedSeenSet(seen_capacity)
+        self.extraction_time = pd.Timestamp.now()
+        self.fill_values = self._snapshot_means()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r') as file:
+                state = json.load(file)
+            return {
+                key: {col: RunningStats.from_dict(data) for col, data in columns.items()}
+                for key, columns in state.items()
+            }
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable running statistics {self.state_path}: {e}")
+            return {}
+
+    def _snapshot_means(self):
+        """Frozen per-city and all-city means used for imputation this run"""
+        per_city = {}
+        overall = {}
+        for key, columns in self.stats.items():
+            for col, stats in columns.items():
+                per_city.setdefault(col, {})[key] = stats.mean
+                overall.setdefault(col, RunningStats()).merge(stats.count, stats.mean, stats.m2)
+        return {
+            'city': {col: pd.Series(means, dtype='float64') for col, means in per_city.items()},
+            'all': {col: stats.mean for col, stats in overall.items()}
+        }
+
+    def clean(self, chunks, validate=None):
+        """Clean an iterable of weather frames, yielding one frame per chunk"""
+        total = 0
+        for chunk in chunks:
+            df = self.clean_chunk(chunk, validate)
+            total += len(df)
+            if not df.empty:
+                yield df
+        logger.info(f"Successfully cleaned {total} weather records (streaming)")
+
+    def clean_chunk(self, df, validate=None):
+        """Clean one chunk of weather data
+
+        validate, if given, filters the deduplicated rows before they are
+        folded into the running statistics or have gaps imputed.
+        """
+        if df.empty:
+            return df
+        df = df.copy(deep=False)
+
+        # Normalize text once per category so the natural key is canonical
+        for col, normalizer in WEATHER_TEXT_COLUMNS.items():
+            if col in df.columns:
+                df[col] = normalize_categorical(df[col], normalizer)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+
+        # Hash-based dedup on the natural key, within and across chunks
+        hashes = pd.util.hash_pandas_object(df[NATURAL_KEY], index=False).to_numpy()
+        keep = ~pd.Series(hashes).duplicated().to_numpy() & ~self.seen.contains(hashes)
+        df = df[keep].copy()
+        self.seen.add(hashes[keep])
+        if validate is not None:
+            df = validate(df).copy()
+        df = drop_missing_timestamps(df)
+
+        keys = df['city'].astype(str) + ',' + df['country'].astype(str)
+        for col, dtype in WEATHER_NUMERIC_DTYPES.items():
+            if col not in df.columns:
+                continue
+            values = pd.to_numeric(df[col], errors='coerce').astype('float64')
+            self._accumulate(keys, col, values)
+
+            missing = values.isna()
+            if missing.any():
+                city_means = self.fill_values['city'].get(col, pd.Series(dtype='float64'))
+                fill = keys[missing].map(city_means).astype('float64')
+                fill = fill.fillna(self.fill_values['all'].get(col, np.nan))
+                # Cold start: nothing persisted for this column yet, so use the chunk's own mean
+                fill = fill.fillna(values.mean())
+                values = values.copy()
+                values[missing] = fill
+            df[col] = downcast(values, dtype)
+
+        df['date_id'] = date_key(df['timestamp'])
+        df['extraction_time'] = self.extraction_time
+        return df
+
+    def _accumulate(self, keys, col, values):
+        """Fold observed values into this run's pending statistics"""
+        observed = values.notna()
+        if not observed.any():
+            return
+        grouped = values[observed].groupby(keys[observed])
+        summary = pd.DataFrame({
+            'count': grouped.count(),
+            'mean': grouped.mean(),
+            'm2': grouped.var(ddof=0) * grouped.count()
+        })
+        for key, row in summary.iterrows():
+            stats = self.pending.setdefault(key, {}).setdefault(col, RunningStats())
+            stats.merge(int(row['count']), float(row['mean']), float(row['m2']))
+
+    def commit(self):
+        """Merge this run's statistics into the persisted state"""
+        for key, columns in self.pending.items():
+            for col, stats in columns.items():
+                self.stats.setdefault(key, {}).setdefault(col, RunningStats()).merge(
+                    stats.count, stats.mean, stats.m2
+                )
+        self.pending = {}
+
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump({
+                key: {col: stats.to_dict() for col, stats in columns.items()}
+                for key, columns in self.stats.items()
+            }, file, indent=2)
+        os.replace(tmp_path, self.state_path)
+        logger.info(f"Saved running statistics for {len(self.stats)} cities")
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+from utils import setup_logging
+
+logger = setup_logging()
+
+WEATHER_DESCRIPTIONS = ['clear sky', 'few clouds', 'scattered clouds', 'broken clouds',
+                        'overcast clouds', 'light rain', 'moderate rain', 'mist', 'snow']
+DESCRIPTION_WEIGHTS = [0.25, 0.15, 0.15, 0.12, 0.1, 0.12, 0.05, 0.04, 0.02]
+COUNTRIES = ['GB', 'US', 'JP', 'AU', 'DE', 'FR', 'IN', 'BR', 'CA', 'ZA']
+NUMERIC_COLUMNS = ['temperature', 'humidity', 'pressure', 'wind_speed']
+
+# Independent random streams so every chunk is reproducible on its own
+CITY_STREAM = 0
+CHUNK_STREAM = 1
+POPULATION_STREAM = 2
+
+class SyntheticDataGenerator:
+    """Seeded, vectorized generator of weather histories and population tables"""
+
+    def __init__(self, seed=42, cities=None):
+        self.seed = seed
+        self.fixed_cities = cities
+
+    def _rng(self, *stream):
+        return np.random.default_rng([self.seed, *stream])
+
+    def cities(self, n_cities):
+        """City list with per-city climate parameters"""
+        rng = self._rng(CITY_STREAM)
+        if self.fixed_cities:
+            names = [c['city'] for c in self.fixed_cities[:n_cities]]
+            countries = [c['country'] for c in self.fixed_cities[:n_cities]]
+            n_cities = len(names)
+        else:
+            names = [f"City {i:06d}" for i in range(n_cities)]
+            countries = rng.choice(COUNTRIES, size=n_cities).tolist()
+
+        return pd.DataFrame({
+            'city': names,
+            'country': countries,
+            'mean_temperature': rng.normal(14, 7, n_cities),
+            'seasonal_amplitude': rng.uniform(2, 14, n_cities) * rng.choice([-1, 1], n_cities, p=[0.2, 0.8]),
+            'mean_pressure': rng.normal(1013, 4, n_cities),
+            'humidity_bias': rng.uniform(-1, 1, n_cities)
+        })
+
+    def weather_history(self, n_cities=100, start='2024-01-01', periods=144, freq='10min',
+                        duplicate_ratio=0.0, null_ratio=0.0, stream=0):
+        """Generate a full weather history as a single DataFrame"""
+        frames = list(self.iter_weather_chunks(
+            n_cities=n_cities, start=start, periods=periods, freq=freq,
+            duplicate_ratio=duplicate_ratio, null_ratio=null_ratio, chunk_rows=None, stream=stream
+        ))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def iter_weather_chunks(self, n_cities=100, start='2024-01-01', periods=144, freq='10min',
+                            duplicate_ratio=0.0, null_ratio=0.0, chunk_rows=1_000_000, stream=0):
+        """Yield weather observations (cities x timestamps) in chunks
+
+        Each chunk covers a block of timestamps for every city and draws from
+        its own seeded stream, so output is identical for a given seed and
+        chunk_rows. duplicate_ratio appends exact copies of sampled rows and
+        null_ratio blanks that share of numeric cells. stream selects an
+        independent noise sequence while keeping per-city climates fixed.
+        """
+        cities = self.cities(n_cities)
+        n_cities = len(cities)
+        timestamps = pd.date_range(start=start, periods=periods, freq=freq)
+        step = periods if not chunk_rows else max(1, chunk_rows // max(n_cities, 1))
+
+        city_cat = pd.Categorical(cities['city'])
+        country_cat = pd.Categorical(cities['country'])
+
+        for chunk_index, offset in enumerate(range(0, periods, step)):
+            rng = self._rng(CHUNK_STREAM, stream, chunk_index)
+            block = timestamps[offset:offset + step]
+            n_rows = len(block) * n_cities
+
+            # Timestamp-major layout: every city for the first timestamp, then the next
+            city_idx = np.tile(np.arange(n_cities), len(block))
+            ts = np.repeat(block.values, n_cities)
+
+            day_of_year = np.repeat(block.dayofyear.values, n_cities)
+            hour = np.repeat(block.hour.values + block.minute.values / 60.0, n_cities)
+            seasonal = np.cos(2 * np.pi * (day_of_year - 200) / 365.25)
+            diurnal = np.cos(2 * np.pi * (hour - 15) / 24)
+
+            temperature = (cities['mean_temperature'].values[city_idx]
+                           + cities['seasonal_amplitude'].values[city_idx] * seasonal
+                           + 4 * diurnal
+                           + rng.normal(0, 1.5, n_rows))
+            humidity = np.clip(
+                100 * rng.beta(5, 3, n_rows) + 15 * cities['humidity_bias'].values[city_idx] - 8 * diurnal,
+                5, 100
+            )
+            pressure = cities['mean_pressure'].values[city_idx] + rng.normal(0, 6, n_rows)
+            wind_speed = rng.gamma(2.0, 1.8, n_rows)
+            description_codes = rng.choice(len(WEATHER_DESCRIPTIONS), size=n_rows, p=DESCRIPTION_WEIGHTS)
+
+            df = pd.DataFrame({
+                'city': pd.Categorical.from_codes(city_cat.codes[city_idx], categories=city_cat.categories),
+                'country': pd.Categorical.from_codes(country_cat.codes[city_idx], categories=country_cat.categories),
+                'timestamp': ts,
+                'temperature': np.round(temperature, 2),
+                'humidity': np.round(humidity),
+                'pressure': np.round(pressure),
+                'wind_speed': np.round(wind_speed, 2),
+                'weather_description': pd.Categorical.from_codes(description_codes, categories=WEATHER_DESCRIPTIONS)
+            })
+
+            if null_ratio > 0:
+                for col in NUMERIC_COLUMNS:
+                    df.loc[rng.random(n_rows) < null_ratio, col] = np.nan
+
+            if duplicate_ratio > 0:
+                n_dupes = int(round(n_rows * duplicate_ratio))
+                dupes = df.iloc[rng.integers(0, n_rows, n_dupes)]
+                df = pd.concat([df, dupes], ignore_index=True)
+
+            yield df
+
+    def population_table(self, n_cities=100, years=(2020, 2021, 2022, 2023)):
+        """Population table in the raw source layout (City, Country, Population, Year)"""
+        rng = self._rng(POPULATION_STREAM)
+        cities = self.cities(n_cities)
+        n_cities = len(cities)
+
+        base = np.round(rng.lognormal(mean=13, sigma=1.2, size=n_cities))
+        growth = rng.normal(0.01, 0.01, n_cities)
+        offsets = np.arange(len(years)) - (len(years) - 1)
+
+        return pd.DataFrame({
+            'City': np.repeat(cities['city'].values, len(years)),
+            'Country': np.repeat(cities['country'].values, len(years)),
+            'Population': np.round(np.repeat(base, len(years))
+                                   * (1 + np.repeat(growth, len(years))) ** np.tile(offsets, n_cities)).astype('int64'),
+            'Year': np.tile(np.asarray(years, dtype='int64'), n_cities)
+        })
+
+    def write_weather_parquet(self, path, chunk_rows=1_000_000, compression='snappy', **kwargs):
+        """Stream a generated weather history into one Parquet file"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("pyarrow is required to write Parquet output")
+
+        writer = None
+        rows = 0
+        try:
+            for df in self.iter_weather_chunks(chunk_rows=chunk_rows, **kwargs):
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema, compression=compression)
+                writer.write_table(table)
+                rows += len(df)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        logger.info(f"Wrote {rows} synthetic weather rows to {path}")
+        return rows
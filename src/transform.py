@@ -1,39 +1,107 @@
+import numpy as np
 import pandas as pd
 from utils import setup_logging
 
 logger = setup_logging()
 
+# Source column -> warehouse column for population files
+POPULATION_COLUMNS = {
+    'City': 'city',
+    'Country': 'country',
+    'Population': 'population',
+    'Year': 'year'
+}
+
+# Explicit dtypes for chunked population reads (skips per-chunk inference).
+# Population is read as text and coerced per chunk, so a malformed cell
+# drops its row instead of failing the whole stream.
+POPULATION_DTYPES = {
+    'City': 'string',
+    'Country': 'string',
+    'Population': 'string',
+    'Year': 'Int16'
+}
+
+# Low-cardinality weather text columns and their per-category normalizer
+WEATHER_TEXT_COLUMNS = {
+    'weather_description': lambda s: s.str.lower().str.strip(),
+    'city': lambda s: s.str.title().str.strip(),
+    'country': lambda s: s.str.upper().str.strip()
+}
+
+# Compact dtypes for weather measurements; integers fall back to float32
+# when values are missing or out of range
+WEATHER_NUMERIC_DTYPES = {
+    'temperature': 'float32',
+    'humidity': 'int16',
+    'pressure': 'int16',
+    'wind_speed': 'float32'
+}
+
+def normalize_categorical(series, normalizer):
+    """Convert to categorical and normalize each distinct value once
+
+    Categories that normalize to the same value are merged, so the
+    result has one category per normalized value.
+    """
+    series = series.astype('category')
+    categories = pd.Series(series.cat.categories.astype(object), dtype=object)
+    normalized = pd.Index(normalizer(categories.astype(str)))
+    
+    new_categories = normalized.unique()
+    remap = new_categories.get_indexer(normalized)
+    codes = series.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, remap[codes], -1)
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes, categories=new_categories),
+        index=series.index,
+        name=series.name
+    )
+
+def downcast(series, dtype):
+    """Downcast a numeric series, keeping float32 if an integer cast would lose data"""
+    if np.issubdtype(np.dtype(dtype), np.integer):
+        info = np.iinfo(dtype)
+        rounded = series.round()
+        if series.notna().all() and (rounded.empty or (rounded.min() >= info.min and rounded.max() <= info.max)):
+            return rounded.astype(dtype)
+        return series.astype('float32')
+    return series.astype(dtype)
+
+def date_key(timestamps):
+    """Deterministic YYYYMMDD integer key for dim_date, computed vectorized"""
+    timestamps = pd.to_datetime(timestamps)
+    return (timestamps.dt.year * 10000 + timestamps.dt.month * 100 + timestamps.dt.day).astype('int32')
+
+def drop_missing_timestamps(df):
+    """Drop rows whose timestamp is missing or unparseable, which have no date key"""
+    if 'timestamp' not in df.columns:
+        return df
+    missing = pd.to_datetime(df['timestamp'], errors='coerce').isna()
+    if missing.any():
+        logger.warning(f"Dropping {int(missing.sum())} weather records without a valid timestamp")
+        df = df[~missing.values]
+    return df
+
 class DataTransformer:
     def __init__(self):
         self.logger = logger
     
-    def clean_weather_data(self, df):
-        """Clean and transform weather data"""
+    def clean_weather_data(self, df, validate=None):
+        """Clean and transform weather data
+
+        validate, if given, filters the normalized rows before missing
+        values are imputed, so rows it rejects do not skew the batch means.
+        """
         try:
             if df.empty:
                 self.logger.warning("No weather data to clean")
                 return df
             
-            # Remove duplicates
-            df = df.drop_duplicates()
-            
-            # Handle missing values
-            numeric_columns = ['temperature', 'humidity', 'pressure', 'wind_speed']
-            for col in numeric_columns:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                    df[col] = df[col].fillna(df[col].mean())
-            
-            # Standardize text data
-            if 'weather_description' in df.columns:
-                df['weather_description'] = df['weather_description'].str.lower().str.strip()
-            if 'city' in df.columns:
-                df['city'] = df['city'].str.title().str.strip()
-            if 'country' in df.columns:
-                df['country'] = df['country'].str.upper().str.strip()
-            
-            # Add extraction timestamp
-            df['extraction_time'] = pd.Timestamp.now()
+            df = self._prepare_weather_frame(df)
+            if validate is not None:
+                df = validate(df)
+            df = self._finish_weather_frame(df, pd.Timestamp.now())
             
             self.logger.info(f"Successfully cleaned {len(df)} weather records")
             return df
@@ -42,6 +110,50 @@ class DataTransformer:
             self.logger.error(f"Error cleaning weather data: {e}")
             return pd.DataFrame()
     
+    def _prepare_weather_frame(self, df):
+        """Categorize, dedup, coerce and normalize one weather frame
+
+        Every step here is row- or group-local, so it gives the same rows
+        whether run on a whole batch or on (country, city) partitions of it.
+        """
+        # Low-cardinality text becomes categorical before anything else,
+        # on a copy so the caller's frame is left as it was
+        df = df.astype({col: 'category' for col in WEATHER_TEXT_COLUMNS if col in df.columns})
+        
+        # Remove duplicates
+        df = df.drop_duplicates()
+        
+        for col in WEATHER_NUMERIC_DTYPES:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        
+        # Standardize text data once per distinct value
+        for col, normalizer in WEATHER_TEXT_COLUMNS.items():
+            if col in df.columns:
+                df[col] = normalize_categorical(df[col], normalizer)
+        return df
+    
+    def _finish_weather_frame(self, df, extraction_time):
+        """Impute, downcast and key a prepared weather frame
+
+        Missing values are filled with batch means, so this step must see
+        the whole batch.
+        """
+        df = drop_missing_timestamps(df)
+        
+        # Handle missing values
+        for col, dtype in WEATHER_NUMERIC_DTYPES.items():
+            if col in df.columns:
+                df[col] = downcast(df[col].fillna(df[col].mean()), dtype)
+        
+        # Smart date key so facts need no dim_date lookup
+        if 'timestamp' in df.columns:
+            df['date_id'] = date_key(df['timestamp'])
+        
+        # Add extraction timestamp
+        df['extraction_time'] = extraction_time
+        return df
+    
     def clean_population_data(self, df):
         """Clean and transform population data"""
         try:
@@ -49,38 +161,13 @@ class DataTransformer:
                 self.logger.warning("No population data to clean")
                 return df
             
-            # Rename columns for consistency
-            column_mapping = {
-                'City': 'city',
-                'Country': 'country', 
-                'Population': 'population',
-                'Year': 'year'
-            }
-            
-            # Apply renaming for columns that exist
-            for old_col, new_col in column_mapping.items():
-                if old_col in df.columns:
-                    df = df.rename(columns={old_col: new_col})
-            
-            # Handle missing values
-            if 'population' in df.columns:
-                df['population'] = pd.to_numeric(df['population'], errors='coerce')
-                df = df.dropna(subset=['population'])
-            
-            # Standardize text data
-            if 'city' in df.columns:
-                df['city'] = df['city'].str.title().str.strip()
-            if 'country' in df.columns:
-                df['country'] = df['country'].str.upper().str.strip()
+            df = self._clean_population_frame(df, pd.Timestamp.now())
             
             # Filter for latest year data if year column exists
             if 'year' in df.columns and not df.empty:
                 latest_year = df['year'].max()
                 df = df[df['year'] == latest_year]
             
-            # Add extraction timestamp
-            df['extraction_time'] = pd.Timestamp.now()
-            
             self.logger.info(f"Successfully cleaned {len(df)} population records")
             return df
             
@@ -88,13 +175,52 @@ class DataTransformer:
             self.logger.error(f"Error cleaning population data: {e}")
             return pd.DataFrame()
     
+    def clean_population_chunks(self, chunks, latest_year=None):
+        """Clean population chunks lazily, yielding one cleaned frame per chunk
+
+        latest_year must be computed up front (see
+        DataExtractor.extract_population_chunks) so the filter does not
+        depend on chunk boundaries.
+        """
+        extraction_time = pd.Timestamp.now()
+        total = 0
+        for chunk in chunks:
+            df = self._clean_population_frame(chunk, extraction_time)
+            if latest_year is not None and 'year' in df.columns:
+                df = df[df['year'] == latest_year]
+            if df.empty:
+                continue
+            total += len(df)
+            yield df
+        self.logger.info(f"Successfully cleaned {total} population records")
+    
+    def _clean_population_frame(self, df, extraction_time):
+        """Rename, coerce and standardize one population frame"""
+        # Rename columns for consistency in a single pass
+        df = df.rename(columns=POPULATION_COLUMNS)
+        
+        # Handle missing values
+        if 'population' in df.columns:
+            df['population'] = pd.to_numeric(df['population'], errors='coerce')
+            df = df.dropna(subset=['population'])
+        
+        # Standardize text data
+        if 'city' in df.columns:
+            df['city'] = df['city'].str.title().str.strip()
+        if 'country' in df.columns:
+            df['country'] = df['country'].str.upper().str.strip()
+        
+        # Add extraction timestamp
+        df['extraction_time'] = extraction_time
+        return df
+    
     def create_dim_date(self, start_date='2020-01-01', end_date='2025-12-31'):
         """Create date dimension table"""
         try:
             date_range = pd.date_range(start=start_date, end=end_date, freq='D')
             dim_date = pd.DataFrame({'full_date': date_range})
             
-            dim_date['date_id'] = dim_date.index + 1
+            dim_date['date_id'] = date_key(dim_date['full_date'])
             dim_date['year'] = dim_date['full_date'].dt.year
             dim_date['month'] = dim_date['full_date'].dt.month
             dim_date['day'] = dim_date['full_date'].dt.day
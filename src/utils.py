@@ -1,12 +1,52 @@
 import logging
 import yaml
 import os
-from sqlalchemy import create_engine
+import re
+import threading
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import URL
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Tuning applied to every pooled SQLite connection; database.sqlite_pragmas
+# overrides single entries and a null value leaves SQLite's own default
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',      # readers and the writer no longer block each other
+    'synchronous': 'NORMAL',    # in WAL mode only checkpoints fsync
+    'cache_size': -65536,       # negative values are KiB: 64 MiB of page cache
+    'mmap_size': 268435456,     # read pages through a 256 MiB memory map
+    'temp_store': 'MEMORY',     # sorts and temp indexes stay off disk
+    'busy_timeout': 5000        # wait up to 5s for a lock instead of failing
+}
+
+# A transaction across ATTACHed databases commits atomically as a set only
+# with a rollback journal, not in WAL mode, so a partitioned SQLite
+# warehouse (partitioning.enabled) defaults to these instead
+PARTITIONED_SQLITE_PRAGMAS = {
+    'journal_mode': 'DELETE',   # multi-file commits go through a super-journal
+    'synchronous': 'FULL'       # NORMAL is not crash-safe with a rollback journal
+}
+
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+
+# Connection pool settings; database.pool overrides single entries
+POOL_SETTINGS = {
+    'pool_size': 5,                 # connections kept open
+    'max_overflow': 10,             # extra connections allowed under load
+    'pool_timeout': 30,             # seconds to wait for a free connection
+    'pool_pre_ping': True,          # test connections on checkout, replacing dead ones
+    'pool_recycle': 1800,           # reopen connections older than this (seconds)
+    'statement_cache_size': 500     # compiled statements cached per engine
+}
+
+DRIVERS = {'sqlite': 'sqlite', 'postgresql': 'postgresql+psycopg2'}
+
+# One engine per process and database, shared by every DataLoader and query path
+_engines = {}
+_engines_lock = threading.Lock()
+
 def setup_logging():
     """Setup logging configuration"""
     # Create logs directory if it doesn't exist
@@ -43,33 +83,123 @@ def load_config():
         print(f"❌ Error loading configuration: {e}")
         return None
 
+def is_partitioned(config):
+    return bool((config.get('partitioning') or {}).get('enabled', False))
+
+def sqlite_pragmas(db_config, partitioned=False):
+    """The SQLite pragmas to apply, defaults overridden by database.sqlite_pragmas"""
+    overrides = db_config.get('sqlite_pragmas') or {}
+    unknown = set(overrides) - set(SQLITE_PRAGMAS)
+    if unknown:
+        raise ValueError(f"Unsupported SQLite pragmas: {', '.join(sorted(unknown))}")
+    defaults = {**SQLITE_PRAGMAS, **PARTITIONED_SQLITE_PRAGMAS} if partitioned else SQLITE_PRAGMAS
+    pragmas = {**defaults, **overrides}
+    for name, value in pragmas.items():
+        if value is not None and not PRAGMA_VALUE.match(str(value)):
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value!r}")
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run the pragmas on every new DBAPI connection the engine's pool opens"""
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+    return engine
+
+def database_url(db_config):
+    """SQLAlchemy URL for the configured database.dialect"""
+    dialect = db_config.get('dialect', 'sqlite')
+    if dialect == 'postgres':
+        dialect = 'postgresql'
+    if dialect not in DRIVERS:
+        raise ValueError(f"Unsupported database dialect: {dialect}")
+    if dialect == 'sqlite':
+        return URL.create('sqlite', database=db_config.get('database', 'data_warehouse.db'))
+    return URL.create(
+        db_config.get('driver', DRIVERS[dialect]),
+        username=db_config.get('user') or db_config.get('username'),
+        password=db_config.get('password'),
+        host=db_config.get('host', 'localhost'),
+        port=db_config.get('port', 5432),
+        database=db_config.get('database')
+    )
+
+def pool_settings(db_config):
+    """Pool settings, defaults overridden by database.pool"""
+    overrides = db_config.get('pool') or {}
+    unknown = set(overrides) - set(POOL_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unsupported pool settings: {', '.join(sorted(unknown))}")
+    return {**POOL_SETTINGS, **overrides}
+
+def create_db_engine(config, **engine_options):
+    """Build a new engine for config's database, with pool and dialect tuning applied"""
+    db_config = config.get('database') or {}
+    url = database_url(db_config)
+    pool = pool_settings(db_config)
+    options = {
+        'pool_pre_ping': pool['pool_pre_ping'],
+        'pool_recycle': pool['pool_recycle'],
+        'query_cache_size': pool['statement_cache_size'],
+        'connect_args': dict(db_config.get('connect_args') or {})
+    }
+    # An in-memory SQLite database lives in a single connection, so it has no pool to size
+    if url.get_backend_name() != 'sqlite' or url.database not in (None, '', ':memory:'):
+        options.update(pool_size=pool['pool_size'], max_overflow=pool['max_overflow'],
+                       pool_timeout=pool['pool_timeout'])
+    if url.get_backend_name() == 'sqlite':
+        # sqlite3 keeps its own per-connection cache of prepared statements
+        options['connect_args'].setdefault('cached_statements', pool['statement_cache_size'])
+    else:
+        options['connect_args'].setdefault('connect_timeout', db_config.get('connect_timeout', 10))
+    options.update(engine_options)
+
+    engine = create_engine(url, **options)
+    if url.get_backend_name() == 'sqlite':
+        apply_sqlite_pragmas(engine, sqlite_pragmas(db_config, is_partitioned(config)))
+    print(f"🔗 Using {url.get_backend_name()} database: {url.render_as_string(hide_password=True)}")
+    return engine
+
 def get_db_connection(config):
-    """Create database connection - uses SQLite"""
-    try:
-        db_config = config['database']
-        
-        # Always use SQLite for now
-        sqlite_db = db_config['database']
-        connection_string = f"sqlite:///{sqlite_db}"
-        print(f"🔗 Using SQLite database: {sqlite_db}")
-        engine = create_engine(connection_string)
-        return engine
-            
-    except Exception as e:
-        print(f"❌ Database connection error: {e}")
-        # Ultimate fallback
-        print("🔄 Using default SQLite...")
-        connection_string = "sqlite:///data_warehouse.db"
-        engine = create_engine(connection_string)
+    """The shared engine for config's database, created on first use
+
+    Engines are kept per process, so worker processes never reuse pooled
+    connections inherited from their parent.
+    """
+    db_config = config.get('database') or {}
+    # Validated up front, so a bad setting fails here rather than on first use
+    key = (
+        os.getpid(),
+        database_url(db_config).render_as_string(hide_password=False),
+        repr(sorted(pool_settings(db_config).items())),
+        repr(sorted(sqlite_pragmas(db_config, is_partitioned(config)).items())),
+        repr(sorted((db_config.get('connect_args') or {}).items()))
+    )
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = create_db_engine(config)
         return engine
 
+def dispose_engines():
+    """Close every shared engine's pooled connections and forget the engines"""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
 def test_db_connection(config):
     """Test database connection"""
     try:
         engine = get_db_connection(config)
         if engine:
             with engine.connect() as conn:
-                result = conn.execute("SELECT 1")
+                conn.execute(text("SELECT 1"))
                 print("✅ Database connection successful!")
                 return True
         return False
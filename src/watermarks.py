@@ -0,0 +1,85 @@
+import json
+import os
+import pandas as pd
+from utils import setup_logging
+
+logger = setup_logging()
+
+class WatermarkStore:
+    """Persisted per-(city, country) high-water mark of loaded observations"""
+
+    def __init__(self, path):
+        self.path = path
+        self.marks = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as file:
+                return {key: pd.Timestamp(value) for key, value in json.load(file).items()}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable watermark file {self.path}: {e}")
+            return {}
+
+    def _key(self, city, country):
+        return f"{city},{country}"
+
+    def get(self, city, country):
+        return self.marks.get(self._key(city, country))
+
+    def cities_due(self, cities, min_refresh_seconds, now=None):
+        """Split cities into (due, skipped) by age of their last loaded observation
+
+        A city is skipped when its last observation is younger than the
+        provider's refresh interval, since no newer observation can exist.
+        """
+        if not min_refresh_seconds:
+            return list(cities), []
+        now = now or pd.Timestamp.now(tz='UTC').tz_localize(None)
+        cutoff = now - pd.Timedelta(seconds=min_refresh_seconds)
+
+        due, skipped = [], []
+        for city in cities:
+            mark = self.get(city['city'], city['country'])
+            if mark is not None and mark > cutoff:
+                skipped.append(city)
+            else:
+                due.append(city)
+        return due, skipped
+
+    def filter_new(self, df):
+        """Drop observations at or before the city's watermark; returns (df, dropped)"""
+        if df.empty or not self.marks:
+            return df, 0
+        keys = df['city'].astype(str) + ',' + df['country'].astype(str)
+        marks = pd.to_datetime(keys.map(self.marks))
+        is_new = marks.isna() | (pd.to_datetime(df['timestamp']) > marks)
+        return df[is_new.values], int((~is_new).sum())
+
+    def update(self, df):
+        """Advance watermarks to the latest loaded timestamp per city and persist
+
+        Mock fallback records (is_mock) are stamped with the current time,
+        not an observation time, so only real observations count.
+        """
+        if 'is_mock' in df.columns:
+            df = df[~df['is_mock'].fillna(False).astype(bool)]
+        if df.empty:
+            return
+        latest = df.groupby(['city', 'country'], observed=True)['timestamp'].max()
+        for (city, country), timestamp in latest.items():
+            key = self._key(city, country)
+            timestamp = pd.Timestamp(timestamp)
+            if key not in self.marks or timestamp > self.marks[key]:
+                self.marks[key] = timestamp
+        self.save()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump({key: value.isoformat() for key, value in self.marks.items()}, file, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,126 @@
+import sys
+import os
+import tempfile
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.transform import DataTransformer
+from src.load import DataLoader
+from src.export import ParquetExporter
+from src.analytics import AnalyticsRunner, read_queries
+from src.synthetic import SyntheticDataGenerator
+
+def make_config(tmp, partitioned=False, **analytics):
+    return {
+        'database': {'dialect': 'sqlite', 'database': os.path.join(tmp, 'warehouse.db')},
+        'tables': {},
+        'dim_date': {'start': '2024-01-01', 'end': '2024-03-31'},
+        'export': {'enabled': True, 'directory': os.path.join(tmp, 'parquet')},
+        'partitioning': {'enabled': partitioned, 'directory': os.path.join(tmp, 'partitions')},
+        'analytics': analytics
+    }
+
+def build_warehouse(config):
+    loader = DataLoader(config)
+    assert loader.create_tables()
+    generator = SyntheticDataGenerator(seed=5)
+    population = DataTransformer().clean_population_data(generator.population_table(n_cities=6))
+    weather = DataTransformer().clean_weather_data(
+        generator.weather_history(n_cities=6, start='2024-01-20', periods=60, freq='6h', null_ratio=0.05)
+    )
+    assert loader.load_to_staging(population, 'staging_population')
+    assert loader.load_to_staging(weather, 'staging_weather')
+    assert loader.load_to_warehouse(weather)
+    ParquetExporter(config).export(loader.engine)
+    return loader
+
+def assert_same_results(expected, actual):
+    for left, right in zip(expected, actual):
+        assert len(left) > 0
+        pd.testing.assert_frame_equal(left.reset_index(drop=True), right.reset_index(drop=True),
+                                      check_dtype=False, atol=1e-4)
+
+def test_duckdb_matches_sqlite():
+    print("🦆 Testing the DuckDB backend over the Parquet export...")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp, source='parquet')
+        loader = build_warehouse(config)
+        runner = AnalyticsRunner(config, loader.engine)
+
+        on_sqlite = runner.run_file('sql/queries.sql', backend='sqlite')
+        on_duckdb = runner.run_file('sql/queries.sql', backend='duckdb')
+        assert len(on_sqlite) == len(read_queries('sql/queries.sql')) == 4
+        assert {backend for _, backend, _ in on_sqlite} == {'sqlite'}
+        assert {backend for _, backend, _ in on_duckdb} == {'duckdb'}
+        assert_same_results([frame for frame, _, _ in on_sqlite], [frame for frame, _, _ in on_duckdb])
+
+        sql = "SELECT COUNT(*) AS n FROM fact_weather WHERE temperature > :t"
+        assert runner.run(sql, {'t': 0}, backend='duckdb')['n'][0] == runner.run(sql, {'t': 0}, backend='sqlite')['n'][0]
+
+        # Repeats are served by the query cache, per backend
+        hits = runner.cache.stats()['hits']
+        runner.run(sql, {'t': 0}, backend='duckdb')
+        runner.run(sql, {'t': 0}, backend='sqlite')
+        assert runner.cache.stats()['hits'] == hits + 2
+        runner.close()
+        loader.engine.dispose()
+    print("✅ DuckDB returns the same BI results as SQLite")
+
+def test_backend_chosen_per_query():
+    print("🔀 Testing per-query backend choice...")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp, source='parquet', min_fact_rows=100)
+        loader = build_warehouse(config)
+        runner = AnalyticsRunner(config, loader.engine)
+        aggregate, = [sql for sql in read_queries('sql/queries.sql') if 'dd.month' in sql]
+        assert runner.choose_backend(aggregate) == 'duckdb'
+        assert runner.choose_backend("SELECT city_name FROM dim_city WHERE city_id = 1") == 'sqlite'
+        runner.min_fact_rows = 10 ** 9
+        assert runner.choose_backend(aggregate) == 'sqlite'
+        runner.close()
+
+        # A source DuckDB cannot open sends queries to SQLite, with the same results
+        config = make_config(tmp, source='parquet', min_fact_rows=100)
+        config['export']['directory'] = os.path.join(tmp, 'not_exported')
+        runner = AnalyticsRunner(config, loader.engine)
+        expected = runner.run(aggregate, backend='sqlite')
+        actual = runner.run(aggregate, backend='duckdb')
+        pd.testing.assert_frame_equal(expected, actual)
+        assert runner.last_backend == 'sqlite'
+        assert runner.choose_backend(aggregate) == 'sqlite'
+        loader.engine.dispose()
+    print("✅ Aggregates on large warehouses go to DuckDB, everything else to SQLite")
+
+def test_partitioned_warehouse():
+    print("🗂️ Testing BI queries on a partitioned warehouse...")
+    with tempfile.TemporaryDirectory() as tmp:
+        # The same data in an unpartitioned warehouse gives the expected results
+        os.makedirs(os.path.join(tmp, 'plain'))
+        expected = make_config(os.path.join(tmp, 'plain'), source='parquet')
+        plain = build_warehouse(expected)
+        on_plain = AnalyticsRunner(expected, plain.engine).run_file('sql/queries.sql', backend='sqlite')
+        plain.engine.dispose()
+
+        config = make_config(tmp, partitioned=True, source='parquet', min_fact_rows=100)
+        loader = build_warehouse(config)
+        runner = AnalyticsRunner(config, loader.engine)
+        # Facts live in the month files only; fact_weather in the main file is empty
+        assert runner.estimated_fact_rows() == 6 * 60
+        on_sqlite = runner.run_file('sql/queries.sql', backend='sqlite')
+        on_duckdb = runner.run_file('sql/queries.sql', backend='duckdb')
+        assert {backend for _, backend, _ in on_duckdb} == {'duckdb'}
+        assert_same_results([frame for frame, _, _ in on_plain], [frame for frame, _, _ in on_sqlite])
+        assert_same_results([frame for frame, _, _ in on_sqlite], [frame for frame, _, _ in on_duckdb])
+
+        aggregate, = [sql for sql in read_queries('sql/queries.sql') if 'dd.month' in sql]
+        assert runner.choose_backend(aggregate) == 'duckdb'
+        runner.close()
+        loader.engine.dispose()
+    print("✅ Both backends read every monthly partition")
+
+if __name__ == "__main__":
+    test_duckdb_matches_sqlite()
+    test_backend_chosen_per_query()
+    test_partitioned_warehouse()
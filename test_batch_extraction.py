@@ -0,0 +1,102 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.extract import DataExtractor
+
+CITY_IDS = {'London,GB': 1, 'New York,US': 2, 'Tokyo,JP': 3, 'Sydney,AU': 4, 'Berlin,DE': 5}
+
+class WeatherStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the single-city and group weather endpoints"""
+    protocol_version = 'HTTP/1.1'
+    calls = []
+    # Berlin is never returned by the group endpoint to force a fallback
+    group_omits = {5}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        WeatherStandIn.calls.append(url.path)
+
+        if url.path == '/weather':
+            city_id = CITY_IDS[query['q'][0]]
+            self._reply(200, self._observation(city_id))
+        elif url.path == '/group':
+            ids = [int(i) for i in query['id'][0].split(',')]
+            body = [self._observation(i) for i in ids if i not in self.group_omits]
+            self._reply(200, {'cnt': len(body), 'list': body})
+        else:
+            self._reply(404, {})
+
+    def _observation(self, city_id):
+        return {
+            'id': city_id,
+            'dt': 1700000000 + city_id,
+            'main': {'temp': 10.0 + city_id, 'humidity': 60, 'pressure': 1010},
+            'wind': {'speed': 2.5},
+            'weather': [{'description': 'clear sky'}]
+        }
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_batched_extraction():
+    print("📦 Testing batched extraction against a local stand-in server...")
+    server = ThreadingHTTPServer(('127.0.0.1', 0), WeatherStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    cities = [{'city': key.split(',')[0], 'country': key.split(',')[1]} for key in CITY_IDS]
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {
+            'api': {
+                'weather_base_url': f"{base}/weather",
+                'group_url': f"{base}/group",
+                'weather_api_key': 'test-key',
+                'use_group_endpoint': True,
+                'batch_size': 2,
+                'max_workers': 2,
+                'calls_per_minute': 6000,
+                'city_id_cache': os.path.join(tmp, 'city_ids.json')
+            },
+            'data_sources': {}
+        }
+        try:
+            # First run resolves every city individually and caches the IDs
+            first = DataExtractor(config).extract_weather_data(cities)
+            assert WeatherStandIn.calls.count('/weather') == 5
+            assert WeatherStandIn.calls.count('/group') == 0
+            with open(config['api']['city_id_cache']) as file:
+                assert json.load(file) == CITY_IDS
+
+            # Second run uses group requests; Berlin falls back to a single call
+            WeatherStandIn.calls.clear()
+            second = DataExtractor(config).extract_weather_data(cities)
+            print(f"   Requests on cached run: {WeatherStandIn.calls}")
+            assert WeatherStandIn.calls.count('/group') == 3
+            assert WeatherStandIn.calls.count('/weather') == 1
+        finally:
+            server.shutdown()
+
+    assert list(second['city']) == [c['city'] for c in cities]
+    assert list(second.columns) == list(first.columns)
+    assert second['temperature'].tolist() == [11.0, 12.0, 13.0, 14.0, 15.0]
+    print("✅ Batched extraction matches per-city results")
+
+if __name__ == "__main__":
+    test_batched_extraction()
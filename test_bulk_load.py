@@ -0,0 +1,83 @@
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.bulk_load import BulkLoader
+from src.load import DataLoader
+from src.synthetic import SyntheticDataGenerator
+
+def make_weather(n_cities=50, periods=100):
+    df = SyntheticDataGenerator(seed=5).weather_history(n_cities=n_cities, periods=periods, null_ratio=0.01)
+    df['extraction_time'] = pd.Timestamp('2024-02-01 12:00:00')
+    return df
+
+def test_bulk_matches_to_sql():
+    print("📦 Testing bulk insert against to_sql...")
+    df = make_weather()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bulk.db')}")
+        with engine.connect() as conn:
+            df.to_sql('expected', conn, index=False, method='multi', chunksize=1000)
+            df.head(0).to_sql('actual', conn, index=False)
+            assert BulkLoader(batch_size=777).insert(conn, df, 'actual') == len(df)
+            conn.commit()
+            expected = pd.read_sql(text("SELECT * FROM expected"), conn)
+            actual = pd.read_sql(text("SELECT * FROM actual"), conn)
+        engine.dispose()
+    pd.testing.assert_frame_equal(expected, actual)
+    assert actual['temperature'].isna().sum() == df['temperature'].isna().sum()
+    print(f"✅ {len(actual)} rows stored exactly as to_sql stores them")
+
+def test_wide_batch_and_pragma_restored():
+    print("🧱 Testing a batch beyond SQLite's bound-variable limit...")
+    # 40 columns x 5000 rows is far past the limit for a single multi-row INSERT
+    df = pd.DataFrame(np.arange(200000).reshape(5000, 40), columns=[f"c{i}" for i in range(40)])
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'wide.db')}")
+        bulk = BulkLoader(batch_size=5000, sqlite_synchronous='OFF')
+        with engine.connect() as conn:
+            before = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+            with bulk.fast_writes(conn):
+                assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 0
+                bulk.insert(conn, df, 'wide')
+                conn.commit()
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == before
+            assert conn.exec_driver_sql("SELECT COUNT(*), SUM(c39) FROM wide").fetchone() == (5000, int(df['c39'].sum()))
+            # By default the connection's own level is left alone
+            with BulkLoader().fast_writes(conn):
+                assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == before
+        engine.dispose()
+    print("✅ Wide batch loaded and synchronous restored")
+
+def test_staging_and_warehouse_load():
+    print("🏭 Testing staging and fact loads through the bulk path...")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {
+            'database': {'database': os.path.join(tmp, 'warehouse.db')},
+            'tables': {},
+            'dim_date': {'start': '2024-01-01', 'end': '2024-01-31'},
+            'load': {'batch_size': 1000}
+        }
+        loader = DataLoader(config)
+        assert loader.create_tables()
+        df = make_weather(n_cities=5, periods=24)
+        df['date_id'] = (df['timestamp'].dt.strftime('%Y%m%d')).astype('int32')
+        assert loader.load_to_staging(df, 'staging_weather')
+        assert loader.load_to_warehouse(df)
+        with loader.engine.connect() as conn:
+            staged = conn.execute(text("SELECT COUNT(*) FROM staging_weather")).scalar()
+            facts = conn.execute(text("SELECT COUNT(*) FROM fact_weather")).scalar()
+        loader.engine.dispose()
+        assert staged == facts == len(df)
+    print(f"✅ {facts} facts loaded")
+
+if __name__ == "__main__":
+    test_bulk_matches_to_sql()
+    test_wide_batch_and_pragma_restored()
+    test_staging_and_warehouse_load()
@@ -0,0 +1,143 @@
+import sys
+import os
+import tempfile
+from unittest import mock
+from sqlalchemy import text
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+# The same utils module DataLoader imports, so both see one engine registry
+from utils import get_db_connection, create_db_engine, dispose_engines, test_db_connection as check_connection
+from src.load import DataLoader
+
+# Answers a PostgreSQL server gives to the queries SQLAlchemy runs on first connect
+SERVER_ANSWERS = {
+    'select pg_catalog.version()': 'PostgreSQL 16.2 on x86_64-pc-linux-gnu',
+    'select current_schema()': 'public',
+    'show standard_conforming_strings': 'on',
+    'show transaction isolation level': 'read committed'
+}
+
+class FakeCursor:
+    """Just enough of a psycopg2 cursor for SQLAlchemy's PostgreSQL dialect"""
+    rowcount = -1
+    description = None
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.connection.executed.append(sql)
+        self.rows = [(SERVER_ANSWERS.get(' '.join(sql.split()).lower(), 1),)]
+        self.description = [('value', None, None, None, None, None, None)]
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    notices = []
+    status = 1
+    closed = 0
+    autocommit = False
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.executed = []
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+def mocked_psycopg2():
+    """Patches psycopg2.connect and the extras SQLAlchemy registers on each connection"""
+    connect = mock.patch('psycopg2.connect', side_effect=lambda **kwargs: FakeConnection(**kwargs))
+    extras = mock.patch.multiple('psycopg2.extras', register_uuid=mock.DEFAULT, register_default_json=mock.DEFAULT,
+                                 register_default_jsonb=mock.DEFAULT, HstoreAdapter=mock.DEFAULT)
+    return connect, extras
+
+def postgres_config(**pool):
+    return {
+        'database': {'dialect': 'postgresql', 'host': 'warehouse-db', 'port': 5433, 'user': 'etl',
+                     'password': 's3cret', 'database': 'data_warehouse', 'pool': pool},
+        'tables': {}
+    }
+
+def test_sqlite_engine_shared():
+    print("🔗 Testing one shared SQLite engine per database...")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {'database': {'dialect': 'sqlite', 'database': os.path.join(tmp, 'warehouse.db'),
+                               'pool': {'pool_size': 3, 'max_overflow': 2, 'pool_recycle': 600}},
+                  'tables': {}}
+        engine = get_db_connection(config)
+        assert DataLoader(config).engine is engine and DataLoader(config).engine is engine
+        assert engine.pool.size() == 3 and engine.pool._max_overflow == 2
+        assert engine.pool._pre_ping and engine.pool._recycle == 600
+        assert check_connection(config)
+
+        other = {'database': {'dialect': 'sqlite', 'database': os.path.join(tmp, 'other.db')}}
+        assert get_db_connection(other) is not engine
+        # A forked worker process gets its own engine
+        with mock.patch('os.getpid', return_value=os.getpid() + 1):
+            assert get_db_connection(config) is not engine
+
+        memory = create_db_engine({'database': {'dialect': 'sqlite', 'database': ':memory:'}})
+        with memory.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+        memory.dispose()
+
+        for bad in ({'dialect': 'oracle'}, {'dialect': 'sqlite', 'pool': {'pool_sise': 3}}):
+            try:
+                get_db_connection({'database': bad})
+                assert False, f"{bad} should be rejected"
+            except ValueError:
+                pass
+        dispose_engines()
+    print("✅ Loaders share the engine and its tuned pool")
+
+def test_postgresql_engine_with_mocked_dbapi():
+    print("🐘 Testing the PostgreSQL engine against a mocked DBAPI...")
+    connect_patch, extras_patch = mocked_psycopg2()
+    with connect_patch as connect, extras_patch as extras:
+        extras['HstoreAdapter'].get_oids.return_value = None
+        config = postgres_config(pool_size=4, pool_recycle=300)
+        engine = get_db_connection(config)
+        assert engine.dialect.name == 'postgresql' and engine.dialect.driver == 'psycopg2'
+        assert DataLoader(config).engine is engine
+        assert engine.pool.size() == 4 and engine.pool._recycle == 300
+
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+            assert conn.dialect.server_version_info == (16, 2)
+        assert connect.call_count == 1
+        assert connect.call_args.kwargs == {'host': 'warehouse-db', 'port': 5433, 'user': 'etl',
+                                            'password': 's3cret', 'dbname': 'data_warehouse', 'connect_timeout': 10}
+
+        # The pooled connection is reused, and pinged before being handed out again
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 2"))
+            pooled = conn.connection.dbapi_connection
+        assert connect.call_count == 1
+        assert pooled.executed[-2:] == ['SELECT 1', 'SELECT 2']
+        dispose_engines()
+    print("✅ PostgreSQL is configured from database.dialect with the pool settings")
+
+if __name__ == "__main__":
+    test_sqlite_engine_shared()
+    test_postgresql_engine_with_mocked_dbapi()
@@ -0,0 +1,120 @@
+import sys
+import os
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.http_client import HttpClient
+from src.http_cache import ResponseCache
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """Serves a fixed CSV body with an ETag and honours If-None-Match"""
+    protocol_version = 'HTTP/1.1'
+    body = b'City,Country,Population,Year\nLondon,GB,8982000,2023\n'
+    etag = '"v1"'
+    hits = []
+
+    def do_GET(self):
+        ETagHandler.hits.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+def test_ttl_and_conditional_get():
+    print("🗃️ Testing HTTP response cache...")
+    ETagHandler.hits.clear()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/population.csv"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_config = {'enabled': True, 'directory': tmp}
+        try:
+            client = HttpClient({}, cache_config)
+            assert client.get(url, cache_ttl=60, params={'appid': 's3cret'}).content == ETagHandler.body
+            # Fresh entry: no request at all
+            assert client.get(url, cache_ttl=60, params={'appid': 's3cret'}).content == ETagHandler.body
+            assert len(ETagHandler.hits) == 1
+            client.close()
+            # The API key in the query string is not written to disk
+            with open(os.path.join(tmp, 'index.json')) as file:
+                assert 's3cret' not in file.read()
+
+            # A new client reads the persisted index; an expired TTL revalidates
+            client = HttpClient({}, cache_config)
+            response = client.get(url, cache_ttl=0, params={'appid': 's3cret'})
+            stats = client.stats()
+            client.close()
+        finally:
+            server.shutdown()
+
+    print(f"   Server saw validators: {ETagHandler.hits}")
+    assert ETagHandler.hits == [None, '"v1"']
+    assert response.status_code == 200
+    assert response.content == ETagHandler.body
+    assert stats['cache_revalidated'] == 1
+    print("✅ Unchanged source cost one 304")
+
+def test_download_reuses_cached_file():
+    print("💾 Testing streamed download into the cache...")
+    ETagHandler.hits.clear()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/population.csv"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = HttpClient({}, {'enabled': True, 'directory': tmp})
+        try:
+            path, is_temporary = client.download(url, cache_ttl=0)
+            again, _ = client.download(url, cache_ttl=0)
+        finally:
+            client.close()
+            server.shutdown()
+        with open(again, 'rb') as file:
+            assert file.read() == ETagHandler.body
+
+    assert not is_temporary
+    assert path == again
+    assert ETagHandler.hits == [None, '"v1"']
+    print("✅ Second download answered by a 304")
+
+def test_lru_eviction():
+    print("🧹 Testing size-bounded LRU eviction...")
+    class FakeResponse:
+        def __init__(self, url, size):
+            self.url = url
+            self.content = b'x' * size
+            self.headers = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(tmp, max_bytes=250)
+        for name in ['a', 'b']:
+            cache.store(cache.make_key(name), FakeResponse(name, 100))
+        # Touch "a" so "b" becomes least recently used
+        cache.to_response(cache.make_key('a'))
+        cache.store(cache.make_key('c'), FakeResponse('c', 100))
+
+        assert cache.lookup(cache.make_key('a')) is not None
+        assert cache.lookup(cache.make_key('b')) is None
+        assert cache.lookup(cache.make_key('c')) is not None
+        assert cache.size() == 200
+    print("✅ Least recently used entry evicted")
+
+if __name__ == "__main__":
+    test_ttl_and_conditional_get()
+    test_download_reuses_cached_file()
+    test_lru_eviction()
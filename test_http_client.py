@@ -0,0 +1,73 @@
+import sys
+import os
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.http_client import HttpClient
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler that fails every request to /flaky once"""
+    protocol_version = 'HTTP/1.1'
+    failed = set()
+
+    def do_GET(self):
+        if self.path.startswith('/flaky') and self.path not in FlakyHandler.failed:
+            FlakyHandler.failed.add(self.path)
+            self._reply(503, b'unavailable')
+        else:
+            self._reply(200, b'ok')
+
+    def _reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_keep_alive_pool_reuse():
+    print("🔌 Testing pooled keep-alive session...")
+    server = start_server()
+    client = HttpClient({'pool_size': 2, 'backoff_factor': 0.01})
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        for _ in range(5):
+            assert client.get(f"{base}/ok").status_code == 200
+        stats = client.stats()
+        print(f"   Stats: {stats}")
+        assert stats['connections_opened'] == 1
+        assert stats['connections_reused'] == 4
+        assert stats['pool_hit_rate'] == 0.8
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_retry_on_server_error():
+    print("🔁 Testing retry with backoff on 5xx...")
+    server = start_server()
+    client = HttpClient({'max_retries': 2, 'backoff_factor': 0.01})
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        response = client.get(f"{base}/flaky/1")
+        stats = client.stats()
+        print(f"   Stats: {stats}")
+        assert response.status_code == 200
+        assert stats['retries'] == 1
+        assert stats['requests'] == 2
+        assert stats['failures'] == 0
+    finally:
+        client.close()
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_keep_alive_pool_reuse()
+    test_retry_on_server_error()
@@ -0,0 +1,267 @@
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import pandas as pd
+from sqlalchemy import event, text
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.load import DataLoader
+from src.transform import DataTransformer
+from src.migrations import SchemaMigrator, split_statements, SQL_DIR
+
+# sql/create_tables.sql as it stood before versioned migrations
+BASELINE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS staging_population (
+        city VARCHAR(100), country VARCHAR(10), population BIGINT, year INTEGER,
+        extraction_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS dim_city (
+        city_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        city_name VARCHAR(100) NOT NULL,
+        country_code VARCHAR(10) NOT NULL,
+        population BIGINT,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(city_name, country_code)
+    );
+    CREATE TABLE IF NOT EXISTS dim_date (
+        date_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        full_date DATE NOT NULL UNIQUE,
+        year INTEGER, month INTEGER, day INTEGER, quarter INTEGER, day_of_week INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS fact_weather (
+        weather_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        city_id INTEGER REFERENCES dim_city(city_id),
+        date_id INTEGER REFERENCES dim_date(date_id),
+        temperature DECIMAL(5,2), humidity INTEGER, pressure INTEGER, wind_speed DECIMAL(5,2),
+        weather_condition VARCHAR(100),
+        recorded_time TIMESTAMP,
+        loaded_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_fact_weather_city_date ON fact_weather(city_id, date_id);
+    CREATE INDEX IF NOT EXISTS idx_dim_city_name_country ON dim_city(city_name, country_code);
+    CREATE INDEX IF NOT EXISTS idx_dim_date_full_date ON dim_date(full_date);
+"""
+
+# The SQLite statements the loader ran before versioned migrations: dimensions, then facts
+BASELINE_LOAD = """
+    INSERT OR REPLACE INTO dim_city (city_name, country_code, population)
+    SELECT sw.city, sw.country, sp.population
+    FROM staging_weather sw
+    LEFT JOIN staging_population sp ON sw.city = sp.city AND sw.country = sp.country;
+    INSERT OR IGNORE INTO dim_date (full_date, year, month, day, quarter, day_of_week)
+    SELECT DISTINCT
+        date(sw.timestamp),
+        CAST(strftime('%Y', sw.timestamp) AS INTEGER),
+        CAST(strftime('%m', sw.timestamp) AS INTEGER),
+        CAST(strftime('%d', sw.timestamp) AS INTEGER),
+        CAST((strftime('%m', sw.timestamp) - 1) / 3 + 1 AS INTEGER),
+        CAST(strftime('%w', sw.timestamp) AS INTEGER) + 1
+    FROM staging_weather sw;
+"""
+
+BASELINE_FACTS = """
+    INSERT INTO fact_weather (city_id, date_id, temperature, humidity, pressure, wind_speed,
+                              weather_condition, recorded_time)
+    SELECT dc.city_id, dd.date_id, sw.temperature, sw.humidity, sw.pressure, sw.wind_speed,
+           sw.weather_description, sw.timestamp
+    FROM staging_weather sw
+    JOIN dim_city dc ON sw.city = dc.city_name AND sw.country = dc.country_code
+    JOIN dim_date dd ON date(sw.timestamp) = dd.full_date;
+"""
+
+def make_weather(timestamps):
+    rows = []
+    for ts in timestamps:
+        for city, country in [('London', 'GB'), ('Tokyo', 'JP')]:
+            rows.append({'city': city, 'country': country, 'timestamp': pd.Timestamp(ts),
+                         'temperature': 10.5, 'humidity': 70, 'pressure': 1012,
+                         'wind_speed': 3.25, 'weather_description': 'clear sky'})
+    return pd.DataFrame(rows)
+
+def build_baseline_warehouse(path, runs):
+    """A warehouse as the code before versioned migrations left it, one load per run"""
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(BASELINE_SCHEMA)
+        for timestamps in runs:
+            weather = make_weather(timestamps).assign(extraction_time=pd.Timestamp('2024-03-10'))
+            # pandas replaced the staging table, untyped, on every load
+            weather.to_sql('staging_weather', conn, if_exists='replace', index=False)
+            conn.executescript(BASELINE_LOAD + BASELINE_FACTS)
+        conn.commit()
+    finally:
+        conn.close()
+
+def query_file(path, sql):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+def make_config(tmp):
+    return {
+        'database': {'dialect': 'sqlite', 'database': os.path.join(tmp, 'warehouse.db')},
+        'tables': {},
+        'dim_date': {'start': '2024-01-01', 'end': '2024-01-31'}
+    }
+
+def make_loader(tmp, sql_dir=SQL_DIR):
+    loader = DataLoader(make_config(tmp))
+    loader.migrator = SchemaMigrator(sql_dir)
+    return loader
+
+def record_ddl(engine):
+    """Collect the DDL statements an engine runs from now on"""
+    statements = []
+    @event.listens_for(engine, 'before_cursor_execute')
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('CREATE', 'ALTER', 'DROP')):
+            statements.append(statement)
+    return statements, lambda: event.remove(engine, 'before_cursor_execute', capture)
+
+def write_migration(sql_dir, filename, sql):
+    os.makedirs(os.path.join(sql_dir, 'migrations'), exist_ok=True)
+    with open(os.path.join(sql_dir, 'migrations', filename), 'w') as file:
+        file.write(sql)
+
+def query(loader, sql):
+    with loader.engine.connect() as conn:
+        return conn.execute(text(sql)).fetchall()
+
+def test_split_statements():
+    print("✂️ Testing the SQL statement splitter...")
+    script = """
+        -- a comment; with a semicolon
+        CREATE TABLE t (note VARCHAR(20) DEFAULT 'a;b');
+        /* block; comment */ INSERT INTO t VALUES ('it''s; fine');
+        CREATE FUNCTION f() RETURNS int AS $body$ SELECT 1; $body$ LANGUAGE sql;
+    """
+    assert split_statements(script) == [
+        "CREATE TABLE t (note VARCHAR(20) DEFAULT 'a;b')",
+        "INSERT INTO t VALUES ('it''s; fine')",
+        "CREATE FUNCTION f() RETURNS int AS $body$ SELECT 1; $body$ LANGUAGE sql"
+    ]
+    assert split_statements("SELECT a/*x*/FROM t--y\nWHERE a > 1") == ["SELECT a FROM t \nWHERE a > 1"]
+    with open(os.path.join(SQL_DIR, 'queries.sql')) as file:
+        assert len(split_statements(file.read())) == 4
+    print("✅ Semicolons in comments and literals do not split statements")
+
+def test_fingerprint_skips_ddl():
+    print("🧬 Testing the schema fingerprint fast path...")
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = make_loader(tmp)
+        assert loader.create_tables()
+        assert query(loader, "SELECT version, name FROM schema_migrations ORDER BY version") == [
+            (1, 'baseline'), (2, 'dim_date_yyyymmdd'), (3, 'staging_and_fact_key')
+        ]
+
+        ddl, stop = record_ddl(loader.engine)
+        cwd = os.getcwd()
+        try:
+            # SQL files are found from the package, whatever the working directory
+            os.chdir(tmp)
+            assert make_loader(tmp).create_tables()
+        finally:
+            os.chdir(cwd)
+            stop()
+        assert ddl == []
+        loader.engine.dispose()
+    print("✅ A matching fingerprint runs no DDL")
+
+def test_pending_migrations():
+    print("🪜 Testing pending migrations...")
+    with tempfile.TemporaryDirectory() as tmp:
+        sql_dir = os.path.join(tmp, 'sql')
+        shutil.copytree(SQL_DIR, sql_dir)
+        assert make_loader(tmp, sql_dir).create_tables()
+
+        shipped = [migration.version for migration in SchemaMigrator(sql_dir).migrations]
+        write_migration(sql_dir, '0010_city_station.sql', """
+            -- Nearest weather station; comments may contain semicolons
+            ALTER TABLE dim_city ADD COLUMN station VARCHAR(20);
+            CREATE INDEX IF NOT EXISTS idx_dim_city_station ON dim_city(station);
+        """)
+        loader = make_loader(tmp, sql_dir)
+        ddl, stop = record_ddl(loader.engine)
+        assert loader.create_tables()
+        stop()
+        # The baseline is unchanged, so only the new migration ran
+        assert ddl and not any('fact_weather' in statement for statement in ddl)
+        assert [row[0] for row in query(loader, "SELECT version FROM schema_migrations ORDER BY version")] == shipped + [10]
+        query(loader, "SELECT station FROM dim_city")
+
+        # Migrations apply together or not at all
+        write_migration(sql_dir, '0011_broken.sql', """
+            CREATE TABLE station_readings (station VARCHAR(20));
+            ALTER TABLE no_such_table ADD COLUMN x INTEGER;
+        """)
+        fingerprint = query(loader, "SELECT fingerprint FROM schema_fingerprint")
+        assert not make_loader(tmp, sql_dir).create_tables()
+        assert query(loader, "SELECT name FROM sqlite_master WHERE name = 'station_readings'") == []
+        assert query(loader, "SELECT fingerprint FROM schema_fingerprint") == fingerprint
+
+        # An applied migration cannot be edited
+        os.remove(os.path.join(sql_dir, 'migrations', '0011_broken.sql'))
+        write_migration(sql_dir, '0010_city_station.sql', "ALTER TABLE dim_city ADD COLUMN station2 VARCHAR(20);")
+        assert not make_loader(tmp, sql_dir).create_tables()
+        loader.engine.dispose()
+    print("✅ Only pending migrations run, in one transaction")
+
+def test_upgrade_baseline_warehouse():
+    print("🏛️ Testing the upgrade of a warehouse built before migrations...")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Surrogate date ids follow load order, not date order
+        path = os.path.join(tmp, 'warehouse.db')
+        build_baseline_warehouse(path, [['2024-03-05 12:00'], ['2024-02-28 06:00', '2024-03-01 18:00']])
+        # A rerun of the last batch on PostgreSQL kept the city ids and loaded every fact again
+        conn = sqlite3.connect(path)
+        conn.executescript(BASELINE_FACTS)
+        conn.close()
+        assert query_file(path, "SELECT COUNT(*) FROM fact_weather") == 10
+        loader = make_loader(tmp)
+
+        # Until the migration runs, loads fail with a clear message
+        with loader.engine.connect() as conn:
+            try:
+                loader.ensure_dim_date(conn, '2024-03-01', '2024-03-31')
+                assert False, "surrogate date keys must be detected"
+            except ValueError as e:
+                assert 'create_tables()' in str(e)
+
+        assert loader.create_tables()
+        # Duplicate facts are gone and the natural key is enforced
+        assert query(loader, "SELECT name FROM sqlite_master WHERE name = 'uq_fact_weather_city_time'") != []
+        facts = query(loader, """
+            SELECT fw.date_id, dd.full_date, date(fw.recorded_time) FROM fact_weather fw
+            JOIN dim_date dd ON dd.date_id = fw.date_id ORDER BY fw.recorded_time
+        """)
+        assert [row[0] for row in facts] == [20240228] * 2 + [20240301] * 2 + [20240305] * 2
+        assert all(full_date == recorded for _, full_date, recorded in facts)
+        # dim_date is contiguous again, from the configured start to the last loaded day
+        assert query(loader, "SELECT COUNT(*), MIN(date_id), MAX(date_id) FROM dim_date") == [
+            (31 + 29 + 5, 20240101, 20240305)
+        ]
+
+        # Staging is typed again, so a day inside the old gaps loads back from it
+        columns = {row[1]: row[2] for row in query(loader, "PRAGMA table_info(staging_weather)")}
+        assert columns['date_id'] == 'INTEGER' and columns['temperature'] == 'DECIMAL(5,2)'
+        batch = DataTransformer().clean_weather_data(make_weather(['2024-03-03 09:00']))
+        assert loader.load_to_staging(batch, 'staging_weather')
+        assert loader.load_to_warehouse()
+        assert loader.last_load_stats['facts_inserted'] == 2
+        assert query(loader, """
+            SELECT COUNT(*) FROM fact_weather fw JOIN dim_date dd ON dd.date_id = fw.date_id
+        """) == [(8,)]
+        loader.engine.dispose()
+    print("✅ Dates are re-keyed, staging is rebuilt and duplicate facts are removed")
+
+if __name__ == "__main__":
+    test_split_statements()
+    test_fingerprint_skips_ddl()
+    test_pending_migrations()
+    test_upgrade_baseline_warehouse()
@@ -0,0 +1,62 @@
+import sys
+import os
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.transform import DataTransformer
+from src.parallel_transform import ParallelTransformer
+from src.synthetic import SyntheticDataGenerator
+
+def make_weather():
+    df = SyntheticDataGenerator(seed=3).weather_history(
+        n_cities=40, periods=50, duplicate_ratio=0.05, null_ratio=0.05
+    )
+    for col in ['city', 'country', 'weather_description']:
+        df[col] = df[col].astype(object).str.lower()
+    return df
+
+def test_parallel_matches_serial():
+    print("🧮 Testing parallel weather cleaning against the serial path...")
+    df = make_weather()
+    expected = DataTransformer().clean_weather_data(df.copy())
+    result = ParallelTransformer(workers=3, min_rows=0).clean_weather_data(df.copy())
+    result['extraction_time'] = expected['extraction_time']
+    pd.testing.assert_frame_equal(expected, result, check_categorical=False)
+    assert list(result['city'].cat.categories) == sorted(result['city'].cat.categories)
+    print(f"   {len(result)} rows identical, in input order")
+
+    # Mixed junk in a numeric column cannot go through Arrow; pickled instead
+    df['temperature'] = df['temperature'].astype(object)
+    df.loc[df.index[::9], 'temperature'] = 'n/a'
+    expected = DataTransformer().clean_weather_data(df.copy())
+    result = ParallelTransformer(workers=3, min_rows=0).clean_weather_data(df.copy())
+    result['extraction_time'] = expected['extraction_time']
+    pd.testing.assert_frame_equal(expected, result, check_categorical=False)
+    print("✅ Parallel output matches serial output")
+
+def test_parallel_population():
+    print("👥 Testing parallel population cleaning...")
+    df = SyntheticDataGenerator(seed=3).population_table(n_cities=300)
+    expected = DataTransformer().clean_population_data(df.copy())
+    result = ParallelTransformer(workers=2, min_rows=0).clean_population_data(df.copy())
+    result['extraction_time'] = expected['extraction_time']
+    pd.testing.assert_frame_equal(expected, result)
+    print("✅ Latest-year population matches serial output")
+
+def test_partitions_keep_cities_together():
+    print("🧩 Testing (country, city) partitioning...")
+    df = make_weather()
+    partitions = ParallelTransformer(workers=4).partition(df, 4)
+    assert sum(len(part) for part in partitions) == len(df)
+    owners = {}
+    for i, part in enumerate(partitions):
+        for key in zip(part['country'], part['city']):
+            assert owners.setdefault(key, i) == i
+    print(f"✅ {len(owners)} cities spread over {len(partitions)} partitions, none split")
+
+if __name__ == "__main__":
+    test_parallel_matches_serial()
+    test_parallel_population()
+    test_partitions_keep_cities_together()
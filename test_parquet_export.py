@@ -0,0 +1,106 @@
+import sys
+import os
+import tempfile
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.transform import DataTransformer
+from src.load import DataLoader
+from src.export import ParquetExporter
+
+def make_config(tmp, partitioned=False):
+    return {
+        'database': {'dialect': 'sqlite', 'database': os.path.join(tmp, 'warehouse.db')},
+        'tables': {},
+        'dim_date': {'start': '2024-01-01', 'end': '2024-03-31'},
+        'partitioning': {'enabled': partitioned, 'directory': os.path.join(tmp, 'partitions')},
+        'export': {'enabled': True, 'directory': os.path.join(tmp, 'parquet'), 'row_group_size': 4}
+    }
+
+def make_weather(timestamps):
+    rows = []
+    for ts in timestamps:
+        for city, country, temperature in [('London', 'GB', 5.5), ('Tokyo', 'JP', 9.5)]:
+            rows.append({
+                'city': city, 'country': country, 'timestamp': pd.Timestamp(ts),
+                'temperature': temperature, 'humidity': 70, 'pressure': 1012,
+                'wind_speed': 3.25, 'weather_description': 'clear sky'
+            })
+    return DataTransformer().clean_weather_data(pd.DataFrame(rows))
+
+def load(loader, batch):
+    assert loader.load_to_staging(batch, 'staging_weather')
+    assert loader.load_to_warehouse(batch)
+
+def parquet_files(directory):
+    return sorted(os.path.relpath(os.path.join(root, name), directory)
+                  for root, _, names in os.walk(directory) for name in names)
+
+def check_incremental_export(partitioned):
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp, partitioned)
+        loader = DataLoader(config)
+        exporter = ParquetExporter(config, loader.partitions)
+        assert loader.create_tables()
+
+        load(loader, make_weather(pd.date_range('2024-01-30', periods=6, freq='12h')))
+        assert exporter.export(loader.engine) == 12
+        first_files = parquet_files(exporter.directory)
+        assert {path.split(os.sep)[0] for path in first_files} == {'month_key=202401', 'month_key=202402'}
+        assert exporter.export(loader.engine) == 0
+
+        # Only the new facts are exported, into new files next to the old ones
+        load(loader, make_weather(pd.date_range('2024-02-02', periods=4, freq='12h')))
+        assert exporter.export(loader.engine) == 8
+        files = parquet_files(exporter.directory)
+        assert set(first_files) < set(files)
+
+        everything = exporter.scan()
+        assert len(everything) == 20 and not everything.duplicated(['city_id', 'recorded_time']).any()
+        assert 'month_key' not in everything.columns
+        loader.engine.dispose()
+
+def test_incremental_export():
+    print("🧱 Testing incremental Parquet export...")
+    check_incremental_export(partitioned=False)
+    check_incremental_export(partitioned=True)
+    print("✅ Each export appends only newly loaded facts")
+
+def test_scan_pushdown():
+    print("🔎 Testing projection and predicate pushdown...")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        loader = DataLoader(config)
+        exporter = ParquetExporter(config)
+        assert loader.create_tables()
+        load(loader, make_weather(pd.date_range('2024-01-28', periods=16, freq='12h')))
+        exporter.export(loader.engine)
+
+        table = exporter.scan(columns=['full_date', 'temperature'], start='2024-02-01', end='2024-02-03',
+                              cities=['Tokyo'], as_arrow=True)
+        assert table.column_names == ['full_date', 'temperature']
+        assert table.num_rows == 4
+        assert set(table.column('temperature').to_pylist()) == {9.5}
+
+        # Rows are sorted by date, so row groups carry narrow date_id ranges
+        path = os.path.join(exporter.directory, parquet_files(exporter.directory)[0])
+        metadata = pq.ParquetFile(path).metadata
+        assert metadata.num_row_groups > 1
+        date_index = metadata.schema.names.index('date_id')
+        ranges = [(metadata.row_group(i).column(date_index).statistics.min,
+                   metadata.row_group(i).column(date_index).statistics.max)
+                  for i in range(metadata.num_row_groups)]
+        assert ranges == sorted(ranges)
+        assert metadata.row_group(0).column(0).compression == 'ZSTD'
+
+        frame = exporter.scan(start='2024-01-01', end='2024-01-30')
+        assert sorted(frame['full_date'].astype(str).unique()) == ['2024-01-28', '2024-01-29']
+        loader.engine.dispose()
+    print("✅ Scans read only the requested columns, dates and cities")
+
+if __name__ == "__main__":
+    test_incremental_export()
+    test_scan_pushdown()
@@ -0,0 +1,129 @@
+import sys
+import os
+import tempfile
+import pandas as pd
+from sqlalchemy import text
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.transform import DataTransformer
+from src.load import DataLoader
+from src.query import QueryRunner
+
+def make_config(tmp):
+    return {
+        'database': {'dialect': 'sqlite', 'database': os.path.join(tmp, 'warehouse.db')},
+        'tables': {},
+        'dim_date': {'start': '2024-01-01', 'end': '2024-03-31'},
+        'partitioning': {
+            'enabled': True,
+            'directory': os.path.join(tmp, 'partitions'),
+            'archive_directory': os.path.join(tmp, 'archive')
+        }
+    }
+
+def make_weather(timestamps):
+    rows = []
+    for ts in timestamps:
+        for city, country, temperature in [('London', 'GB', 5.5), ('Tokyo', 'JP', 9.5)]:
+            rows.append({
+                'city': city, 'country': country, 'timestamp': pd.Timestamp(ts),
+                'temperature': temperature, 'humidity': 70, 'pressure': 1012,
+                'wind_speed': 3.25, 'weather_description': 'clear sky'
+            })
+    return DataTransformer().clean_weather_data(pd.DataFrame(rows))
+
+def test_monthly_partitions():
+    print("🗂️ Testing monthly fact_weather partitions...")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        loader = DataLoader(config)
+        assert loader.create_tables()
+
+        batch = make_weather(['2024-01-31 23:00', '2024-02-01 00:00', '2024-02-15 12:00'])
+        loader.load_to_staging(batch, 'staging_weather')
+        assert loader.load_to_warehouse(batch)
+        assert loader.last_load_stats['facts_inserted'] == 6
+        assert sorted(os.listdir(config['partitioning']['directory'])) == [
+            'fact_weather_2024_01.db', 'fact_weather_2024_02.db'
+        ]
+
+        # Rows are routed by month, and reloading the batch adds nothing
+        assert loader.load_to_warehouse(batch)
+        assert loader.last_load_stats['facts_inserted'] == 0
+        with loader.engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM fact_weather")).scalar() == 0
+
+        # Queries see only the partitions of the requested range
+        partitions = loader.partitions
+        count_sql = "SELECT COUNT(*) AS n FROM fact_weather"
+        assert partitions.query(loader.engine, count_sql, '2024-01-01', '2024-03-01')['n'][0] == 6
+        assert partitions.query(loader.engine, count_sql, '2024-02-01', '2024-02-10')['n'][0] == 2
+        assert partitions.query(loader.engine, count_sql, '2024-03-01', '2024-04-01')['n'][0] == 0
+        with loader.engine.connect() as conn:
+            aliases = partitions.create_pruned_view(conn, '2024-02-01', '2024-03-01')
+            assert aliases == ['fact_weather_2024_02']
+            partitions.drop_pruned_view(conn, aliases)
+
+        by_city = partitions.query(loader.engine, """
+            SELECT dc.city_name, AVG(fw.temperature) AS avg_temperature
+            FROM fact_weather fw JOIN dim_city dc ON fw.city_id = dc.city_id
+            GROUP BY dc.city_name ORDER BY dc.city_name
+        """, '2024-01-01', '2024-03-01')
+        assert by_city['avg_temperature'].tolist() == [5.5, 9.5]
+
+        # Archiving January moves its file out; February is untouched
+        runner = QueryRunner(loader.engine)
+        with loader.engine.connect() as conn:
+            version = runner.load_version(conn)
+        assert partitions.archive(loader.engine, '2024-02-01') == ['fact_weather_2024_01']
+        with loader.engine.connect() as conn:
+            # Cached results that read January are invalidated
+            assert runner.load_version(conn) == version + 1
+        assert partitions.query(loader.engine, count_sql, '2024-01-01', '2024-03-01')['n'][0] == 4
+        assert os.listdir(config['partitioning']['archive_directory']) == ['fact_weather_2024_01.db']
+        loader.engine.dispose()
+    print("✅ Facts are routed, pruned and archived by month")
+
+def test_partitioned_load_is_atomic():
+    print("⚛️ Testing a partitioned load that fails part way...")
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = DataLoader(make_config(tmp))
+        assert loader.create_tables()
+        batch = make_weather(['2024-01-31 23:00', '2024-02-15 12:00', '2024-04-02 08:00'])
+        loader.load_to_staging(batch, 'staging_weather')
+
+        # The second month's merge fails after January's went through
+        merge_facts = loader.merge_facts
+        calls = []
+        def failing_merge(conn, target='fact_weather', bounds=None):
+            calls.append(target)
+            if len(calls) == 2:
+                raise RuntimeError("disk full")
+            return merge_facts(conn, target, bounds)
+        loader.merge_facts = failing_merge
+        assert not loader.load_to_warehouse(batch)
+        count_sql = "SELECT COUNT(*) AS n FROM fact_weather"
+        assert loader.partitions.query(loader.engine, count_sql, '2024-01-01', '2024-05-01')['n'][0] == 0
+        with loader.engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM dim_city")).scalar() == 0
+            assert conn.execute(text("SELECT MAX(date_id) FROM dim_date")).scalar() == 20240331
+
+        loader.merge_facts = merge_facts
+        assert loader.load_to_warehouse(batch)
+        assert loader.last_load_stats['facts_inserted'] == 6
+        assert loader.partitions.query(loader.engine, count_sql, '2024-01-01', '2024-05-01')['n'][0] == 6
+
+        # More months than SQLite can attach at once still load, a group at a time
+        months = [f"2025-{month:02d}-10 12:00" for month in range(1, 13)]
+        batch = make_weather(months)
+        loader.load_to_staging(batch, 'staging_weather')
+        assert loader.load_to_warehouse(batch)
+        assert loader.last_load_stats == {'facts_inserted': 24, 'facts_already_loaded': 0}
+        loader.engine.dispose()
+    print("✅ Dimensions and every partition commit together")
+
+if __name__ == "__main__":
+    test_monthly_partitions()
+    test_partitioned_load_is_atomic()
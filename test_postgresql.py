@@ -1,6 +1,7 @@
 import os
 import sys
 from dotenv import load_dotenv
+from sqlalchemy import text
 
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
@@ -31,13 +32,13 @@ def test_postgresql_connection():
         # Test connection
         with engine.connect() as conn:
             # Test basic connection
-            result = conn.execute("SELECT version();")
+            result = conn.execute(text("SELECT version()"))
             version = result.fetchone()
             print(f"✅ PostgreSQL Connected!")
             print(f"📊 Version: {version[0]}")
             
             # Check if database exists
-            result = conn.execute("SELECT datname FROM pg_database WHERE datname = 'data_warehouse';")
+            result = conn.execute(text("SELECT datname FROM pg_database WHERE datname = 'data_warehouse'"))
             db_exists = result.fetchone()
             
             if db_exists:
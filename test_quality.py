@@ -0,0 +1,120 @@
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.quality import DataQualityChecker
+from src.transform import DataTransformer
+from src.streaming_transform import StreamingWeatherCleaner
+from src.load import DataLoader
+
+RULES = {
+    'range': {'humidity': [0, 100], 'pressure': [870, 1085]},
+    'not_null': ['city'],
+    'allowed': {'country': ['GB', 'JP']},
+    'unique': [['city', 'country', 'timestamp']]
+}
+
+def make_weather():
+    return pd.DataFrame({
+        'city': ['London', 'London', 'Tokyo', None, 'Paris', 'London'],
+        'country': ['GB', 'GB', 'JP', 'JP', 'FR', 'GB'],
+        'timestamp': pd.to_datetime(['2024-01-01 10:00', '2024-01-01 11:00', '2024-01-01 10:00',
+                                     '2024-01-01 10:00', '2024-01-01 10:00', '2024-01-01 10:00']),
+        'temperature': [5.0, 6.0, 9.0, 8.0, 7.0, 5.5],
+        'humidity': [50, 400, 70, 60, 55, 52],
+        'pressure': [1000, 0, 1002, 1003, 1004, 1001],
+        'wind_speed': [1.0, 2.0, 3.0, 4.0, 5.0, 1.5],
+        'weather_description': ['clear sky'] * 6
+    })
+
+def test_rules_split_valid_and_quarantined():
+    print("🚦 Testing data-quality rules...")
+    df = make_weather()
+    df['country'] = df['country'].astype('category')
+    valid, quarantined, counts = DataQualityChecker(RULES).validate(df)
+
+    assert valid['city'].tolist() == ['London', 'Tokyo']
+    assert counts == {
+        'range:humidity': 1,
+        'range:pressure': 1,
+        'not_null:city': 1,
+        'allowed:country': 1,
+        'unique:city,country,timestamp': 1
+    }
+    failed = dict(zip(quarantined.index, quarantined['failed_rules']))
+    assert failed[1] == 'range:humidity;range:pressure'
+    assert failed[3] == 'not_null:city'
+    assert failed[4] == 'allowed:country'
+    assert failed[5] == 'unique:city,country,timestamp'
+    print(f"✅ {len(valid)} valid rows, {len(quarantined)} quarantined")
+
+def test_rules_are_vectorized():
+    print("⚡ Testing rule throughput...")
+    rows = 1_000_000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'city': pd.Categorical.from_codes(rng.integers(0, 1000, rows), [f"City {i}" for i in range(1000)]),
+        'country': pd.Categorical.from_codes(rng.integers(0, 2, rows), ['GB', 'JP']),
+        'timestamp': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(rows), unit='s'),
+        'humidity': rng.integers(0, 101, rows).astype('int16'),
+        'pressure': rng.integers(900, 1050, rows).astype('int16')
+    })
+    df.loc[df.index[::1000], 'humidity'] = 400
+    start = time.perf_counter()
+    valid, quarantined, counts = DataQualityChecker(RULES).validate(df)
+    elapsed = time.perf_counter() - start
+    assert counts['range:humidity'] == rows // 1000
+    assert len(valid) + len(quarantined) == rows
+    print(f"✅ Checked {rows} rows against {len(counts)} rules in {elapsed:.2f}s")
+
+def test_quarantine_table():
+    print("🗄️ Testing the quarantine table...")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {'database': {'database': os.path.join(tmp, 'warehouse.db')}, 'tables': {}}
+        loader = DataLoader(config)
+        assert loader.create_tables()
+
+        # Extracted rows carry an is_mock flag the quarantine table does not store
+        clean = DataTransformer().clean_weather_data(make_weather().dropna(subset=['city']).assign(is_mock=False))
+        _, quarantined, _ = DataQualityChecker(RULES).validate(clean)
+        assert loader.load_to_quarantine(quarantined)
+        with loader.engine.connect() as conn:
+            rows = conn.execute(text("SELECT city, humidity, failed_rules FROM quarantine_weather ORDER BY rowid")).fetchall()
+        loader.engine.dispose()
+        assert rows[0] == ('London', 400, 'range:humidity;range:pressure')
+        assert len(rows) == len(quarantined)
+    print("✅ Failing rows are kept with the rules they broke")
+
+def test_rejected_rows_do_not_feed_imputation():
+    print("🩹 Testing imputation after the data-quality checks...")
+    weather = make_weather().iloc[[0, 1, 2]].assign(temperature=[5.0, 900.0, None])
+    checker = DataQualityChecker({'range': {'temperature': [-90, 60]}})
+    quarantined = []
+    def validate(df):
+        valid, rejected, _ = checker.validate(df)
+        quarantined.append(rejected)
+        return valid
+
+    clean = DataTransformer().clean_weather_data(weather, validate=validate)
+    assert clean['temperature'].tolist() == [5.0, 5.0]
+    assert quarantined[0]['temperature'].tolist() == [900.0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cleaner = StreamingWeatherCleaner(os.path.join(tmp, 'stats.json'))
+        streamed = pd.concat(list(cleaner.clean([weather], validate)), ignore_index=True)
+    assert streamed['temperature'].tolist() == [5.0, 5.0]
+    assert cleaner.pending['London,GB']['temperature'].count == 1
+    print("✅ Only passing rows decide the fill values")
+
+if __name__ == "__main__":
+    test_rules_split_valid_and_quarantined()
+    test_rules_are_vectorized()
+    test_quarantine_table()
+    test_rejected_rows_do_not_feed_imputation()
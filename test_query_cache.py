@@ -0,0 +1,106 @@
+import sys
+import os
+import tempfile
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.transform import DataTransformer
+from src.load import DataLoader
+from src.query import QueryRunner, normalize_sql
+
+AVG_BY_CITY = """
+    -- Average temperature by city
+    SELECT dc.city_name, AVG(fw.temperature) AS avg_temperature
+    FROM fact_weather fw
+    JOIN dim_city dc ON fw.city_id = dc.city_id
+    GROUP BY dc.city_name
+    ORDER BY dc.city_name;
+"""
+
+def make_weather(timestamp, temperature):
+    return DataTransformer().clean_weather_data(pd.DataFrame([
+        {'city': city, 'country': country, 'timestamp': pd.Timestamp(timestamp),
+         'temperature': temperature, 'humidity': 70, 'pressure': 1012,
+         'wind_speed': 3.25, 'weather_description': 'clear sky'}
+        for city, country in [('London', 'GB'), ('Tokyo', 'JP')]
+    ]))
+
+def load(loader, batch):
+    assert loader.load_to_staging(batch, 'staging_weather')
+    assert loader.load_to_warehouse(batch)
+
+def test_normalize_sql():
+    print("🧹 Testing SQL normalization...")
+    assert normalize_sql("SELECT  1 -- one\n FROM t;") == "SELECT 1 FROM t"
+    assert normalize_sql(AVG_BY_CITY) == normalize_sql(' '.join(AVG_BY_CITY.split()[5:]))
+    assert normalize_sql("SELECT  'A  -- b'  ;") == "SELECT 'A  -- b'"
+    print("✅ Formatting and comments do not change the cache key")
+
+def test_cache_invalidated_by_loads():
+    print("🧊 Testing the load-versioned query cache...")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {
+            'database': {'dialect': 'sqlite', 'database': os.path.join(tmp, 'warehouse.db')},
+            'tables': {},
+            'dim_date': {'start': '2024-01-01', 'end': '2024-01-31'}
+        }
+        loader = DataLoader(config)
+        assert loader.create_tables()
+        load(loader, make_weather('2024-01-15 10:00', 10.0))
+
+        runner = QueryRunner(loader.engine)
+        first = runner.run(AVG_BY_CITY)
+        assert first['avg_temperature'].tolist() == [10.0, 10.0]
+        first.loc[0, 'avg_temperature'] = -1.0  # callers cannot corrupt the cache
+        again = runner.run(' '.join(AVG_BY_CITY.split()[5:]))
+        assert again['avg_temperature'].tolist() == [10.0, 10.0]
+        assert runner.stats()['hits'] == 1 and runner.stats()['misses'] == 1
+
+        # A load bumps the version, so the next read goes back to the database
+        load(loader, make_weather('2024-01-15 11:00', 20.0))
+        assert runner.run(AVG_BY_CITY)['avg_temperature'].tolist() == [15.0, 15.0]
+        stats = runner.stats()
+        assert (stats['hits'], stats['misses'], stats['invalidations']) == (1, 2, 1)
+
+        # Parameters are part of the key
+        sql = "SELECT COUNT(*) AS n FROM fact_weather WHERE temperature > :t"
+        assert runner.run(sql, {'t': 15})['n'][0] == 2
+        assert runner.run(sql, {'t': 5})['n'][0] == 4
+        assert runner.run(sql, {'t': 15})['n'][0] == 2
+        assert runner.stats()['hits'] == 2
+
+        table = runner.run(AVG_BY_CITY, as_arrow=True)
+        assert table.column('avg_temperature').to_pylist() == [15.0, 15.0]
+
+        # A load with no new weather still updates city populations
+        population_sql = "SELECT city_name, population FROM dim_city ORDER BY city_name"
+        assert runner.run(population_sql)['population'].isna().all()
+        assert loader.load_to_staging(pd.DataFrame({'city': ['London', 'Tokyo'], 'country': ['GB', 'JP'],
+                                                    'population': [8982000, 13960000]}), 'staging_population')
+        assert loader.load_to_warehouse(pd.DataFrame())
+        assert runner.run(population_sql)['population'].tolist() == [8982000, 13960000]
+        loader.engine.dispose()
+    print(f"✅ Cache served repeats and dropped stale results: {runner.stats()}")
+
+def test_cache_evicts_by_size():
+    print("📏 Testing LRU eviction by result size...")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {'database': {'database': os.path.join(tmp, 'warehouse.db')}, 'tables': {}}
+        loader = DataLoader(config)
+        assert loader.create_tables()
+        runner = QueryRunner(loader.engine, max_bytes=400)
+        for n in range(5):
+            runner.run(f"SELECT {n} AS n")
+        assert runner.stats()['bytes'] <= 400
+        assert runner.stats()['entries'] < 5
+        runner.run("SELECT 4 AS n")
+        assert runner.stats()['hits'] == 1
+        loader.engine.dispose()
+    print("✅ Oldest results are evicted first")
+
+if __name__ == "__main__":
+    test_normalize_sql()
+    test_cache_invalidated_by_loads()
+    test_cache_evicts_by_size()
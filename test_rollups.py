@@ -0,0 +1,91 @@
+import sys
+import os
+import tempfile
+import pandas as pd
+from sqlalchemy import text
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.transform import DataTransformer
+from src.load import DataLoader
+from src.synthetic import SyntheticDataGenerator
+
+def read_queries(path):
+    """Split a queries file into its statements"""
+    with open(path, 'r') as file:
+        statements = [s.strip() for s in file.read().split(';')]
+    return [s for s in statements if any(line.strip() and not line.strip().startswith('--') for line in s.splitlines())]
+
+def make_config(tmp, **load):
+    return {
+        'database': {'dialect': 'sqlite', 'database': os.path.join(tmp, 'warehouse.db')},
+        'tables': {},
+        'dim_date': {'start': '2024-01-01', 'end': '2024-03-31'},
+        'load': load
+    }
+
+def make_batch(start, periods, stream):
+    raw = SyntheticDataGenerator(seed=9).weather_history(
+        n_cities=4, start=start, periods=periods, freq='6h', null_ratio=0.05, stream=stream
+    )
+    return DataTransformer().clean_weather_data(raw)
+
+def load(loader, batch):
+    population = DataTransformer().clean_population_data(SyntheticDataGenerator(seed=9).population_table(n_cities=4))
+    assert loader.load_to_staging(population, 'staging_population')
+    assert loader.load_to_staging(batch, 'staging_weather')
+    assert loader.load_to_warehouse(batch)
+
+def assert_rollup_queries_match(loader):
+    with loader.engine.connect() as conn:
+        for original, rollup in zip(read_queries('sql/queries.sql'), read_queries('sql/rollup_queries.sql')):
+            expected = pd.read_sql(text(original), conn)
+            actual = pd.read_sql(text(rollup), conn)
+            assert len(actual) > 0
+            pd.testing.assert_frame_equal(expected, actual, check_dtype=False, atol=1e-6)
+
+def test_rollups_match_fact_queries():
+    print("📊 Testing incremental rollups against the fact queries...")
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = DataLoader(make_config(tmp))
+        assert loader.create_tables()
+        # Overlapping batches spanning a month boundary, the second one re-delivered
+        first = make_batch('2024-01-25', 40, stream=0)
+        second = make_batch('2024-02-03', 40, stream=1)
+        load(loader, first)
+        load(loader, second)
+        load(loader, second)
+        assert_rollup_queries_match(loader)
+
+        with loader.engine.connect() as conn:
+            readings = conn.execute(text("SELECT SUM(reading_count) FROM rollup_weather_daily")).scalar()
+            facts = conn.execute(text("SELECT COUNT(*) FROM fact_weather")).scalar()
+        assert readings == facts
+
+        # Overwriting facts recomputes the days they fall on
+        loader.on_conflict = 'update'
+        changed = second.copy()
+        changed['temperature'] = changed['temperature'] + 10
+        load(loader, changed)
+        assert_rollup_queries_match(loader)
+        loader.engine.dispose()
+    print("✅ Rollup queries return the fact queries' results")
+
+def test_rollups_rebuilt_for_existing_facts():
+    print("🏗️ Testing rollup rebuild for facts loaded before rollups...")
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = DataLoader(make_config(tmp, rollups=False))
+        assert loader.create_tables()
+        load(loader, make_batch('2024-01-10', 30, stream=2))
+        loader.engine.dispose()
+
+        loader = DataLoader(make_config(tmp))
+        assert loader.create_tables()
+        assert_rollup_queries_match(loader)
+        loader.engine.dispose()
+    print("✅ Rollups are built from existing facts")
+
+if __name__ == "__main__":
+    test_rollups_match_fact_queries()
+    test_rollups_rebuilt_for_existing_facts()
@@ -0,0 +1,110 @@
+import sys
+import os
+import time
+import tempfile
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils import get_db_connection
+from src.load import DataLoader
+from src.maintenance import DatabaseMaintenance
+
+def make_config(tmp, **pragmas):
+    return {
+        'database': {'dialect': 'sqlite', 'database': os.path.join(tmp, 'warehouse.db'), 'sqlite_pragmas': pragmas},
+        'tables': {},
+        'dim_date': {'start': '2024-01-01', 'end': '2024-01-31'},
+        'maintenance': {'interval_seconds': 0.05, 'analyze_every': 2}
+    }
+
+def pragma(conn, name):
+    return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+def test_pragmas_on_every_connection():
+    print("⚙️ Testing the SQLite tuning profile...")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = get_db_connection(make_config(tmp))
+        with engine.connect() as first, engine.connect() as second:
+            for conn in (first, second):
+                assert pragma(conn, 'journal_mode') == 'wal'
+                assert pragma(conn, 'synchronous') == 1
+                assert pragma(conn, 'cache_size') == -65536
+                assert pragma(conn, 'mmap_size') == 268435456
+                assert pragma(conn, 'temp_store') == 2
+                assert pragma(conn, 'busy_timeout') == 5000
+        engine.dispose()
+
+        # Entries can be overridden, or dropped to keep SQLite's default
+        engine = get_db_connection(make_config(tmp, synchronous='FULL', mmap_size=None))
+        with engine.connect() as conn:
+            assert pragma(conn, 'synchronous') == 2
+            assert pragma(conn, 'mmap_size') == 0
+        engine.dispose()
+
+        # Partitioned warehouses keep a rollback journal, so loads across month files stay atomic
+        config = make_config(tmp)
+        config['partitioning'] = {'enabled': True, 'directory': os.path.join(tmp, 'partitions')}
+        engine = get_db_connection(config)
+        with engine.connect() as conn:
+            assert pragma(conn, 'journal_mode') == 'delete'
+            assert pragma(conn, 'synchronous') == 2
+            assert pragma(conn, 'cache_size') == -65536
+        engine.dispose()
+
+        for bad in ({'page_size': 4096}, {'synchronous': 'OFF; DROP TABLE dim_city'}):
+            try:
+                get_db_connection(make_config(tmp, **bad))
+                assert False, f"{bad} should be rejected"
+            except ValueError:
+                pass
+    print("✅ Every pooled connection gets the profile")
+
+def test_reader_does_not_block_loader():
+    print("📖 Testing reads concurrent with a load...")
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = DataLoader(make_config(tmp, busy_timeout=100))
+        assert loader.create_tables()
+        batch = pd.DataFrame({'city': ['London', 'Tokyo'], 'country': ['GB', 'JP'],
+                              'population': [8982000, 13960000], 'year': [2023, 2023]})
+        with loader.engine.connect() as reader:
+            # An open read transaction, as a dashboard query would hold
+            reader.exec_driver_sql("BEGIN")
+            assert reader.exec_driver_sql("SELECT COUNT(*) FROM staging_population").scalar() == 0
+            assert loader.load_to_staging(batch, 'staging_population')
+            assert reader.exec_driver_sql("SELECT COUNT(*) FROM staging_population").scalar() == 0
+            reader.rollback()
+            assert reader.exec_driver_sql("SELECT COUNT(*) FROM staging_population").scalar() == 2
+            # Loads keep the profile's synchronous level unless configured otherwise
+            assert pragma(reader, 'synchronous') == 1
+        loader.engine.dispose()
+    print("✅ The load committed while a reader held its snapshot")
+
+def test_maintenance():
+    print("🧽 Testing WAL checkpoint and ANALYZE maintenance...")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        loader = DataLoader(config)
+        assert loader.create_tables()
+        maintenance = DatabaseMaintenance(loader.engine, config)
+        report = maintenance.run()
+        assert report['analyzed'] and not report['checkpoint_busy']
+        assert os.path.getsize(os.path.join(tmp, 'warehouse.db-wal')) == 0
+        with loader.engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT COUNT(*) FROM sqlite_stat1").scalar() > 0
+        assert 'analyzed' not in maintenance.run()
+
+        maintenance.start()
+        deadline = time.time() + 5
+        while maintenance.runs < 4 and time.time() < deadline:
+            time.sleep(0.05)
+        maintenance.stop()
+        assert maintenance.runs >= 4
+        loader.engine.dispose()
+    print("✅ Maintenance checkpoints the WAL and refreshes statistics")
+
+if __name__ == "__main__":
+    test_pragmas_on_every_connection()
+    test_reader_does_not_block_loader()
+    test_maintenance()
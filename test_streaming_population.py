@@ -0,0 +1,87 @@
+import sys
+import os
+import shutil
+import tempfile
+from unittest import mock
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.extract import DataExtractor
+from src.transform import DataTransformer
+from src.load import DataLoader
+
+def write_population_csv(path):
+    rows = []
+    for i in range(250):
+        # The latest year only appears near the end of the file
+        year = 2023 if i >= 240 else 2020 + i % 3
+        rows.append({'City': f' city {i} ', 'Country': 'gb', 'Population': 1000 + i,
+                     'Year': year, 'Notes': 'unused'})
+    rows.append({'City': 'Broken', 'Country': 'GB', 'Population': None, 'Year': 2023, 'Notes': ''})
+    # A malformed figure drops its row, as in the in-memory path
+    rows.append({'City': 'Oslo', 'Country': 'NO', 'Population': 'unknown', 'Year': 2023, 'Notes': ''})
+    rows.append({'City': 'Bergen', 'Country': 'NO', 'Population': 'unknown', 'Year': 2025, 'Notes': ''})
+    # A later year with no population figures must not become the latest year
+    rows.append({'City': 'Pending', 'Country': 'GB', 'Population': None, 'Year': 2024, 'Notes': ''})
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+def test_streaming_population_ingest():
+    print("🌊 Testing chunked population ingest...")
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'population.csv')
+        write_population_csv(csv_path)
+        config = {
+            'api': {},
+            'data_sources': {'csv_url': csv_path, 'chunk_size': 50},
+            'database': {'database': os.path.join(tmp, 'warehouse.db')},
+            'tables': {}
+        }
+
+        extractor = DataExtractor(config)
+        transformer = DataTransformer()
+
+        with extractor.extract_population_chunks() as (latest_year, chunks):
+            assert latest_year == 2023
+            streamed = list(transformer.clean_population_chunks(chunks, latest_year))
+
+        full = transformer.clean_population_data(pd.read_csv(csv_path))
+        columns = ['city', 'country', 'population', 'year']
+        streamed_df = pd.concat(streamed, ignore_index=True)[columns]
+        print(f"   Streamed {len(streamed_df)} rows in {len(streamed)} chunks")
+        assert len(streamed_df) == 10
+        assert streamed_df['city'].tolist() == full['city'].tolist()
+        assert streamed_df['population'].tolist() == full['population'].tolist()
+        assert 'Notes' not in streamed[0].columns
+
+        loader = DataLoader(config)
+        with extractor.extract_population_chunks() as (latest_year, chunks):
+            assert loader.load_to_staging_chunks(
+                transformer.clean_population_chunks(chunks, latest_year), 'staging_population'
+            )
+        with loader.engine.connect() as conn:
+            staged = pd.read_sql('SELECT * FROM staging_population', conn)
+        loader.engine.dispose()
+        assert len(staged) == 10
+    print("✅ Streaming ingest matches the in-memory path")
+
+def test_spooled_file_removed():
+    print("🧽 Testing removal of the spooled population file...")
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'population.csv')
+        write_population_csv(csv_path)
+        spooled = os.path.join(tmp, 'spooled.csv')
+        shutil.copy(csv_path, spooled)
+        extractor = DataExtractor({'api': {}, 'data_sources': {'csv_url': 'https://example.invalid/population.csv'}})
+
+        # The caller stops without reading a single chunk
+        with mock.patch.object(extractor, '_spool_population_csv', return_value=(spooled, True)):
+            with extractor.extract_population_chunks() as (latest_year, chunks):
+                assert latest_year == 2023
+        assert not os.path.exists(spooled)
+    print("✅ The spool file is removed even when the chunks are never read")
+
+if __name__ == "__main__":
+    test_streaming_population_ingest()
+    test_spooled_file_removed()
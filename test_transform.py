@@ -0,0 +1,120 @@
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.transform import DataTransformer, normalize_categorical
+from src.streaming_transform import StreamingWeatherCleaner, RunningStats
+from src.synthetic import SyntheticDataGenerator
+
+def make_weather():
+    return pd.DataFrame({
+        'city': [' london', 'London', 'tokyo ', 'Tokyo'],
+        'country': ['gb', 'GB ', 'jp', 'JP'],
+        'timestamp': pd.to_datetime(['2024-01-01 10:00', '2024-01-01 11:00', '2024-01-01 10:00', '2024-01-01 11:00']),
+        'temperature': [1.5, 2.5, None, 'bad'],
+        'humidity': [50, 60, 70, 80],
+        'pressure': [1000, 1001, 1002, 1003],
+        'wind_speed': [1.0, 2.0, 3.0, 4.0],
+        'weather_description': ['Clear Sky', 'clear sky ', 'Rain', 'rain']
+    })
+
+def test_normalize_categorical_merges_categories():
+    print("🏷️ Testing per-category normalization...")
+    series = pd.Series(['Clear Sky', 'clear sky ', None, 'Rain'])
+    result = normalize_categorical(series, lambda s: s.str.lower().str.strip())
+    assert list(result.cat.categories) == ['clear sky', 'rain']
+    assert result.tolist()[:2] == ['clear sky', 'clear sky']
+    assert pd.isna(result.iloc[2])
+    print("✅ Equivalent spellings share one category")
+
+def test_clean_weather_compact_dtypes():
+    print("🗜️ Testing compact weather dtypes...")
+    raw = make_weather()
+    df = DataTransformer().clean_weather_data(raw)
+    # The input frame is not changed
+    pd.testing.assert_frame_equal(raw, make_weather())
+    assert str(df['city'].dtype) == 'category'
+    assert list(df['city'].cat.categories) == ['London', 'Tokyo']
+    assert df['country'].tolist() == ['GB', 'GB', 'JP', 'JP']
+    assert str(df['temperature'].dtype) == 'float32'
+    assert str(df['humidity'].dtype) == 'int16'
+    assert str(df['pressure'].dtype) == 'int16'
+    # Missing and unparseable temperatures take the mean of the rest
+    assert df['temperature'].tolist()[2:] == [2.0, 2.0]
+    print("✅ Categorical text and downcast numerics")
+
+def test_running_stats_merge():
+    print("📈 Testing mergeable running statistics...")
+    values = np.array([1.0, 2.0, 4.0, 8.0, 16.0])
+    stats = RunningStats()
+    for part in (values[:2], values[2:]):
+        stats.merge(len(part), part.mean(), part.var() * len(part))
+    assert stats.count == 5
+    assert abs(stats.mean - values.mean()) < 1e-12
+    assert abs(stats.variance - values.var(ddof=1)) < 1e-12
+    print("✅ Merged statistics match a single pass")
+
+def test_streaming_cleaner_chunk_invariant():
+    print("🧮 Testing chunked vs full streaming clean...")
+    history = SyntheticDataGenerator(seed=5).weather_history(
+        n_cities=8, periods=60, null_ratio=0.05, duplicate_ratio=0.1
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        state_path = os.path.join(tmp, 'stats.json')
+
+        # Seed the persisted statistics from an earlier run
+        seed_run = StreamingWeatherCleaner(state_path)
+        list(seed_run.clean([SyntheticDataGenerator(seed=6).weather_history(n_cities=8, periods=30)]))
+        seed_run.commit()
+
+        full = pd.concat(list(StreamingWeatherCleaner(state_path).clean([history.copy()])), ignore_index=True)
+        chunked_cleaner = StreamingWeatherCleaner(state_path)
+        chunks = [history.iloc[i:i + 70].copy() for i in range(0, len(history), 70)]
+        chunked = pd.concat(list(chunked_cleaner.clean(chunks)), ignore_index=True)
+
+    columns = ['city', 'country', 'timestamp', 'temperature', 'humidity', 'pressure', 'wind_speed']
+    print(f"   {len(history)} rows in, {len(full)} rows out")
+    assert len(full) == 8 * 60
+    assert full[columns].astype(str).equals(chunked[columns].astype(str))
+    assert full['temperature'].notna().all()
+    print("✅ Chunk boundaries do not change the result")
+
+def test_streaming_cleaner_cold_start():
+    print("🧊 Testing streaming clean with no saved statistics...")
+    weather = make_weather().iloc[[0, 1]].assign(humidity=[50, None], temperature=[1.5, None])
+    with tempfile.TemporaryDirectory() as tmp:
+        cleaner = StreamingWeatherCleaner(os.path.join(tmp, 'stats.json'))
+        clean = pd.concat(list(cleaner.clean([weather])), ignore_index=True)
+
+    assert clean['humidity'].dtype == 'int16'
+    assert clean['humidity'].tolist() == [50, 50]
+    assert clean['temperature'].tolist() == [1.5, 1.5]
+    print("✅ The batch mean fills gaps until statistics are saved")
+
+def test_missing_timestamp_dropped():
+    print("🕳️ Testing weather rows without a timestamp...")
+    weather = make_weather()
+    weather['timestamp'] = weather['timestamp'].astype(object)
+    weather.loc[1, 'timestamp'] = pd.NaT
+    df = DataTransformer().clean_weather_data(weather)
+    # Only the row without a date key is dropped, not the batch
+    assert df['date_id'].tolist() == [20240101] * 3
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cleaner = StreamingWeatherCleaner(os.path.join(tmp, 'stats.json'))
+        clean = pd.concat(list(cleaner.clean([weather])), ignore_index=True)
+    assert clean['date_id'].tolist() == [20240101] * 3
+    print("✅ Rows without a valid timestamp are dropped with a warning")
+
+if __name__ == "__main__":
+    test_normalize_categorical_merges_categories()
+    test_clean_weather_compact_dtypes()
+    test_running_stats_merge()
+    test_streaming_cleaner_chunk_invariant()
+    test_streaming_cleaner_cold_start()
+    test_missing_timestamp_dropped()
@@ -0,0 +1,177 @@
+import sys
+import os
+import tempfile
+import pandas as pd
+from sqlalchemy import text
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.transform import DataTransformer
+from src.load import DataLoader
+
+def make_config(tmp):
+    return {
+        'database': {'dialect': 'sqlite', 'database': os.path.join(tmp, 'warehouse.db')},
+        'tables': {},
+        'dim_date': {'start': '2024-01-01', 'end': '2024-01-31'}
+    }
+
+def make_weather(timestamps, cities=('London', 'Tokyo'), countries=('GB', 'JP')):
+    rows = []
+    for ts in timestamps:
+        for city, country in zip(cities, countries):
+            rows.append({
+                'city': city, 'country': country, 'timestamp': pd.Timestamp(ts),
+                'temperature': 10.5, 'humidity': 70, 'pressure': 1012,
+                'wind_speed': 3.25, 'weather_description': 'clear sky'
+            })
+    return DataTransformer().clean_weather_data(pd.DataFrame(rows))
+
+def make_population():
+    return DataTransformer().clean_population_data(pd.DataFrame({
+        'City': ['London', 'Tokyo'], 'Country': ['GB', 'JP'],
+        'Population': [8982000, 13960000], 'Year': [2023, 2023]
+    }))
+
+def query(loader, sql):
+    with loader.engine.connect() as conn:
+        return conn.execute(text(sql)).fetchall()
+
+def test_smart_date_keys():
+    print("📅 Testing smart-key date dimension...")
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = DataLoader(make_config(tmp))
+        assert loader.create_tables()
+        assert query(loader, "SELECT MIN(date_id), MAX(date_id), COUNT(*) FROM dim_date") == [(20240101, 20240131, 31)]
+
+        # A batch inside the pre-populated range needs no dim_date work
+        loader.load_to_staging(make_weather(['2024-01-15 10:00']), 'staging_weather')
+        loader.load_to_staging(make_population(), 'staging_population')
+        assert loader.load_to_warehouse()
+
+        # A later batch extends the dimension by just the missing days
+        loader.load_to_staging(make_weather(['2024-02-03 09:00']), 'staging_weather')
+        assert loader.load_to_warehouse()
+        assert query(loader, "SELECT MAX(date_id), COUNT(*) FROM dim_date") == [(20240203, 34)]
+
+        facts = query(loader, "SELECT DISTINCT date_id FROM fact_weather ORDER BY date_id")
+        assert facts == [(20240115,), (20240203,)]
+        loader.engine.dispose()
+    print("✅ Facts carry YYYYMMDD keys and dim_date grows incrementally")
+
+def test_failed_load_forgets_dim_date_range():
+    print("↩️ Testing dim_date after a rolled-back load...")
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = DataLoader(make_config(tmp))
+        assert loader.create_tables()
+        loader.load_to_staging(make_weather(['2024-02-03 09:00']), 'staging_weather')
+        loader.load_to_staging(make_population(), 'staging_population')
+
+        # Fail after dim_date was extended, so the whole load rolls back
+        merge_facts = loader.merge_facts
+        loader.merge_facts = lambda conn, *args: 1 // 0
+        assert not loader.load_to_warehouse()
+        assert query(loader, "SELECT MAX(date_id) FROM dim_date") == [(20240131,)]
+
+        loader.merge_facts = merge_facts
+        assert loader.load_to_warehouse()
+        assert query(loader, "SELECT MAX(date_id), COUNT(*) FROM dim_date") == [(20240203, 34)]
+        assert query(loader, "SELECT COUNT(*) FROM fact_weather f JOIN dim_date d ON f.date_id = d.date_id") == [(2,)]
+        loader.engine.dispose()
+    print("✅ The retried load extends dim_date again")
+
+def test_city_key_cache():
+    print("🔑 Testing dimension key cache...")
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = DataLoader(make_config(tmp))
+        assert loader.create_tables()
+        loader.load_to_staging(make_population(), 'staging_population')
+
+        first = make_weather(['2024-01-10 10:00'])
+        loader.load_to_staging(first, 'staging_weather')
+        assert loader.load_to_warehouse(first)
+        ids_before = dict(((r[0], r[1]), r[2]) for r in query(loader, "SELECT city_name, country_code, city_id FROM dim_city"))
+
+        # Re-loading known cities keeps their surrogate keys
+        second = make_weather(['2024-01-11 10:00'])
+        loader.load_to_staging(second, 'staging_weather')
+        assert loader.load_to_warehouse(second)
+        ids_after = dict(((r[0], r[1]), r[2]) for r in query(loader, "SELECT city_name, country_code, city_id FROM dim_city"))
+        assert ids_before == ids_after
+        assert len(loader._city_keys) == 2
+
+        # A new city refreshes the cache after its upsert
+        third = make_weather(['2024-01-12 10:00'], cities=('Berlin',), countries=('DE',))
+        loader.load_to_staging(third, 'staging_weather')
+        assert loader.load_to_warehouse(third)
+        assert len(loader._city_keys) == 3
+
+        orphans = query(loader, """
+            SELECT COUNT(*) FROM fact_weather fw
+            LEFT JOIN dim_city dc ON fw.city_id = dc.city_id
+            WHERE dc.city_id IS NULL
+        """)
+        assert orphans == [(0,)]
+        assert query(loader, "SELECT COUNT(*) FROM fact_weather") == [(5,)]
+        assert query(loader, "SELECT population FROM dim_city WHERE city_name = 'London'") == [(8982000,)]
+        loader.engine.dispose()
+    print("✅ Facts keyed from the cache; city_id stable across loads")
+
+def test_persistent_staging():
+    print("🧾 Testing truncate-and-load staging...")
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = DataLoader(make_config(tmp))
+        assert loader.create_tables()
+
+        loader.load_to_staging(make_weather(['2024-01-15 10:00', '2024-01-15 11:00']), 'staging_weather')
+        loader.load_to_staging(make_weather(['2024-01-16 10:00']), 'staging_weather')
+        population = make_population().assign(source='unused')
+        assert loader.load_to_staging(population, 'staging_population')
+
+        # Only the latest batch remains, in the typed, indexed table from create_tables.sql
+        assert query(loader, "SELECT COUNT(*), MIN(date_id) FROM staging_weather") == [(2, 20240116)]
+        types = dict((row[1], row[2]) for row in query(loader, "PRAGMA table_info(staging_weather)"))
+        assert types['city'] == 'VARCHAR(100)' and types['temperature'] == 'DECIMAL(5,2)'
+        indexes = [row[1] for row in query(loader, "PRAGMA index_list(staging_weather)")]
+        assert 'idx_staging_weather_city_country' in indexes
+        assert 'source' not in [row[1] for row in query(loader, "PRAGMA table_info(staging_population)")]
+        loader.engine.dispose()
+    print("✅ Staging keeps its schema and indexes across loads")
+
+def test_idempotent_fact_load():
+    print("🔁 Testing idempotent fact merge...")
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = DataLoader(make_config(tmp))
+        assert loader.create_tables()
+        batch = make_weather(['2024-01-15 10:00', '2024-01-15 11:00'])
+        loader.load_to_staging(batch, 'staging_weather')
+        assert loader.load_to_warehouse(batch)
+        assert loader.last_load_stats == {'facts_inserted': 4, 'facts_already_loaded': 0}
+
+        # Re-running the batch, or one that overlaps it, adds only new facts
+        assert loader.load_to_warehouse(batch)
+        assert loader.last_load_stats == {'facts_inserted': 0, 'facts_already_loaded': 4}
+        overlap = make_weather(['2024-01-15 11:00', '2024-01-15 12:00'])
+        loader.load_to_staging(overlap, 'staging_weather')
+        assert loader.load_to_warehouse(overlap)
+        assert query(loader, "SELECT COUNT(*) FROM fact_weather") == [(6,)]
+
+        # In update mode a re-delivered observation overwrites the stored one
+        loader.on_conflict = 'update'
+        overlap['temperature'] = overlap['temperature'] + 1
+        assert loader.load_to_warehouse(overlap)
+        assert query(loader, "SELECT COUNT(*), MAX(temperature) FROM fact_weather") == [(6, 11.5)]
+        plan = ' '.join(str(row) for row in query(loader, """
+            EXPLAIN QUERY PLAN SELECT 1 FROM fact_weather WHERE city_id = 1 AND recorded_time = '2024-01-15'
+        """))
+        assert 'uq_fact_weather_city_time' in plan
+        loader.engine.dispose()
+    print("✅ Reloading a batch does not duplicate facts")
+
+if __name__ == "__main__":
+    test_smart_date_keys()
+    test_failed_load_forgets_dim_date_range()
+    test_city_key_cache()
+    test_persistent_staging()
+    test_idempotent_fact_load()
@@ -0,0 +1,72 @@
+import sys
+import os
+import tempfile
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.extract import DataExtractor
+from src.watermarks import WatermarkStore
+
+CITIES = [
+    {'city': 'London', 'country': 'GB'},
+    {'city': 'Tokyo', 'country': 'JP'}
+]
+
+def test_filter_and_update():
+    print("🌊 Testing watermark filtering...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'watermarks.json')
+        store = WatermarkStore(path)
+        store.update(pd.DataFrame({
+            'city': ['London', 'London'],
+            'country': ['GB', 'GB'],
+            'timestamp': pd.to_datetime(['2024-01-01 10:00', '2024-01-01 11:00'])
+        }))
+
+        batch = pd.DataFrame({
+            'city': ['London', 'London', 'Tokyo'],
+            'country': ['GB', 'GB', 'JP'],
+            'timestamp': pd.to_datetime(['2024-01-01 11:00', '2024-01-01 12:00', '2024-01-01 09:00'])
+        })
+        new, dropped = WatermarkStore(path).filter_new(batch)
+        assert dropped == 1
+        assert new['timestamp'].tolist() == list(pd.to_datetime(['2024-01-01 12:00', '2024-01-01 09:00']))
+
+        due, skipped = store.cities_due(CITIES, 600, now=pd.Timestamp('2024-01-01 11:05'))
+        assert [c['city'] for c in skipped] == ['London']
+        assert [c['city'] for c in due] == ['Tokyo']
+    print("✅ Unchanged observations and fresh cities skipped")
+
+def test_extractor_skips_loaded_cities():
+    print("⏭️ Testing incremental extraction...")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {
+            'api': {},
+            'data_sources': {},
+            'incremental': {
+                'enabled': True,
+                'watermark_path': os.path.join(tmp, 'watermarks.json'),
+                'min_refresh_seconds': 600
+            }
+        }
+        extractor = DataExtractor(config)
+        first = extractor.extract_weather_data(CITIES)
+        assert len(first) == 2 and first['is_mock'].all()
+        # Mock fallback rows carry no real observation time
+        extractor.watermarks.update(first)
+        assert extractor.watermarks.marks == {}
+        assert len(DataExtractor(config).extract_weather_data(CITIES)) == 2
+
+        extractor.watermarks.update(first.assign(is_mock=False))
+        rerun = DataExtractor(config)
+        second = rerun.extract_weather_data(CITIES)
+        print(f"   Rerun stats: {rerun.last_run_stats}")
+        assert second.empty
+        assert rerun.last_run_stats['cities_skipped'] == 2
+    print("✅ Recently loaded cities were not re-fetched")
+
+if __name__ == "__main__":
+    test_filter_and_update()
+    test_extractor_skips_loaded_cities()